@@ -120,11 +120,13 @@ print(f"{my_frac2.den = }") # OK, my_frac2.den = 7
 # print(f"{my_frac2.__den = }")
 # Would raise AttributeError: 'Frac' object has no attribute '__den'
 # The private name __den is name-mangled to _Frac__den:
-print(f"{my_frac2.__dict__ = }") # {'_Frac__num': 22, '_Frac__den': 7}
-#                 ^^^^^^^^ special attribute __dict__
+# print(f"{my_frac2.__dict__ = }") # {'_Frac__num': 22, '_Frac__den': 7}
+#                   ^^^^^^^^ special attribute __dict__
 # system dictionary containing the values of attributes of an object
-# (Terms and conditions apply see __slots__ later on.)
-# {'_Frac__num': 22, '_Frac__den': 7}
+# Frac declares __slots__, so its instances have no __dict__ (this would
+# raise AttributeError): attributes are stored in fixed slots instead.
+print(f"{FracV2.__slots__ = }") # FracV2.__slots__ = ('__num', '__den', '__hash')
+# {'_Frac__num': 22, '_Frac__den': 7} is what __dict__ used to contain:
 #        ^^^^^ name from inside Frac
 #   ^^^^^^^^^^ name from outside Frac
 print(f"{my_frac2._Frac__num = }") # type: ignore # my_frac2._Frac__num = 22
@@ -0,0 +1,56 @@
+"""
+Script to measure the memory savings of :class:`frac_v2.Frac` using
+``__slots__`` and shared instances for common values.
+
+Usage: python 03-frac-memory.py [number of values, default 10_000_000]
+"""
+
+import sys
+import tracemalloc
+from collections.abc import Callable
+
+from frac_v2 import Frac
+
+class UnsharedFrac(Frac):
+    """
+    A subclass without ``__slots__``, so that its instances have a ``__dict__``,
+    as Frac instances used to. Subclasses don't use the shared instances.
+    """
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+
+def small_values(frac: Callable[[int, int], Frac]) -> list[Frac]:
+    """ Small integers and fractions, e.g. counts and simple ratios. """
+    return [frac(i % 33-16, 1+i % 16) for i in range(N)]
+
+def mixed_values(frac: Callable[[int, int], Frac]) -> list[Frac]:
+    """ Mostly values too large to be shared. """
+    return [frac(i % 1000, 1+i % 7) for i in range(N)]
+
+def measure(
+    workload: Callable[[Callable[[int, int], Frac]], list[Frac]],
+    frac: Callable[[int, int], Frac]
+) -> tuple[float, int]:
+    """
+    Returns the bytes allocated per value (including the list holding it)
+    and the number of distinct instances allocated by the workload.
+    """
+    tracemalloc.start()
+    values = workload(frac)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    distinct = len({id(f) for f in values})
+    return allocated/N, distinct
+
+print(f"{N = :_}")
+print(f"{sys.getsizeof(Frac(22, 7)) = }")
+print(f"{sys.getsizeof(UnsharedFrac(22, 7)) = }"
+      f" + {sys.getsizeof(UnsharedFrac(22, 7).__dict__) = }")
+
+for workload in (small_values, mixed_values):
+    for frac in (UnsharedFrac, Frac):
+        per_value, distinct = measure(workload, frac)
+        print(
+            f"{workload.__name__:>12} {frac.__name__:>12}: "
+            f"{per_value:6.1f} bytes/value, {distinct:>12_} instances"
+        )
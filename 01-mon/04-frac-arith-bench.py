@@ -0,0 +1,67 @@
+"""
+Script to benchmark the arithmetic of :class:`frac_v2.Frac` on large operands.
+
+Compares the current operators (which cancel common factors before
+multiplying) against the previous implementation (which multiplied first
+and normalised in the constructor) and against :class:`fractions.Fraction`.
+
+Usage: python 04-frac-arith-bench.py
+"""
+
+import operator
+import random
+import timeit
+from collections.abc import Callable
+from fractions import Fraction
+from typing import Any
+
+from frac_v2 import Frac
+
+# The previous implementation of the operators, for comparison.
+
+def naive_add(x: Frac, y: Frac) -> Frac:
+    sn, sd = x.num_den_pair
+    on, od = y.num_den_pair
+    return Frac(sn*od+sd*on, sd*od)
+
+def naive_sub(x: Frac, y: Frac) -> Frac:
+    sn, sd = x.num_den_pair
+    on, od = y.num_den_pair
+    return Frac(sn*od-sd*on, sd*od)
+
+def naive_mul(x: Frac, y: Frac) -> Frac:
+    return Frac(x.num*y.num, x.den*y.den)
+
+def naive_div(x: Frac, y: Frac) -> Frac:
+    return Frac(x.num*y.den, x.den*y.num)
+
+def random_operands(bits: int) -> tuple[Frac, Frac]:
+    """
+    Two random fractions of the given size, whose denominators share
+    a large common factor and with cross-cancellable factors,
+    which is typical of values which come out of longer computations.
+    """
+    common = random.getrandbits(bits//2) | 1
+    a, b, c, d = (random.getrandbits(bits//2) | 1 for _ in range(4))
+    return Frac(a*common, b*common*c), Frac(c*d, a*common)
+
+OPS: dict[str, tuple[Callable[[Any, Any], Any], Callable[[Frac, Frac], Frac]]] = {
+    "+": (operator.add, naive_add),
+    "-": (operator.sub, naive_sub),
+    "*": (operator.mul, naive_mul),
+    "/": (operator.truediv, naive_div),
+}
+
+random.seed(0)
+print(f"{'bits':>7} {'op':>3} {'Frac':>10} {'naive':>10} {'Fraction':>10}")
+for bits in (1_000, 10_000, 100_000):
+    x, y = random_operands(bits)
+    fx, fy = Fraction(x.num, x.den), Fraction(y.num, y.den)
+    number = max(1, 200_000//bits)
+    for name, (op, naive_op) in OPS.items():
+        assert naive_op(x, y) == op(x, y)
+        timings = [
+            min(timeit.repeat(lambda: f(a, b), number=number, repeat=3))/number
+            for f, a, b in [(op, x, y), (naive_op, x, y), (op, fx, fy)]
+        ]
+        print(f"{bits:>7} {name:>3} "+" ".join(f"{t*1e6:8.1f}µs" for t in timings))
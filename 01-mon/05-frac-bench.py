@@ -0,0 +1,186 @@
+"""
+Benchmark suite for fractions: compares :mod:`frac_v1`, :mod:`frac_v2`,
+:class:`fractions.Fraction` and :class:`decimal.Decimal` on common operations,
+over small, medium and huge operands. Note that Decimal is inexact: it works
+with the default context precision (28 digits), so it is only a reference.
+
+Reports time per operation and peak memory (tracemalloc) as JSON, and can
+compare against a saved baseline, failing on regressions.
+
+Usage:
+    python 05-frac-bench.py [--output FILE] [--baseline FILE] [--threshold T]
+                            [--impls NAME ...] [--sizes NAME ...]
+
+Examples:
+    python 05-frac-bench.py --output baseline.json
+    python 05-frac-bench.py --baseline baseline.json --threshold 0.2
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from decimal import Decimal
+from fractions import Fraction
+from functools import reduce
+from typing import Any, NamedTuple
+
+import frac_v1
+import frac_v2
+
+class Impl(NamedTuple):
+    """ The operations of a fraction implementation, as used by benchmarks. """
+    make: Callable[[int, int], Any]
+    parse: Callable[[str], Any]
+    add: Callable[[Any, Any], Any]
+    mul: Callable[[Any, Any], Any]
+    div: Callable[[Any, Any], Any]
+    hashable: bool
+
+def parse_decimal(s: str) -> Decimal:
+    num, _, den = s.partition("/")
+    return Decimal(num)/Decimal(den or 1)
+
+IMPLS: dict[str, Impl] = {
+    "frac_v1": Impl(
+        frac_v1.Frac, lambda s: frac_v1.Frac(*map(int, s.split("/"))),
+        frac_v1.Frac.add, frac_v1.Frac.mult, frac_v1.Frac.div,
+        hashable=False # frac_v1.Frac defines __eq__ but not __hash__
+    ),
+    "frac_v2": Impl(
+        frac_v2.Frac, frac_v2.Frac.from_str,
+        lambda x, y: x+y, lambda x, y: x*y, lambda x, y: x/y, hashable=True
+    ),
+    "Fraction": Impl(
+        Fraction, Fraction,
+        lambda x, y: x+y, lambda x, y: x*y, lambda x, y: x/y, hashable=True
+    ),
+    "Decimal": Impl(
+        lambda n, d: Decimal(n)/Decimal(d), parse_decimal,
+        lambda x, y: x+y, lambda x, y: x*y, lambda x, y: x/y, hashable=True
+    ),
+}
+
+SIZES: dict[str, tuple[int, int]] = {
+    # name: (bits of numerators and denominators, number of values)
+    "small": (10, 1_000),
+    "medium": (64, 1_000),
+    "huge": (1_000, 200),
+}
+
+def random_pairs(bits: int, count: int) -> list[tuple[int, int]]:
+    """ Random numerators and denominators, all non-zero (to allow division). """
+    rng = random.Random(bits)
+    return [
+        (
+            rng.choice((-1, 1))*(rng.getrandbits(bits) | 1),
+            rng.getrandbits(bits) | 1
+        )
+        for _ in range(count)
+    ]
+
+def benchmarks(
+    impl: Impl, pairs: list[tuple[int, int]]
+) -> dict[str, Callable[[], Any]]:
+    """
+    The benchmarks for an implementation: each one is a function
+    performing len(pairs) operations.
+    """
+    strings = [f"{n}/{d}" for n, d in pairs]
+    values = [impl.make(n, d) for n, d in pairs]
+    others = values[1:]+values[:1]
+    result: dict[str, Callable[[], Any]] = {
+        "construct": lambda: [impl.make(n, d) for n, d in pairs],
+        "from_str": lambda: [impl.parse(s) for s in strings],
+        "add_chain": lambda: reduce(impl.add, values),
+        "mul_chain": lambda: reduce(impl.mul, values),
+        "div_chain": lambda: reduce(impl.div, values),
+        "eq": lambda: [x == y for x, y in zip(values, others)],
+        "str": lambda: [str(x) for x in values],
+        "repr": lambda: [repr(x) for x in values],
+    }
+    if impl.hashable:
+        value_set = set(values)
+        value_dict = dict.fromkeys(values, 0)
+        result |= {
+            "hash": lambda: [hash(x) for x in values],
+            "set_membership": lambda: [x in value_set for x in others],
+            "dict_lookup": lambda: [value_dict.get(x) for x in others],
+        }
+    return result
+
+def run(impls: list[str], sizes: list[str], repeat: int) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for size in sizes:
+        bits, count = SIZES[size]
+        pairs = random_pairs(bits, count)
+        for name in impls:
+            for bench, f in benchmarks(IMPLS[name], pairs).items():
+                timings = timeit.repeat(f, number=1, repeat=repeat)
+                tracemalloc.start()
+                f()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                key = f"{name}/{size}/{bench}"
+                results[key] = {
+                    "time_per_op": min(timings)/count,
+                    "peak_bytes": peak,
+                }
+                print(
+                    f"{key:>36}: {min(timings)/count*1e6:10.3f}µs/op "
+                    f"{peak/1024:10.1f}KiB peak", file=sys.stderr
+                )
+    return results
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """ Returns descriptions of the regressions beyond the threshold. """
+    regressions = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for metric in ("time_per_op", "peak_bytes"):
+            if old[metric] and new[metric] > old[metric]*(1+threshold):
+                ratio = new[metric]/old[metric]
+                regressions.append(f"{key} {metric}: {ratio:.2f}x baseline")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", help="file to write JSON results to")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown counted as regression")
+    parser.add_argument("--impls", nargs="+", choices=IMPLS, default=list(IMPLS))
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report: dict[str, Any] = {
+        "python": platform.python_version(),
+        "results": run(args.impls, args.sizes, args.repeat),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(report["results"], baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Script to check the import-time budget of the :mod:`frac` package.
+
+Runs ``python -X importtime -c "import frac"`` in fresh interpreters and
+fails (with exit status 1) if importing the core type pulls in NumPy,
+or if the modules of the package take longer than the budget to import.
+The standard library modules it depends on (e.g. typing) are reported,
+but not counted: most programs import them anyway.
+
+Imports are timed with bytecode caches, as for installed packages, even if
+they are disabled (e.g. with PYTHONDONTWRITEBYTECODE): otherwise, the time
+to compile the sources (about 10ms for frac_v2) would be counted.
+
+Usage: python 06-frac-import-budget.py [budget in milliseconds, default 5]
+"""
+
+import os
+import subprocess
+import sys
+
+BUDGET_MS = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+RUNS = 5
+OWN_MODULES = ("frac", "frac_v2")
+""" Top-level names of the modules whose import time is counted. """
+
+def import_times() -> dict[str, tuple[int, int]]:
+    """
+    Imports frac in a fresh interpreter, returning the self and cumulative
+    import times (in microseconds) of each module imported as a result.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import frac"],
+        cwd=here, env=env, capture_output=True, text=True, check=True
+    )
+    times: dict[str, tuple[int, int]] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line.removeprefix("import time:").split("|")
+        self_us, cumulative_us, name = fields
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def is_own(module: str) -> bool:
+    return module.split(".")[0] in OWN_MODULES
+
+import_times() # warm-up, so that bytecode caches are written
+runs = [import_times() for _ in range(RUNS)]
+modules = set.intersection(*(set(run) for run in runs))
+best = {m: min(run[m][0] for run in runs) for m in modules}
+
+heavy = sorted(m for m in modules if m.split(".")[0] in ("numpy", "pandas"))
+own_ms = sum(t for m, t in best.items() if is_own(m))/1000
+other_ms = sum(t for m, t in best.items() if not is_own(m))/1000
+
+for module in sorted(modules, key=best.__getitem__, reverse=True)[:10]:
+    print(f"{best[module]/1000:8.2f}ms {module}")
+print(f"{own_ms = :.2f} (budget {BUDGET_MS:.2f}ms)")
+print(f"{other_ms = :.2f} (startup and standard library, not counted)")
+
+failures = []
+if heavy:
+    failures.append(f"importing frac also imports {', '.join(heavy)}")
+if own_ms > BUDGET_MS:
+    failures.append(f"importing frac takes {own_ms:.2f}ms > {BUDGET_MS:.2f}ms")
+for failure in failures:
+    print(f"FAILED: {failure}")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,78 @@
+"""
+Script to benchmark the fraction-free linear algebra of
+:class:`frac.FracMatrix` against naive Gaussian elimination on lists of
+:class:`frac_v2.Frac`, which normalises every entry after every update.
+
+Entries are random fractions with small numerators and denominators,
+so that the cost comes from the growth of intermediate values.
+
+Usage: python 07-frac-matrix-bench.py [sizes, default 50 200]
+"""
+
+import random
+import sys
+import time
+
+from frac import Frac, FracMatrix
+
+def naive_solve(a: list[list[Frac]], b: list[Frac]) -> tuple[Frac, list[Frac]]:
+    """
+    Gaussian elimination with back-substitution on lists of fractions,
+    returning the determinant and the solution of a @ x == b.
+    """
+    n = len(a)
+    rows = [row+[v] for row, v in zip(a, b)]
+    det = Frac.ONE
+    for c in range(n):
+        p = next(i for i in range(c, n) if rows[i][c] != 0)
+        if p != c:
+            rows[c], rows[p] = rows[p], rows[c]
+            det = -det
+        pivot_row = rows[c]
+        pivot = pivot_row[c]
+        det *= pivot
+        for i in range(c+1, n):
+            f = rows[i][c]/pivot
+            if f != 0:
+                rows[i] = [x-f*y for x, y in zip(rows[i], pivot_row)]
+    x = [Frac.ZERO]*n
+    for i in range(n-1, -1, -1):
+        t = rows[i][n]
+        for j in range(i+1, n):
+            t -= rows[i][j]*x[j]
+        x[i] = t/rows[i][i]
+    return det, x
+
+def random_system(n: int) -> tuple[list[list[Frac]], list[Frac]]:
+    def entry() -> Frac:
+        return Frac(random.randint(-99, 99), random.randint(1, 9))
+    return [[entry() for _ in range(n)] for _ in range(n)], [entry() for _ in range(n)]
+
+def main() -> None:
+    sizes = [int(s) for s in sys.argv[1:]] or [50, 200]
+    random.seed(0)
+    for n in sizes:
+        a, b = random_system(n)
+        m = FracMatrix(a)
+
+        start = time.perf_counter()
+        det, x = m.det(), m.solve(b)
+        fast = time.perf_counter()-start
+
+        start = time.perf_counter()
+        naive_det, naive_x = naive_solve(a, b)
+        naive = time.perf_counter()-start
+
+        assert det == naive_det and x == naive_x
+        print(
+            f"{n = :4}: det+solve naive {naive:8.3f}s, Bareiss {fast:8.3f}s "
+            f"(speedup {naive/fast:6.1f}x), det has {det.num.bit_length()} bits"
+        )
+        start = time.perf_counter()
+        inverse = m.inverse()
+        print(f"{n = :4}: inverse {time.perf_counter()-start:8.3f}s")
+        if n <= 50:
+            assert m@inverse == FracMatrix.identity(n)
+
+if __name__ == "__main__":
+    main()
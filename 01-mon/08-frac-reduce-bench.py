@@ -0,0 +1,67 @@
+"""
+Script to benchmark :func:`frac.reduce_sum` against a left-to-right ``sum()``
+and :meth:`Frac.sum`, on fractions with distinct prime denominators: the
+worst case for sums, since the denominator of the result is the product
+of all of them (n primes of ~log2(n) bits each).
+
+Usage: python 08-frac-reduce-bench.py [numbers of values, default 10**4 10**5]
+
+Beware that the size of the result grows like n*log(n): for 10**7 values,
+its denominator has about 3*10**8 bits.
+"""
+
+import os
+import random
+import sys
+import time
+from collections.abc import Callable
+
+import frac
+from frac import Frac
+
+def primes(count: int) -> list[int]:
+    """ The first count primes (sieve of Eratosthenes). """
+    limit = 16
+    while True:
+        sieve = bytearray([1])*limit
+        sieve[0:2] = b"\0\0"
+        for p in range(2, int(limit**0.5)+1):
+            if sieve[p]:
+                sieve[p*p::p] = bytes(len(range(p*p, limit, p)))
+        found = [p for p, is_prime in enumerate(sieve) if is_prime]
+        if len(found) >= count:
+            return found[:count]
+        limit *= 2
+
+def timed(name: str, f: Callable[[], Frac], skip: bool = False) -> Frac | None:
+    if skip:
+        print(f"{name:>24}: skipped")
+        return None
+    start = time.perf_counter()
+    result = f()
+    print(f"{name:>24}: {time.perf_counter()-start:8.2f}s")
+    return result
+
+def main() -> None:
+    # The guard below is required: worker processes import this module.
+    sizes = [int(eval(s)) for s in sys.argv[1:]] or [10**4, 10**5]
+    workers = max(os.cpu_count() or 1, 2)
+    rng = random.Random(0)
+    for n in sizes:
+        values = [Frac(rng.randint(1, 1000), p) for p in primes(n)]
+        print(f"{n = :_}")
+        results = [
+            timed("sum()", lambda: sum(values, Frac.ZERO), skip=n > 10**5),
+            timed("Frac.sum", lambda: Frac.sum(values), skip=n > 10**5),
+            timed("reduce_sum", lambda: frac.reduce_sum(values)),
+            timed(
+                f"reduce_sum({workers = })",
+                lambda: frac.reduce_sum(values, workers=workers)
+            ),
+        ]
+        computed = [r for r in results if r is not None]
+        assert all(r == computed[0] for r in computed)
+        print(f"{'result size':>24}: {computed[0].den.bit_length():_} bits")
+
+if __name__ == "__main__":
+    main()
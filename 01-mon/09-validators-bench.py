@@ -0,0 +1,142 @@
+"""
+Script to benchmark compiled validators (from :mod:`validators`) against
+a naive validator, which walks the annotation recursively for each value
+(with ``typing.get_origin`` and ``typing.get_args``), and against a
+hand-written validator for pairs, in the style of ``process_bad_pair``.
+
+Each annotation is checked on a batch of valid records, one record at a
+time and in bulk, and the validators are checked to agree on invalid ones.
+
+Usage: python 09-validators-bench.py [numbers of records, default 10**4 10**5]
+"""
+
+import random
+import sys
+import time
+import types
+import typing
+from collections.abc import Callable
+from typing import Any
+
+from validators import validator
+
+def naive_validate(value: Any, annotation: Any) -> None:
+    """ Recursive isinstance checks, walking the annotation for each value. """
+    if annotation is Any or annotation is object:
+        return
+    if annotation is None:
+        annotation = types.NoneType
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if origin is typing.Union or origin is types.UnionType:
+        for arg in args:
+            try:
+                naive_validate(value, arg)
+                return
+            except TypeError:
+                pass
+        raise TypeError(f"Expected {annotation}, found {value = }")
+    if origin is None:
+        if annotation is float:
+            annotation = (int, float)
+        if not isinstance(value, annotation):
+            raise TypeError(f"Expected {annotation}, found {value = }")
+        return
+    if not isinstance(value, origin):
+        raise TypeError(f"Expected {annotation}, found {value = }")
+    if origin is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            for item in value:
+                naive_validate(item, args[0])
+            return
+        if len(value) != len(args):
+            raise TypeError(f"Expected {annotation}, found {value = }")
+        for item, arg in zip(value, args):
+            naive_validate(item, arg)
+    elif origin is dict:
+        for key, item in value.items():
+            naive_validate(key, args[0])
+            naive_validate(item, args[1])
+    else:
+        for item in value:
+            naive_validate(item, args[0])
+
+def hand_validate_pair(pair: Any) -> None:
+    """ Hand-written validation of tuple[int, str], as in 01-hello-world.py. """
+    if not isinstance(pair, tuple):
+        raise TypeError(f"Pair must be tuple, found {pair = }")
+    fst, snd = pair
+    if not isinstance(fst, int):
+        raise TypeError(f"First argument must be integer, found {fst = }")
+    if not isinstance(snd, str):
+        raise TypeError(f"Second argument must be string, found {snd = }")
+
+def timed(f: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    f()
+    return time.perf_counter()-start
+
+def each(validate: Callable[[Any], None], records: list[Any]) -> None:
+    """ Validates the records one at a time. """
+    for record in records:
+        validate(record)
+
+def rand_str(rng: random.Random) -> str:
+    return "".join(rng.choices("abcdefgh", k=rng.randrange(1, 8)))
+
+RecordGen = Callable[[random.Random], Any]
+
+BENCHMARKS: list[tuple[Any, RecordGen]] = [
+    (tuple[int, str], lambda rng: (rng.randrange(100), rand_str(rng))),
+    (tuple[int | str, ...], lambda rng: tuple(
+        rng.randrange(100) if rng.random() < 0.5 else rand_str(rng) for _ in range(10)
+    )),
+    (list[float | None], lambda rng: [
+        rng.random() if rng.random() < 0.9 else None for _ in range(10)
+    ]),
+    (dict[str, int], lambda rng: {rand_str(rng): rng.randrange(100) for _ in range(10)}),
+    (frozenset[str], lambda rng: frozenset(rand_str(rng) for _ in range(10))),
+    (dict[str, list[tuple[int, str]] | None], lambda rng: {
+        rand_str(rng): [(rng.randrange(100), rand_str(rng)) for _ in range(3)]
+        for _ in range(5)
+    }),
+]
+
+INVALID: list[tuple[Any, Any]] = [
+    (tuple[int, str], (1, 2)),
+    (tuple[int, str], [1, "a"]),
+    (tuple[int | str, ...], (1, "a", 2.5)),
+    (list[float | None], [1.5, "a"]),
+    (dict[str, int], {"a": 1, 2: 3}),
+    (frozenset[str], {"a"}),
+    (dict[str, list[tuple[int, str]] | None], {"a": [(1, "b"), (2, 3)]}),
+]
+
+for annotation, invalid in INVALID:
+    for validate in (validator(annotation), lambda v: naive_validate(v, annotation)):
+        try:
+            validate(invalid)
+        except TypeError:
+            continue
+        raise AssertionError(f"Invalid record accepted, found {invalid = }")
+
+sizes = [int(arg) for arg in sys.argv[1:]] or [10**4, 10**5]
+rng = random.Random(0)
+print(f"{'records':>8} {'annotation':>40} {'naive':>8} {'compiled':>9} "
+      f"{'bulk':>8} {'speedup':>8}")
+for n in sizes:
+    for annotation, gen in BENCHMARKS:
+        records = [gen(rng) for _ in range(n)]
+        compiled = validator(annotation)
+        t_naive = timed(lambda: each(lambda r: naive_validate(r, annotation), records))
+        t_compiled = timed(lambda: each(compiled, records))
+        t_bulk = timed(lambda: compiled.validate_all(records))
+        name = repr(compiled).removeprefix("validator(").removesuffix(")")
+        print(f"{n:>8_} {name:>40} {t_naive:7.3f}s {t_compiled:8.3f}s "
+              f"{t_bulk:7.3f}s {t_naive/t_bulk:7.1f}x")
+    pairs = [BENCHMARKS[0][1](rng) for _ in range(n)]
+    compiled = validator(tuple[int, str])
+    t_hand = timed(lambda: each(hand_validate_pair, pairs))
+    t_compiled = timed(lambda: each(compiled, pairs))
+    t_bulk = timed(lambda: compiled.validate_all(pairs))
+    print(f"{n:>8_} {'tuple[int, str] (vs hand-written)':>40} {t_hand:7.3f}s "
+          f"{t_compiled:8.3f}s {t_bulk:7.3f}s")
@@ -0,0 +1,80 @@
+"""
+Script to benchmark compiled formulas (from :func:`frac.compile`) against
+:class:`Frac` operators, one row at a time and in batches, and against
+:class:`frac.arrays.FracArray` operators for columns of fractions.
+
+The compiled formulas are first checked to agree with the operators, and
+batches over FracArray columns with batches over lists, including formulas
+with negated constants (folded into literals by the compiler).
+
+Usage: python 10-frac-compile-bench.py [numbers of rows, default 10**4 10**5]
+"""
+
+import random
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+import frac
+from frac.arrays import FracArray
+from frac_v2 import Frac
+
+def timed(f: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    f()
+    return time.perf_counter()-start
+
+def rand_frac(rng: random.Random) -> Frac:
+    """ A random non-zero fraction, so that formulas can divide by x. """
+    return Frac(rng.choice((-1, 1))*rng.randrange(1, 1000), rng.randrange(1, 1000))
+
+Operators = Callable[[Any, Any], Any]
+
+BENCHMARKS: list[tuple[str, Operators]] = [
+    ("(x*y/x)+2", lambda x, y: (x*y/x)+2),
+    ("(x+y)/(x-y)+x*y", lambda x, y: (x+y)/(x-y)+x*y),
+    ("x**3-2*y", lambda x, y: x*x*x-2*y),
+]
+
+CHECKS: list[tuple[str, Operators]] = [
+    *BENCHMARKS,
+    ("x*-3", lambda x, y: x*-3),
+    ("x - -2", lambda x, y: x - -2),
+    ("-(2)+x", lambda x, y: -(2)+x),
+    ("x/-(1)", lambda x, y: x/-(1)),
+    ("-x*y", lambda x, y: -x*y),
+    ("-(-3)*x - -y", lambda x, y: -(-3)*x - -y),
+    ("x**-2*-1", lambda x, y: 1/(x*x)*-1),
+]
+
+rng = random.Random(0)
+xs = [rand_frac(rng) for _ in range(100)]
+ys = [rand_frac(rng) for _ in range(100)]
+# Distinct from xs, for the divisions by x-y.
+ys = [y if y != x else y+1 for x, y in zip(xs, ys)]
+for expr, operators in CHECKS:
+    compiled = frac.compile(expr, ["x", "y"])
+    expected = [operators(x, y) for x, y in zip(xs, ys)]
+    if compiled.batch(xs, ys) != expected:
+        raise AssertionError(f"Compiled formula disagrees, found {expr = }")
+    batch = compiled.batch(FracArray.from_fracs(xs), FracArray.from_fracs(ys))
+    if list(batch) != expected:
+        raise AssertionError(f"Array batch disagrees with list batch, found {expr = }")
+
+sizes = [int(arg) for arg in sys.argv[1:]] or [10**4, 10**5]
+print(f"{'rows':>8} {'formula':>20} {'operators':>10} {'compiled':>9} "
+      f"{'array ops':>10} {'array batch':>12}")
+for n in sizes:
+    xs = [rand_frac(rng) for _ in range(n)]
+    ys = [rand_frac(rng) for _ in range(n)]
+    ys = [y if y != x else y+1 for x, y in zip(xs, ys)]
+    xa, ya = FracArray.from_fracs(xs), FracArray.from_fracs(ys)
+    for expr, operators in BENCHMARKS:
+        compiled = frac.compile(expr, ["x", "y"])
+        t_ops = timed(lambda: [operators(x, y) for x, y in zip(xs, ys)])
+        t_compiled = timed(lambda: compiled.batch(xs, ys))
+        t_array_ops = timed(lambda: operators(xa, ya))
+        t_array_batch = timed(lambda: compiled.batch(xa, ya))
+        print(f"{n:>8_} {expr:>20} {t_ops:9.3f}s {t_compiled:8.3f}s "
+              f"{t_array_ops:9.3f}s {t_array_batch:11.3f}s")
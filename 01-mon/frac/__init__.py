@@ -0,0 +1,105 @@
+"""
+The fractions of :mod:`frac_v2`, packaged together with their extras.
+
+Importing this package only imports the core :class:`Frac` type (and its
+constants): it has no side effects, and it doesn't import NumPy. The extras
+are submodules which are only imported when first accessed, through the
+module-level ``__getattr__`` below:
+
+- :mod:`frac.arrays`: vectorised arrays of fractions (requires NumPy);
+- :mod:`frac.parsing`: streaming parsers for fractions in text form;
+- :mod:`frac.profiling`: opt-in instrumentation of the operations;
+- :mod:`frac.reduction`: balanced (and parallel) sums and products;
+- :mod:`frac.binary`: a compact binary format for sequences of fractions;
+- :mod:`frac.bounded`: fractions with bounded denominators;
+- :mod:`frac.caching`: an opt-in cache for the results of operations;
+- :mod:`frac.compiler`: compilation of formulas into fast functions;
+- :mod:`frac.formatting`: fast writers of fractions in text form;
+- :mod:`frac.index`: a sorted index of fractions;
+- :mod:`frac.matrix`: exact matrices, with fraction-free linear algebra.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any, Final
+
+from frac_v2 import Frac, FracAccumulator
+
+if TYPE_CHECKING:
+    # Static type checkers see the lazy attributes as regular imports.
+    from . import arrays as arrays
+    from . import binary as binary
+    from . import bounded as bounded
+    from . import caching as caching
+    from . import compiler as compiler
+    from . import formatting as formatting
+    from . import index as index
+    from . import matrix as matrix
+    from . import parsing as parsing
+    from . import profiling as profiling
+    from . import reduction as reduction
+    from .arrays import FracArray as FracArray
+    from .binary import FracReader as FracReader
+    from .bounded import BoundedFrac as BoundedFrac, Rounding as Rounding
+    from .caching import OpCache as OpCache
+    from .compiler import compile as compile
+    from .index import SortedFracIndex as SortedFracIndex
+    from .matrix import FracMatrix as FracMatrix
+    from .parsing import FracParseError as FracParseError
+    from .reduction import reduce_prod as reduce_prod, reduce_sum as reduce_sum
+
+ZERO: Final[Frac] = Frac.ZERO
+ONE: Final[Frac] = Frac.ONE
+PI: Final[Frac] = Frac.PI
+
+_LAZY_SUBMODULES: Final[frozenset[str]] = frozenset({
+    "arrays", "binary", "bounded", "caching", "compiler", "formatting",
+    "index", "matrix", "parsing", "profiling", "reduction",
+})
+""" Submodules imported on first access. """
+
+_LAZY_ATTRIBUTES: Final[dict[str, str]] = {
+    "FracArray": "arrays",
+    "FracReader": "binary",
+    "BoundedFrac": "bounded",
+    "Rounding": "bounded",
+    "OpCache": "caching",
+    "compile": "compiler",
+    "SortedFracIndex": "index",
+    "FracMatrix": "matrix",
+    "FracParseError": "parsing",
+    "reduce_sum": "reduction",
+    "reduce_prod": "reduction",
+}
+""" Names imported on first access, mapped to the submodule defining them. """
+
+__all__ = (
+    "Frac", "FracAccumulator", "ZERO", "ONE", "PI",
+    # Lazy submodules
+    "arrays", "binary", "bounded", "caching", "compiler", "formatting",
+    "index", "matrix", "parsing", "profiling", "reduction",
+    # Lazy attributes
+    "BoundedFrac", "FracArray", "FracMatrix", "FracParseError", "FracReader",
+    "OpCache", "Rounding", "SortedFracIndex", "compile", "reduce_prod",
+    "reduce_sum",
+)
+# A literal tuple, so that static type checkers can read it: it must be
+# kept in sync with _LAZY_SUBMODULES and _LAZY_ATTRIBUTES.
+
+def __getattr__(name: str) -> Any:
+    """
+    Called when an attribute is not found in the module:
+    imports lazy submodules and attributes on first access.
+    """
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value # cached: __getattr__ won't be called again
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,69 @@
+"""
+The wrappers installed on :class:`frac_v2.Frac` (and on :mod:`frac_v2`
+itself) by the opt-in extras, :mod:`frac.caching` and :mod:`frac.profiling`.
+
+Several extras can wrap the same method, and they can be enabled and
+disabled in any order: if each of them saved the method it found and
+restored it when disabled, exiting in any other order than the reverse of
+entering would leave stale wrappers in place for good. Instead, each extra
+installs a layer of wrappers here, and whenever a layer is added or removed,
+the wrappers of the affected attributes are rebuilt from the original
+values, in the order in which the layers were added (innermost first).
+Attributes wrapped by no layer get their original value back, so that
+disabled extras cost nothing.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, Final
+
+Wrapping = Callable[[Any], Any]
+""" A function building a wrapper for a value (e.g. a function or a staticmethod). """
+
+_lock: Final[threading.Lock] = threading.Lock()
+""" Protects the layers and the original values below. """
+
+_layers: dict[str, dict[tuple[Any, str], Wrapping]] = {}
+""" The installed layers, by owner, in the order in which they were added. """
+
+_originals: dict[tuple[Any, str], Any] = {}
+""" The original values of the attributes wrapped by some layer. """
+
+
+def add_layer(owner: str, wrappings: Mapping[tuple[Any, str], Wrapping]) -> None:
+    """
+    Installs a layer of wrappers: for each (target, name) key, the attribute
+    of the target is replaced by the result of the wrapping function, called
+    on the current value (the original, or the wrappers of previous layers).
+    """
+    with _lock:
+        if owner in _layers:
+            raise ValueError(f"Layer already installed, found {owner = }")
+        _layers[owner] = dict(wrappings)
+        for target, name in wrappings:
+            _originals.setdefault((target, name), vars(target)[name])
+        _rebuild(wrappings)
+
+
+def remove_layer(owner: str) -> None:
+    """ Removes a layer of wrappers, rebuilding the wrappers of the others. """
+    with _lock:
+        _rebuild(_layers.pop(owner))
+
+
+def _rebuild(keys: Iterable[tuple[Any, str]]) -> None:
+    """ Rebuilds the wrappers of the given attributes, from their original values. """
+    for key in keys:
+        target, name = key
+        value = _originals[key]
+        wrapped = False
+        for layer in _layers.values():
+            wrapping = layer.get(key)
+            if wrapping is not None:
+                value = wrapping(value)
+                wrapped = True
+        setattr(target, name, value)
+        if not wrapped:
+            del _originals[key]
@@ -0,0 +1,421 @@
+"""
+A vectorised container of fractions, built on top of :mod:`frac_v2`.
+
+Each operation on :class:`frac_v2.Frac` allocates a new instance and goes
+through Python-level dispatch. When working with millions of fractions,
+it is much faster to store numerators and denominators in two NumPy arrays
+and to let NumPy perform the arithmetic (and the gcd normalisation)
+elementwise, in compiled code.
+
+Values are stored as int64 whenever they fit. When a result could overflow
+int64, the computation is promoted to object dtype (arrays of Python ints),
+which is slower but exact: NumPy would otherwise silently wrap around.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, Final, overload
+
+import numpy as np
+import numpy.typing as npt
+
+from frac_v2 import Frac
+
+IntArray = npt.NDArray[Any]
+""" Type alias for arrays of int64 or object (Python int) dtype. """
+
+_INT64_MAX: Final[int] = 2**63-1
+"""
+Largest absolute value we allow in int64 arrays.
+Note that -2**63 is excluded, because negating it overflows.
+"""
+
+
+def _max_abs(values: IntArray) -> int:
+    """ Largest absolute value in the array, as a Python int. """
+    if values.size == 0:
+        return 0
+    return max(int(values.max()), -int(values.min()))
+
+
+def _demote(values: IntArray) -> IntArray:
+    """ Converts an object array back to int64, if all its values fit. """
+    if values.dtype == object and _max_abs(values) <= _INT64_MAX:
+        return values.astype(np.int64)
+    return values
+
+
+def _to_int_array(values: Any) -> IntArray:
+    """
+    Converts the given values to a 1D array of int64 or object dtype,
+    raising TypeError if the values are not integers.
+    """
+    arr = np.asarray(values)
+    if arr.ndim != 1:
+        raise ValueError(f"Expected 1D data, found {arr.ndim = }")
+    if arr.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if arr.dtype == object:
+        if not all(isinstance(v, int) for v in arr):
+            raise TypeError("Numerators and denominators must be integers.")
+        return _demote(arr)
+    if arr.dtype.kind not in "iu":
+        raise TypeError(f"Expected integer data, found {arr.dtype = }")
+    if _max_abs(arr) > _INT64_MAX:
+        return arr.astype(object)
+    return arr.astype(np.int64)
+
+
+def _scalar(value: int) -> IntArray:
+    """ Wraps an int into a 0D array, which broadcasts against 1D arrays. """
+    if abs(value) <= _INT64_MAX:
+        return np.array(value, dtype=np.int64)
+    return np.array(value, dtype=object)
+
+
+def _mul(lhs: IntArray, rhs: IntArray) -> IntArray:
+    """ Elementwise product, promoted to object dtype if it might overflow. """
+    if (lhs.dtype != object and rhs.dtype != object
+            and _max_abs(lhs)*_max_abs(rhs) <= _INT64_MAX):
+        return lhs*rhs
+    result: IntArray = lhs.astype(object)*rhs.astype(object)
+    return result
+
+
+def _add(lhs: IntArray, rhs: IntArray) -> IntArray:
+    """ Elementwise sum, promoted to object dtype if it might overflow. """
+    if (lhs.dtype != object and rhs.dtype != object
+            and _max_abs(lhs)+_max_abs(rhs) <= _INT64_MAX):
+        return lhs+rhs
+    result: IntArray = lhs.astype(object)+rhs.astype(object)
+    return result
+
+
+def _normalise(nums: IntArray, dens: IntArray) -> tuple[IntArray, IntArray]:
+    """
+    Makes denominators positive and divides out common factors,
+    then demotes the results to int64 if possible.
+    Presumes that no denominator is zero.
+    """
+    negative = dens < 0
+    if np.any(negative):
+        nums = np.where(negative, -nums, nums)
+        dens = np.where(negative, -dens, dens)
+    g = np.gcd(nums, dens)
+    return _demote(nums//g), _demote(dens//g)
+
+
+class FracArray:
+    """
+    An immutable 1D array of fractions, supporting elementwise arithmetic
+    and comparison with other arrays of the same length, with :class:`Frac`
+    and with :class:`int`.
+    """
+
+    @staticmethod
+    def from_fracs(fracs: Iterable[Frac | int]) -> FracArray:
+        """ Builds an array from fractions (or ints). """
+        pairs = [
+            (f, 1) if isinstance(f, int) else f.num_den_pair
+            for f in fracs
+        ]
+        nums = _to_int_array([n for n, _ in pairs])
+        dens = _to_int_array([d for _, d in pairs])
+        # Frac instances are already normalised.
+        return FracArray._trusted(nums, dens)
+
+    @staticmethod
+    def _trusted(nums: IntArray, dens: IntArray) -> FracArray:
+        """
+        Private constructor for data which is already normalised,
+        skipping validation and gcd computation.
+        """
+        instance = FracArray.__new__(FracArray)
+        instance.__nums = nums
+        instance.__dens = dens
+        return instance
+
+    __nums: IntArray
+    """ The numerators, int64 or object dtype. """
+
+    __dens: IntArray
+    """ The (positive) denominators, int64 or object dtype. """
+
+    def __init__(self, nums: Any, dens: Any = None) -> None:
+        """
+        Creates an array of fractions from integer numerators and
+        (optionally) denominators, which default to 1.
+        """
+        nums = _to_int_array(nums)
+        if dens is None:
+            dens = np.ones(len(nums), dtype=np.int64)
+        else:
+            dens = _to_int_array(dens)
+        if len(nums) != len(dens):
+            raise ValueError(
+                f"Length mismatch, found {len(nums) = } and {len(dens) = }"
+            )
+        if np.any(dens == 0):
+            raise ZeroDivisionError()
+        self.__nums, self.__dens = _normalise(nums, dens)
+
+    @property
+    def nums(self) -> IntArray:
+        """ A read-only view of the numerators. """
+        view = self.__nums.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def dens(self) -> IntArray:
+        """ A read-only view of the denominators. """
+        view = self.__dens.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def dtype(self) -> np.dtype[Any]:
+        """
+        The storage dtype: int64, or object if any value doesn't fit int64.
+        """
+        if self.__nums.dtype == object or self.__dens.dtype == object:
+            return np.dtype(object)
+        return np.dtype(np.int64)
+
+    def to_fracs(self) -> list[Frac]:
+        """ Converts the array to a list of fractions. """
+        return [
+            Frac(n, d)
+            for n, d in zip(self.__nums.tolist(), self.__dens.tolist())
+        ]
+
+    def to_float(self) -> npt.NDArray[np.float64]:
+        """ Converts the array to (approximate) floats. """
+        if self.dtype == object:
+            return np.array([
+                n/d for n, d in zip(self.__nums.tolist(), self.__dens.tolist())
+            ], dtype=np.float64)
+        return self.__nums/self.__dens
+
+    # Reductions
+
+    def sum(self) -> Frac:
+        """ The exact sum of all fractions in the array. """
+        return self.__reduce(FracArray.__add__, Frac(0))
+
+    def prod(self) -> Frac:
+        """ The exact product of all fractions in the array. """
+        return self.__reduce(FracArray.__mul__, Frac(1))
+
+    def min(self) -> Frac:
+        """ The smallest fraction in the array. """
+        if not len(self):
+            raise ValueError("min() of empty FracArray")
+        return self.__reduce(FracArray.__pick_min, Frac(0))
+
+    def max(self) -> Frac:
+        """ The largest fraction in the array. """
+        if not len(self):
+            raise ValueError("max() of empty FracArray")
+        return self.__reduce(FracArray.__pick_max, Frac(0))
+
+    def __reduce(
+        self,
+        combine: Callable[[FracArray, FracArray], FracArray],
+        empty: Frac
+    ) -> Frac:
+        """
+        Reduces the array pairwise, halving its length at each step.
+        This uses log2(n) vectorised operations rather than n Python ones,
+        and keeps the sizes of the operands balanced.
+        """
+        current = self
+        if not len(current):
+            return empty
+        while len(current) > 1:
+            half = len(current)//2
+            combined = combine(
+                current[0:2*half:2], current[1:2*half:2]
+            )
+            if len(current) % 2:
+                combined = combined.__concat(current[-1:])
+            current = combined
+        return current[0]
+
+    def __concat(self, other: FracArray) -> FracArray:
+        nums = _demote(np.concatenate([self.__nums, other.__nums]))
+        dens = _demote(np.concatenate([self.__dens, other.__dens]))
+        return FracArray._trusted(nums, dens)
+
+    def __pick_min(self, other: FracArray) -> FracArray:
+        mask = self <= other
+        return self.__select(mask, other)
+
+    def __pick_max(self, other: FracArray) -> FracArray:
+        mask = self >= other
+        return self.__select(mask, other)
+
+    def __select(self, mask: npt.NDArray[np.bool_], other: FracArray) -> FracArray:
+        """ Takes values from self where mask is True, from other elsewhere. """
+        nums = _demote(np.where(mask, self.__nums, other.__nums))
+        dens = _demote(np.where(mask, self.__dens, other.__dens))
+        return FracArray._trusted(nums, dens)
+
+    # Container protocol
+
+    def __len__(self) -> int:
+        return len(self.__nums)
+
+    @overload
+    def __getitem__(self, idx: int) -> Frac: ...
+    @overload
+    def __getitem__(self, idx: slice) -> FracArray: ...
+    def __getitem__(self, idx: int | slice) -> Frac | FracArray:
+        if isinstance(idx, slice):
+            return FracArray._trusted(self.__nums[idx], self.__dens[idx])
+        return Frac(int(self.__nums[idx]), int(self.__dens[idx]))
+
+    def __iter__(self) -> Iterator[Frac]:
+        return iter(self.to_fracs())
+
+    # Arithmetic
+
+    def __operands(
+        self, other: FracArray | Frac | int
+    ) -> tuple[IntArray, IntArray] | None:
+        """
+        Returns the numerators and denominators of the other operand,
+        as arrays which broadcast against those of self,
+        or None if the operand type is not supported.
+        """
+        if isinstance(other, FracArray):
+            if len(other) != len(self):
+                raise ValueError(
+                    f"Length mismatch, found {len(self) = } "
+                    f"and {len(other) = }"
+                )
+            return other.__nums, other.__dens
+        if isinstance(other, int):
+            return _scalar(other), _scalar(1)
+        if isinstance(other, Frac):
+            return _scalar(other.num), _scalar(other.den)
+        return None
+
+    def __neg__(self) -> FracArray:
+        return FracArray._trusted(-self.__nums, self.__dens)
+
+    def __add__(self, rhs: FracArray | Frac | int) -> FracArray:
+        operands = self.__operands(rhs)
+        if operands is None:
+            return NotImplemented
+        sn, sd = self.__nums, self.__dens
+        on, od = operands
+        nums = _add(_mul(sn, od), _mul(sd, on))
+        return FracArray._trusted(*_normalise(nums, _mul(sd, od)))
+
+    def __radd__(self, lhs: Frac | int) -> FracArray:
+        return self+lhs
+
+    def __sub__(self, rhs: FracArray | Frac | int) -> FracArray:
+        operands = self.__operands(rhs)
+        if operands is None:
+            return NotImplemented
+        sn, sd = self.__nums, self.__dens
+        on, od = operands
+        nums = _add(_mul(sn, od), _mul(sd, -on))
+        return FracArray._trusted(*_normalise(nums, _mul(sd, od)))
+
+    def __rsub__(self, lhs: Frac | int) -> FracArray:
+        return (-self)+lhs
+
+    def __mul__(self, rhs: FracArray | Frac | int) -> FracArray:
+        operands = self.__operands(rhs)
+        if operands is None:
+            return NotImplemented
+        on, od = operands
+        nums = _mul(self.__nums, on)
+        dens = _mul(self.__dens, od)
+        return FracArray._trusted(*_normalise(nums, dens))
+
+    def __rmul__(self, lhs: Frac | int) -> FracArray:
+        return self*lhs
+
+    def __truediv__(self, rhs: FracArray | Frac | int) -> FracArray:
+        operands = self.__operands(rhs)
+        if operands is None:
+            return NotImplemented
+        on, od = operands
+        if np.any(on == 0):
+            raise ZeroDivisionError()
+        nums = _mul(self.__nums, od)
+        dens = _mul(self.__dens, on)
+        return FracArray._trusted(*_normalise(nums, dens))
+
+    def __rtruediv__(self, lhs: Frac | int) -> FracArray:
+        if np.any(self.__nums == 0):
+            raise ZeroDivisionError()
+        inverse = FracArray._trusted(*_normalise(self.__dens, self.__nums))
+        return inverse*lhs
+
+    # Comparison (elementwise, returning boolean arrays like NumPy does)
+
+    def __cross(
+        self, other: FracArray | Frac | int
+    ) -> tuple[IntArray, IntArray] | None:
+        """
+        Cross-multiplies with the other operand: because denominators are
+        positive, self < other iff lhs < rhs for the returned lhs, rhs.
+        """
+        operands = self.__operands(other)
+        if operands is None:
+            return None
+        on, od = operands
+        return _mul(self.__nums, od), _mul(on, self.__dens)
+
+    def __eq__(self, other: Any) -> Any:
+        operands = self.__operands(other)
+        if operands is None:
+            return NotImplemented
+        # Both sides are normalised, so no multiplication is needed.
+        on, od = operands
+        return (self.__nums == on) & (self.__dens == od)
+
+    def __ne__(self, other: Any) -> Any:
+        eq = self.__eq__(other)
+        if eq is NotImplemented:
+            return NotImplemented
+        return ~eq
+
+    def __lt__(self, other: FracArray | Frac | int) -> npt.NDArray[np.bool_]:
+        cross = self.__cross(other)
+        if cross is None:
+            return NotImplemented
+        return np.asarray(cross[0] < cross[1], dtype=np.bool_)
+
+    def __le__(self, other: FracArray | Frac | int) -> npt.NDArray[np.bool_]:
+        cross = self.__cross(other)
+        if cross is None:
+            return NotImplemented
+        return np.asarray(cross[0] <= cross[1], dtype=np.bool_)
+
+    def __gt__(self, other: FracArray | Frac | int) -> npt.NDArray[np.bool_]:
+        cross = self.__cross(other)
+        if cross is None:
+            return NotImplemented
+        return np.asarray(cross[0] > cross[1], dtype=np.bool_)
+
+    def __ge__(self, other: FracArray | Frac | int) -> npt.NDArray[np.bool_]:
+        cross = self.__cross(other)
+        if cross is None:
+            return NotImplemented
+        return np.asarray(cross[0] >= cross[1], dtype=np.bool_)
+
+    __hash__ = None # type: ignore[assignment]
+    # Mutable-looking containers with elementwise __eq__ are not hashable.
+
+    def __repr__(self) -> str:
+        return f"FracArray({self.__nums.tolist()}, {self.__dens.tolist()})"
+
+    def __str__(self) -> str:
+        return f"[{', '.join(str(f) for f in self)}]"
@@ -0,0 +1,265 @@
+"""
+A compact binary format for sequences of fractions.
+
+Layout of a file (all fixed-width integers are little-endian):
+
+- header: the magic bytes ``FRAC`` followed by a version byte;
+- records: one per fraction, the numerator followed by the denominator,
+  each encoded as described below;
+- index (optional): the byte offsets of every ``stride``-th record, as u64;
+- trailer: the number of records (u64), the byte offset of the index (u64),
+  the index stride (u32, 0 if there is no index) and the magic ``FRAC``.
+
+Each integer is encoded as an unsigned varint header ``h`` (7 bits per byte,
+least significant group first, high bit set on all bytes but the last):
+
+- if ``h`` is even, the value is ``h >> 1`` (zigzag-decoded for numerators,
+  so that small negative numerators also take few bytes);
+- if ``h`` is odd, the value is stored in the following ``h >> 1`` bytes,
+  little-endian (two's complement for numerators): this is the escape used
+  for big integers, which would be slow to encode 7 bits at a time.
+
+Because the trailer is at the end, files can be written in a single forward
+pass, and readers can decode them lazily from a memory-mapped buffer.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from collections.abc import Iterable, Iterator
+from typing import IO, Final
+
+from frac_v2 import Frac
+
+MAGIC: Final[bytes] = b"FRAC"
+VERSION: Final[int] = 1
+
+_HEADER: Final[bytes] = MAGIC+bytes([VERSION])
+_TRAILER: Final[struct.Struct] = struct.Struct("<QQI4s")
+_OFFSET: Final[struct.Struct] = struct.Struct("<Q")
+
+_VARINT_BITS: Final[int] = 62
+""" Integers up to this many bits are varint-encoded, larger ones escaped. """
+
+
+def _varint(value: int, out: bytearray) -> None:
+    """ Appends the unsigned varint encoding of value to out. """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _encode_int(value: int, signed: bool, out: bytearray) -> None:
+    """ Appends the encoding of an integer (header + escaped bytes) to out. """
+    if value.bit_length() <= _VARINT_BITS:
+        if signed:
+            value = (value << 1) if value >= 0 else ((-value << 1)-1) # zigzag
+        _varint(value << 1, out)
+        return
+    length = (value.bit_length()+8)//8 if signed else (value.bit_length()+7)//8
+    _varint((length << 1) | 1, out)
+    out += value.to_bytes(length, "little", signed=signed)
+
+
+def _decode_int(view: memoryview, pos: int, signed: bool) -> tuple[int, int]:
+    """
+    Decodes an integer starting at the given position,
+    returning the integer and the position just after it.
+    """
+    header = view[pos]
+    pos += 1
+    if header & 0x80:
+        header &= 0x7F
+        shift = 7
+        while True:
+            byte = view[pos]
+            pos += 1
+            header |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+    if header & 1:
+        length = header >> 1
+        end = pos+length
+        return int.from_bytes(view[pos:end], "little", signed=signed), end
+    value = header >> 1
+    if signed:
+        value = (value >> 1) if not value & 1 else -((value+1) >> 1)
+    return value, pos
+
+
+def encode_frac(frac: Frac, out: bytearray) -> None:
+    """ Appends the encoding of a single fraction to out. """
+    num, den = frac.num_den_pair
+    _encode_int(num, True, out)
+    _encode_int(den, False, out)
+
+
+def decode_frac(view: memoryview, pos: int = 0) -> tuple[Frac, int]:
+    """
+    Decodes a single fraction starting at the given position,
+    returning the fraction and the position just after it.
+    Fractions were normalised when written, so they are not normalised again.
+    """
+    num, pos = _decode_int(view, pos, True)
+    den, pos = _decode_int(view, pos, False)
+    return Frac._trusted(num, den), pos
+
+
+def dump(
+    fracs: Iterable[Frac],
+    file: IO[bytes],
+    index_stride: int = 1024,
+    buffer_size: int = 1 << 20
+) -> int:
+    """
+    Writes the fractions to a binary file object, in a single forward pass,
+    returning the number of fractions written.
+
+    If index_stride is positive, the offset of every index_stride-th record
+    is stored in an index, for random access; if it is 0, there is no index.
+    """
+    if index_stride < 0:
+        raise ValueError(
+            f"Expected non-negative stride, found {index_stride = }"
+        )
+    out = bytearray(_HEADER)
+    written = 0 # bytes already flushed to the file
+    index: list[int] = []
+    count = 0
+    for frac in fracs:
+        if index_stride and count % index_stride == 0:
+            index.append(written+len(out))
+        encode_frac(frac, out)
+        count += 1
+        if len(out) >= buffer_size:
+            file.write(out)
+            written += len(out)
+            out.clear()
+    index_offset = written+len(out)
+    for offset in index:
+        out += _OFFSET.pack(offset)
+    out += _TRAILER.pack(count, index_offset, index_stride, MAGIC)
+    file.write(out)
+    return count
+
+
+def dumps(fracs: Iterable[Frac], index_stride: int = 1024) -> bytes:
+    """ Returns the binary encoding of the fractions. """
+    from io import BytesIO
+    buffer = BytesIO()
+    dump(fracs, buffer, index_stride)
+    return buffer.getvalue()
+
+
+class FracReader:
+    """
+    A read-only sequence of fractions, decoded lazily from a buffer in the
+    binary format. The buffer is not copied, so readers can be created
+    cheaply on memory-mapped multi-GB files.
+    """
+
+    @staticmethod
+    def open(path: str | os.PathLike[str]) -> FracReader:
+        """
+        Memory-maps the file at the given path and returns a reader for it.
+        The reader should be closed after use (or used in a with block).
+        """
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return FracReader(mapped, _owned=mapped)
+
+    __view: memoryview
+    """ A view of the buffer (no copy). """
+
+    __owned: mmap.mmap | None
+    """ A memory map to be closed together with the reader, if any. """
+
+    __len: int
+    """ The number of fractions. """
+
+    __index_offset: int
+    """ The byte offset of the index, which is also the end of the records. """
+
+    __stride: int
+    """ The index stride, 0 if there is no index. """
+
+    def __init__(
+        self,
+        buffer: bytes | bytearray | memoryview | mmap.mmap,
+        _owned: mmap.mmap | None = None
+    ) -> None:
+        view = memoryview(buffer).cast("B")
+        if len(view) < len(_HEADER)+_TRAILER.size:
+            raise ValueError("Buffer too short for the binary format.")
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError("Buffer doesn't start with the magic bytes.")
+        if view[len(MAGIC)] != VERSION:
+            raise ValueError(f"Unsupported version, found {view[len(MAGIC)]}")
+        count, index_offset, stride, magic = _TRAILER.unpack_from(
+            view, len(view)-_TRAILER.size
+        )
+        if magic != MAGIC:
+            raise ValueError("Buffer doesn't end with the magic bytes.")
+        self.__view = view
+        self.__owned = _owned
+        self.__len = count
+        self.__index_offset = index_offset
+        self.__stride = stride
+
+    def close(self) -> None:
+        """ Releases the buffer (and closes the memory map, if owned). """
+        self.__view.release()
+        if self.__owned is not None:
+            self.__owned.close()
+
+    def __enter__(self) -> FracReader:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.__len
+
+    def __iter__(self) -> Iterator[Frac]:
+        return self.iter_from(0)
+
+    def iter_from(self, start: int) -> Iterator[Frac]:
+        """ Lazily decodes the fractions from the given index onwards. """
+        if start >= self.__len:
+            return
+        view = self.__view
+        pos = self.__seek(start)
+        end = self.__index_offset
+        while pos < end:
+            frac, pos = decode_frac(view, pos)
+            yield frac
+
+    def __getitem__(self, idx: int) -> Frac:
+        if idx < 0:
+            idx += self.__len
+        if not 0 <= idx < self.__len:
+            raise IndexError(f"Index out of range, found {idx = }")
+        return decode_frac(self.__view, self.__seek(idx))[0]
+
+    def __seek(self, idx: int) -> int:
+        """
+        Byte offset of the record with the given index: jumps to the closest
+        indexed record before it (if there is an index), then skips forward.
+        """
+        view = self.__view
+        pos = len(_HEADER)
+        skip = idx
+        if self.__stride and idx < self.__len:
+            entry, skip = divmod(idx, self.__stride)
+            (pos,) = _OFFSET.unpack_from(
+                view, self.__index_offset+entry*_OFFSET.size
+            )
+        for _ in range(skip):
+            _, pos = _decode_int(view, pos, True)
+            _, pos = _decode_int(view, pos, False)
+        return pos
@@ -0,0 +1,216 @@
+"""
+Fractions with bounded denominators, for long iterative computations.
+
+Exact arithmetic on fractions tends to make denominators grow at every step
+(e.g. in chains of products and quotients), and so does the cost of each
+step. A :class:`BoundedFrac` rounds the result of every operation to the
+closest fraction with denominator at most ``max_den``, which keeps the cost
+of each operation constant; a shared :class:`Rounding` keeps track of the
+rounding errors.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from frac_v2 import Frac
+
+DEFAULT_MAX_DEN = 1_000_000
+""" The default bound on denominators (same as Fraction.limit_denominator). """
+
+
+class Rounding:
+    """
+    The rounding policy of a computation with bounded fractions, which also
+    keeps statistics on the roundings performed: all the bounded fractions
+    derived from the ones created by the same :class:`Rounding` share it.
+
+    Statistics are kept here, rather than on each value, because values are
+    often used more than once in a computation (e.g. x*pi/(c+x)), so summing
+    the errors of the operands would count the same roundings many times.
+    """
+
+    __max_den: int
+    """ The bound on denominators. """
+
+    __error: Frac
+    """ The total absolute rounding error. """
+
+    __count: int
+    """ The number of operations whose result was rounded. """
+
+    def __init__(self, max_den: int = DEFAULT_MAX_DEN) -> None:
+        if max_den < 1:
+            raise ValueError(f"Expected positive max_den, found {max_den = }")
+        self.__max_den = max_den
+        self.__error = Frac.ZERO
+        self.__count = 0
+
+    @property
+    def max_den(self) -> int:
+        """ The bound on denominators. """
+        return self.__max_den
+
+    @property
+    def error(self) -> Frac:
+        """
+        The total absolute rounding error, summed over all the rounded
+        operations, each rounded up to a multiple of 1/max_den**2 (so that
+        its denominator stays bounded too). This measures how much rounding
+        took place, rather than bounding the distance from the exact result:
+        the effect of each rounding on the final result depends on what the
+        computation does with it afterwards.
+        """
+        return self.__error
+
+    @property
+    def count(self) -> int:
+        """ The number of operations whose result was rounded. """
+        return self.__count
+
+    def __call__(self, num: Frac|int, den: int = 1) -> BoundedFrac:
+        """ Creates a bounded fraction num/den following this policy. """
+        if isinstance(num, Frac):
+            return self.round(num/den)
+        return self.round(Frac(num, den))
+
+    def round(self, exact: Frac) -> BoundedFrac:
+        """ Rounds a fraction to the bound, recording the error. """
+        max_den = self.__max_den
+        approx = exact.limit_denominator(max_den)
+        if approx is not exact and approx != exact:
+            delta = exact-approx if approx < exact else approx-exact
+            grid = max_den*max_den
+            num, den = (delta*grid).num_den_pair
+            self.__error += Frac(-(-num//den), grid) # rounded up
+            self.__count += 1
+        return BoundedFrac._make(approx.num, approx.den, self)
+
+    def __repr__(self) -> str:
+        return (
+            f"Rounding(max_den={self.__max_den}) "
+            f"# {self.__count} roundings, error <= {self.__error}"
+        )
+
+
+class BoundedFrac(Frac):
+    """
+    A fraction whose arithmetic operations round results to the closest
+    fraction with denominator at most :attr:`max_den`.
+
+    Each value refers to the :class:`Rounding` policy which created it,
+    which keeps track of the errors. When both operands are bounded
+    fractions, the result uses the policy with the smaller bound (the one
+    of the left operand, in case of ties). Operations with plain fractions
+    and ints are supported on both sides, and return bounded fractions.
+    """
+
+    __slots__ = ("__rounding",)
+
+    __rounding: Rounding
+    """ The rounding policy, shared with related values. """
+
+    def __new__(
+        cls,
+        num: int,
+        den: int = 1,
+        max_den: int = DEFAULT_MAX_DEN
+    ) -> BoundedFrac:
+        """
+        Constructor: starts a new computation, with its own :class:`Rounding`
+        (the fraction num/den is itself rounded if needed).
+        """
+        return Rounding(max_den)(num, den)
+
+    @staticmethod
+    def _make(num: int, den: int, rounding: Rounding) -> BoundedFrac:
+        """
+        Creates an instance from a normalised fraction with den <= max_den,
+        bypassing the rounding in __new__.
+        """
+        instance = Frac.__new__(BoundedFrac, num, den)
+        assert isinstance(instance, BoundedFrac)
+        instance.__rounding = rounding
+        return instance
+
+    def __reduce__(self) -> Any:
+        """
+        Tells pickle and copy how to re-create the instance,
+        together with its rounding policy.
+        """
+        num, den = self.num_den_pair
+        return (BoundedFrac._make, (num, den, self.__rounding))
+
+    @property
+    def rounding(self) -> Rounding:
+        """ The rounding policy, shared with related values. """
+        return self.__rounding
+
+    @property
+    def max_den(self) -> int:
+        """ The bound on denominators. """
+        return self.__rounding.max_den
+
+    @property
+    def error(self) -> Frac:
+        """ The total rounding error of the computation so far. """
+        return self.__rounding.error
+
+    def __result(self, exact: Frac, other: Frac|int) -> BoundedFrac:
+        """ Rounds the exact result of an operation between self and other. """
+        rounding = self.__rounding
+        if isinstance(other, BoundedFrac) \
+                and other.__rounding.max_den < rounding.max_den:
+            rounding = other.__rounding
+        return rounding.round(exact)
+
+    # The exact results are computed by the operators of Frac,
+    # which treat bounded fractions just like plain fractions.
+
+    def __neg__(self) -> BoundedFrac:
+        num, den = self.num_den_pair
+        return BoundedFrac._make(-num, den, self.__rounding)
+
+    def __add__(self, rhs: Frac|int) -> BoundedFrac:
+        if not isinstance(rhs, (Frac, int)):
+            return NotImplemented
+        return self.__result(Frac.__add__(self, rhs), rhs)
+
+    def __radd__(self, lhs: Frac|int) -> BoundedFrac:
+        return self+lhs
+
+    def __sub__(self, rhs: Frac|int) -> BoundedFrac:
+        if not isinstance(rhs, (Frac, int)):
+            return NotImplemented
+        return self.__result(Frac.__sub__(self, rhs), rhs)
+
+    def __rsub__(self, lhs: Frac|int) -> BoundedFrac:
+        if isinstance(lhs, int):
+            lhs = Frac.from_int(lhs)
+        if not isinstance(lhs, Frac):
+            return NotImplemented
+        return self.__result(Frac.__sub__(lhs, self), lhs)
+
+    def __mul__(self, rhs: Frac|int) -> BoundedFrac:
+        if not isinstance(rhs, (Frac, int)):
+            return NotImplemented
+        return self.__result(Frac.__mul__(self, rhs), rhs)
+
+    def __rmul__(self, lhs: Frac|int) -> BoundedFrac:
+        return self*lhs
+
+    def __truediv__(self, rhs: Frac|int) -> BoundedFrac:
+        if not isinstance(rhs, (Frac, int)):
+            return NotImplemented
+        return self.__result(Frac.__truediv__(self, rhs), rhs)
+
+    def __rtruediv__(self, lhs: Frac|int) -> BoundedFrac:
+        if isinstance(lhs, int):
+            lhs = Frac.from_int(lhs)
+        if not isinstance(lhs, Frac):
+            return NotImplemented
+        return self.__result(Frac.__truediv__(lhs, self), lhs)
+
+    def __repr__(self) -> str:
+        num, den = self.num_den_pair
+        return f"BoundedFrac({num}, {den}, max_den={self.max_den})"
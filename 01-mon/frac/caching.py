@@ -0,0 +1,268 @@
+"""
+An opt-in cache for the results of fraction operations.
+
+Workloads which repeatedly compute the same products and quotients (e.g. the
+same rate times the same quantity) redo the same gcd work every time. While
+an :class:`OpCache` is enabled in a thread, the binary operators of
+:class:`frac_v2.Frac` and :meth:`Frac.from_str` look up their results in it
+first, keyed on the (normalised) numerators and denominators of the operands.
+
+The operators are wrapped when a cache is first enabled, and restored when
+the last one is disabled: while any cache is enabled, in any thread, each
+operation in other threads pays for one thread-local lookup.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import partial, wraps
+from typing import Any, Final, NamedTuple, ParamSpec, TypeVar
+
+from frac_v2 import Frac
+
+from . import _patching
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+_CACHED_OPERATORS: Final[tuple[str, ...]] = (
+    "__add__", "__sub__", "__mul__", "__truediv__", "__rtruediv__",
+)
+"""
+The operators which look up the cache. The other reflected operators
+are implemented in terms of these (e.g. x.__radd__(y) returns x+y).
+"""
+
+
+class CacheStats(NamedTuple):
+    """ Statistics of an :class:`OpCache`. """
+
+    hits: int
+    """ Number of results found in the cache. """
+
+    misses: int
+    """ Number of results computed and stored in the cache. """
+
+    evictions: int
+    """ Number of results evicted to make room for new ones. """
+
+    skipped: int
+    """ Number of operations with operands too big to be cached. """
+
+    size: int
+    """ Number of results currently in the cache. """
+
+
+class _Local(threading.local):
+    """ The caches enabled in the current thread, innermost last. """
+    stack: list[OpCache]
+
+    def __init__(self) -> None:
+        self.stack = []
+
+_local: Final[_Local] = _Local()
+
+_lock: Final[threading.Lock] = threading.Lock()
+""" Protects the installation of the wrappers and the count below. """
+
+_enabled: int = 0
+""" The number of caches enabled, across all threads. """
+
+
+def _wrap_operator(name: str, op: Callable[[Frac, Any], Any]) -> Callable[[Frac, Any], Any]:
+    """ Wraps an operator of Frac so that it looks up the current cache. """
+    @wraps(op)
+    def wrapper(self: Frac, other: Any) -> Any:
+        stack = _local.stack
+        if not stack:
+            return op(self, other)
+        return stack[-1]._operator(name, op, self, other)
+    return wrapper
+
+
+def _wrap_from_str(method: staticmethod[[str], Frac]) -> staticmethod[[str], Frac]:
+    """ Wraps Frac.from_str so that it looks up the current cache. """
+    from_str = method.__func__
+
+    @wraps(from_str)
+    def wrapper(frac: str) -> Frac:
+        stack = _local.stack
+        if not stack:
+            return from_str(frac)
+        return stack[-1]._from_str(from_str, frac)
+    return staticmethod(wrapper)
+
+
+def _install() -> None:
+    """ Installs the wrappers on Frac, if not already installed. """
+    global _enabled
+    with _lock:
+        _enabled += 1
+        if _enabled > 1:
+            return
+        wrappings: dict[tuple[Any, str], _patching.Wrapping] = {
+            (Frac, name): partial(_wrap_operator, name) for name in _CACHED_OPERATORS
+        }
+        wrappings[Frac, "from_str"] = _wrap_from_str
+        _patching.add_layer(__name__, wrappings)
+
+
+def _uninstall() -> None:
+    """ Removes the wrappers from Frac, when the last cache is disabled. """
+    global _enabled
+    with _lock:
+        _enabled -= 1
+        if _enabled == 0:
+            _patching.remove_layer(__name__)
+
+
+class OpCache:
+    """
+    A bounded cache of results of fraction operations, with least recently
+    used (LRU) eviction. Operations whose operands have more than
+    :attr:`max_bits` bits are not cached: big operands are unlikely to
+    repeat, and would take a lot of memory.
+
+    A cache is enabled in the current thread with a ``with`` statement,
+    or for the duration of calls to a function by decorating it:
+
+    .. code-block:: python
+
+        cache = OpCache(maxsize=10_000)
+        with cache:
+            total = rate*quantity
+
+        @cache
+        def price(rate: Frac, quantity: Frac) -> Frac:
+            return rate*quantity
+
+    Enabling is per thread, and caches can be nested (the innermost one is
+    used). Instances are not thread-safe: use a separate cache in each thread.
+    """
+
+    __maxsize: int
+    """ The maximum number of results in the cache. """
+
+    __max_bits: int
+    """ Operands with more bits than this are not cached. """
+
+    __results: OrderedDict[tuple[Any, ...], Frac]
+    """ The results, least recently used first. """
+
+    __hits: int
+    __misses: int
+    __evictions: int
+    __skipped: int
+
+    def __init__(self, maxsize: int = 4096, max_bits: int = 256) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"Expected positive size, found {maxsize = }")
+        if max_bits <= 0:
+            raise ValueError(f"Expected positive size, found {max_bits = }")
+        self.__maxsize = maxsize
+        self.__max_bits = max_bits
+        self.__results = OrderedDict()
+        self.clear()
+
+    @property
+    def maxsize(self) -> int:
+        """ The maximum number of results in the cache. """
+        return self.__maxsize
+
+    @property
+    def max_bits(self) -> int:
+        """ Operands with more bits than this are not cached. """
+        return self.__max_bits
+
+    @property
+    def stats(self) -> CacheStats:
+        """ The statistics since creation (or since the last clear). """
+        return CacheStats(
+            self.__hits, self.__misses, self.__evictions, self.__skipped,
+            len(self.__results)
+        )
+
+    def clear(self) -> None:
+        """ Empties the cache and resets the statistics. """
+        self.__results.clear()
+        self.__hits = self.__misses = self.__evictions = self.__skipped = 0
+
+    def __lookup(self, key: tuple[Any, ...]) -> Frac | None:
+        """ The cached result for the key, or None if not cached. """
+        results = self.__results
+        result = results.get(key)
+        if result is not None:
+            results.move_to_end(key)
+            self.__hits += 1
+        return result
+
+    def __store(self, key: tuple[Any, ...], result: Frac) -> None:
+        """ Caches a result, evicting the least recently used if full. """
+        results = self.__results
+        self.__misses += 1
+        results[key] = result
+        if len(results) > self.__maxsize:
+            results.popitem(last=False)
+            self.__evictions += 1
+
+    def _operator(
+        self,
+        name: str,
+        op: Callable[[Frac, Any], Any],
+        lhs: Frac,
+        rhs: Any
+    ) -> Any:
+        """ Computes lhs op rhs, through the cache. Called by the wrappers. """
+        if isinstance(rhs, int):
+            on, od = rhs, 1
+        elif isinstance(rhs, Frac):
+            on, od = rhs.num_den_pair
+        else:
+            return op(lhs, rhs)
+        sn, sd = lhs.num_den_pair
+        # The bit length of the bitwise or is that of the largest operand.
+        if (abs(sn) | sd | abs(on) | od).bit_length() > self.__max_bits:
+            self.__skipped += 1
+            return op(lhs, rhs)
+        key = (name, sn, sd, on, od)
+        result = self.__lookup(key)
+        if result is None:
+            result = op(lhs, rhs)
+            self.__store(key, result)
+        return result
+
+    def _from_str(self, from_str: Callable[[str], Frac], frac: str) -> Frac:
+        """ Parses a fraction, through the cache. Called by the wrappers. """
+        if len(frac) > self.__max_bits//3: # 3 bits per digit, roughly
+            self.__skipped += 1
+            return from_str(frac)
+        key = ("from_str", frac)
+        result = self.__lookup(key)
+        if result is None:
+            result = from_str(frac)
+            self.__store(key, result)
+        return result
+
+    def __enter__(self) -> OpCache:
+        """ Enables the cache in the current thread. """
+        _install()
+        _local.stack.append(self)
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """ Disables the cache in the current thread. """
+        _local.stack.pop() # with statements are properly nested
+        _uninstall()
+
+    def __call__(self, func: Callable[P, R]) -> Callable[P, R]:
+        """ Decorator, enabling the cache during calls to the function. """
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with self:
+                return func(*args, **kwargs)
+        return wrapper
+
+    def __repr__(self) -> str:
+        return f"OpCache(maxsize={self.__maxsize}, max_bits={self.__max_bits})"
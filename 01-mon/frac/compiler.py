@@ -0,0 +1,387 @@
+"""
+Compilation of rational formulas into specialised functions.
+
+Evaluating a formula such as ``(x*pi/z)+2`` on fractions runs one operator
+per step, each of which allocates a :class:`Frac`, converts int operands and
+normalises its result with a gcd. :func:`compile` translates the formula into
+Python code working directly on numerators and denominators (e.g. for x+y,
+``xn*yd+yn*xd, xd*yd``), without intermediate normalisations: only the final
+result is normalised, once. The same code also runs on whole columns of
+values, stored in :class:`FracArray` instances (with NumPy).
+
+Intermediate values are not reduced, so they can be larger than with
+:class:`Frac` operations: this pays off for the short formulas which are
+evaluated over and over, not for long chains of operations.
+"""
+
+from __future__ import annotations
+
+import ast
+import builtins
+import sys
+from keyword import iskeyword
+from collections.abc import Callable, Iterable, Sequence
+from itertools import repeat
+from typing import TYPE_CHECKING, Any, Final
+
+from frac_v2 import Frac
+
+if TYPE_CHECKING:
+    from .arrays import FracArray
+
+_BINARY_OPS: Final[tuple[type[ast.operator], ...]] = (
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow,
+)
+
+
+def _is_literal(operand: str) -> bool:
+    """ Whether the operand is an int literal (e.g. "3" or "-3"), not a name. """
+    return operand.removeprefix("-").isdigit()
+
+
+def _negate(operand: str) -> str:
+    """
+    The negation of an operand: int literals are folded (e.g. into "-3"),
+    so that they are still recognised as literals (e.g. by :func:`_wrap`).
+    """
+    if _is_literal(operand):
+        return str(-int(operand))
+    return f"-{operand}"
+
+
+def _wrap(operand: str) -> str:
+    """ Wraps int literals into arrays, for the helpers of the array code. """
+    if _is_literal(operand):
+        return f"_scalar({operand})"
+    return operand
+
+
+class _CodeGen:
+    """
+    Generates straight-line code for a formula: each node of the syntax
+    tree becomes a pair of expressions (numerator and denominator), and each
+    operation's result is assigned to temporary variables. The expressions
+    of the operations are built by the given functions, so that the same
+    generator produces code for ints (operators) and arrays (helpers which
+    avoid int64 overflows), and so are the checks that divisors are not
+    zero: intermediate results are not normalised, so a zero divisor would
+    go unnoticed in the final result (e.g. 1/(1/y) would be y for y = 0).
+    """
+
+    lines: list[str]
+    """ The generated statements. """
+
+    __names: dict[str, int]
+    """ The variables of the formula, mapped to their positions. """
+
+    __mul: Callable[[str, str], str]
+    __add: Callable[[str, str], str]
+    __nonzero: Callable[[str], str]
+    __temps: int
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        mul: Callable[[str, str], str],
+        add: Callable[[str, str], str],
+        nonzero: Callable[[str], str]
+    ) -> None:
+        self.lines = []
+        self.__names = {name: i for i, name in enumerate(names)}
+        self.__mul = mul
+        self.__add = add
+        self.__nonzero = nonzero
+        self.__temps = 0
+
+    def __temp(self, num: str, den: str) -> tuple[str, str]:
+        """ Assigns the expressions to new temporary variables. """
+        k = self.__temps
+        self.__temps += 1
+        self.lines.append(f"_t{k}n = {num}")
+        if den == "1":
+            return f"_t{k}n", "1"
+        self.lines.append(f"_t{k}d = {den}")
+        return f"_t{k}n", f"_t{k}d"
+
+    def __check_nonzero(self, x: str) -> None:
+        """ Raises ZeroDivisionError if x is zero (skipped for non-zero literals). """
+        if _is_literal(x) and int(x) != 0:
+            return
+        self.lines.append(self.__nonzero(x))
+
+    def __times(self, x: str, y: str) -> str:
+        """ The product, simplified if a factor is the literal 1. """
+        if x == "1":
+            return y
+        if y == "1":
+            return x
+        return self.__mul(x, y)
+
+    def visit(self, node: ast.AST) -> tuple[str, str]:
+        """
+        Generates the code for a node, returning the expressions (names or
+        literals) of its numerator and denominator. Raises ValueError for
+        anything but variables, int literals and rational operations.
+        """
+        if isinstance(node, ast.Name):
+            if node.id not in self.__names:
+                raise ValueError(f"Unknown variable, found {node.id!r}")
+            i = self.__names[node.id]
+            return f"_n{i}", f"_d{i}"
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return str(node.value), "1"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            num, den = self.visit(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return num, den
+            if _is_literal(num):
+                return _negate(num), den
+            return self.__temp(_negate(num), den)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, _BINARY_OPS):
+            if isinstance(node.op, ast.Pow):
+                return self.__power(node)
+            a, b = self.visit(node.left)
+            c, d = self.visit(node.right)
+            times = self.__times
+            if isinstance(node.op, ast.Mult):
+                return self.__temp(times(a, c), times(b, d))
+            if isinstance(node.op, ast.Div):
+                self.__check_nonzero(c)
+                return self.__temp(times(a, d), times(b, c))
+            if isinstance(node.op, ast.Sub):
+                c = _negate(c)
+            if b == d: # e.g. x+x, or ints
+                return self.__temp(self.__add(a, c), b)
+            return self.__temp(
+                self.__add(times(a, d), times(c, b)), times(b, d)
+            )
+        raise ValueError(f"Unsupported syntax, found {ast.unparse(node)!r}")
+
+    def __power(self, node: ast.BinOp) -> tuple[str, str]:
+        """ Powers, with int literal exponents only. """
+        exponent = node.right
+        sign = 1
+        literal = exponent
+        if isinstance(exponent, ast.UnaryOp) and isinstance(exponent.op, ast.USub):
+            sign, literal = -1, exponent.operand
+        if not isinstance(literal, ast.Constant) or type(literal.value) is not int:
+            raise ValueError(f"Exponents must be int literals, found {ast.unparse(exponent)!r}")
+        k = sign*literal.value
+        num, den = self.visit(node.left)
+        if k < 0:
+            self.__check_nonzero(num)
+            num, den, k = den, num, -k
+        if k == 0:
+            return "1", "1"
+        # Square-and-multiply: about 2*log2(k) multiplications.
+        power = num, den
+        while not k & 1:
+            power = self.__square(power)
+            k >>= 1
+        result = power
+        k >>= 1
+        while k:
+            power = self.__square(power)
+            if k & 1:
+                result = self.__temp(
+                    self.__times(result[0], power[0]),
+                    self.__times(result[1], power[1])
+                )
+            k >>= 1
+        return result
+
+    def __square(self, value: tuple[str, str]) -> tuple[str, str]:
+        """ The square of a fraction, as a pair of temporary variables. """
+        num, den = value
+        return self.__temp(self.__times(num, num), self.__times(den, den))
+
+
+class CompiledExpr:
+    """
+    A formula compiled by :func:`compile`: call it with the values of the
+    variables (as fractions or ints, positionally or by name) to evaluate
+    it, or use :meth:`batch` to evaluate it over columns of values.
+    """
+
+    __expr: str
+    """ The formula. """
+
+    __variables: tuple[str, ...]
+    """ The names of the variables, in the order of the arguments. """
+
+    __source: str
+    """ The generated code, for scalars. """
+
+    __scalar: Callable[..., Frac]
+    """ The generated function, for scalars. """
+
+    __array_source: str
+    """ The generated code, for arrays. """
+
+    __array: Callable[..., tuple[Any, Any]] | None
+    """ The generated function for arrays (compiled on first use). """
+
+    def __init__(self, expr: str, variables: Sequence[str]) -> None:
+        self.__expr = expr
+        self.__variables = tuple(variables)
+        for name in self.__variables:
+            # Names starting with "_" are reserved for the generated code.
+            if not name.isidentifier() or iskeyword(name) or name.startswith("_"):
+                raise ValueError(f"Invalid variable name, found {name = }")
+        if len(set(self.__variables)) != len(self.__variables):
+            raise ValueError(f"Duplicate variable names, found {variables = }")
+        try:
+            tree = ast.parse(expr, mode="eval").body
+        except SyntaxError as e:
+            raise ValueError(f"Invalid formula, found {expr = }") from e
+        self.__source = self.__generate(tree, scalar=True)
+        self.__array_source = self.__generate(tree, scalar=False)
+        self.__scalar = self.__define(self.__source, {"_Frac": Frac, "_int": int})
+        self.__array = None
+
+    def __generate(self, tree: ast.AST, scalar: bool) -> str:
+        """ Generates the source of the function evaluating the formula. """
+        args = ", ".join(self.__variables)
+        if scalar:
+            gen = _CodeGen(
+                self.__variables,
+                lambda x, y: f"{x}*{y}",
+                lambda x, y: f"{x}+{y}",
+                lambda x: f"if not {x}: raise ZeroDivisionError()"
+            )
+        else:
+            gen = _CodeGen(
+                self.__variables,
+                lambda x, y: f"_mul({_wrap(x)}, {_wrap(y)})",
+                lambda x, y: f"_add({_wrap(x)}, {_wrap(y)})",
+                lambda x: f"_nonzero({_wrap(x)})"
+            )
+        num, den = gen.visit(tree)
+        lines = [f"def _eval({args}):"]
+        for i, name in enumerate(self.__variables):
+            if scalar:
+                lines.append(f"    if {name}.__class__ is _int:")
+                lines.append(f"        _n{i}, _d{i} = {name}, 1")
+                # bool, and other subclasses of int.
+                lines.append(f"    elif isinstance({name}, _int):")
+                lines.append(f"        _n{i}, _d{i} = _int({name}), 1")
+                lines.append(f"    else:")
+                lines.append(f"        _n{i}, _d{i} = {name}.num_den_pair")
+            else:
+                lines.append(f"    _n{i}, _d{i} = {name}")
+        lines.extend(f"    {line}" for line in gen.lines)
+        if scalar:
+            lines.append(f"    return _Frac({num}, {den})")
+        else:
+            lines.append(f"    return {num}, {den}")
+        return "\n".join(lines)+"\n"
+
+    def __define(self, source: str, namespace: dict[str, Any]) -> Any:
+        """ Executes the source, returning the function it defines. """
+        code = builtins.compile(source, f"<frac.compile {self.__expr!r}>", "exec")
+        exec(code, namespace)
+        return namespace["_eval"]
+
+    @property
+    def expr(self) -> str:
+        """ The formula. """
+        return self.__expr
+
+    @property
+    def variables(self) -> tuple[str, ...]:
+        """ The names of the variables, in the order of the arguments. """
+        return self.__variables
+
+    @property
+    def source(self) -> str:
+        """ The generated Python code (for scalar arguments). """
+        return self.__source
+
+    def __call__(self, *args: Frac | int, **kwargs: Frac | int) -> Frac:
+        """
+        Evaluates the formula. Raises ZeroDivisionError if it divides
+        by zero at any step, including negative powers of zero.
+        """
+        return self.__scalar(*args, **kwargs)
+
+    def batch(
+        self, *columns: Iterable[Frac | int] | FracArray | Frac | int
+    ) -> list[Frac] | FracArray:
+        """
+        Evaluates the formula for each row of values, taking the value of
+        each variable from a column (a single fraction or int is used for
+        every row). If any column is a :class:`FracArray`, the others are
+        converted to arrays too and the formula is evaluated with NumPy,
+        returning a :class:`FracArray`; otherwise, returns a list.
+        """
+        if len(columns) != len(self.__variables):
+            raise TypeError(
+                f"Expected {len(self.__variables)} columns, found {len(columns)}"
+            )
+        arrays = sys.modules.get(f"{__package__}.arrays")
+        if arrays is not None and any(isinstance(c, arrays.FracArray) for c in columns):
+            return self.__batch_arrays(columns)
+        scalar = self.__scalar
+        iterables = [
+            repeat(c) if isinstance(c, (Frac, int)) else c for c in columns
+        ]
+        return [scalar(*row) for row in zip(*iterables)]
+
+    def __batch_arrays(
+        self, columns: Sequence[Iterable[Frac | int] | FracArray | Frac | int]
+    ) -> FracArray:
+        """ Evaluates the formula on columns of fractions, with NumPy. """
+        import numpy as np
+        from .arrays import FracArray, _add, _mul, _normalise, _scalar
+
+        def _vector(value: int) -> Any:
+            # Operations on 0D object arrays return ints, not arrays:
+            # scalars are broadcast from 1D arrays of length 1 instead.
+            return _scalar(value).reshape(1)
+
+        def _nonzero(values: Any) -> None:
+            if np.any(values == 0):
+                raise ZeroDivisionError()
+
+        if self.__array is None:
+            namespace = {
+                "_mul": _mul, "_add": _add, "_scalar": _vector, "_nonzero": _nonzero,
+            }
+            self.__array = self.__define(self.__array_source, namespace)
+        pairs: list[tuple[Any, Any]] = []
+        length = -1
+        for column in columns:
+            if isinstance(column, int):
+                column = Frac.from_int(column)
+            if isinstance(column, Frac):
+                num, den = column.num_den_pair
+                pairs.append((_vector(num), _vector(den)))
+                continue
+            if not isinstance(column, FracArray):
+                column = FracArray.from_fracs(column)
+            if length >= 0 and len(column) != length:
+                raise ValueError(f"Length mismatch, found {len(column)} and {length}")
+            length = len(column)
+            pairs.append((column.nums, column.dens))
+        nums, dens = self.__array(*pairs)
+        # Results may be scalars, e.g. for "x**0" or a column used nowhere.
+        nums = np.broadcast_to(np.asarray(nums), (length,))
+        dens = np.broadcast_to(np.asarray(dens), (length,))
+        if np.any(dens == 0):
+            raise ZeroDivisionError()
+        return FracArray._trusted(*_normalise(nums, dens))
+
+    def __repr__(self) -> str:
+        return f"frac.compile({self.__expr!r}, {list(self.__variables)!r})"
+
+
+def compile(expr: str, variables: Sequence[str]) -> CompiledExpr:
+    """
+    Compiles a rational formula in the given variables, e.g.
+    ``frac.compile("(x*pi/z)+2", ["x", "pi", "z"])``.
+
+    Formulas can use the variables, int literals, unary + and -, the
+    operators +, -, * and /, and ** with int literal exponents. Raises
+    ValueError for anything else.
+    """
+    return CompiledExpr(expr, variables)
@@ -0,0 +1,99 @@
+"""
+Writing large amounts of fractions in text form, the counterpart of
+:mod:`frac.parsing`.
+
+Writing fractions one at a time, as ``file.write(f"{frac}\\n".encode())``,
+pays for a method call, a string, an encoding and a write per value. The
+functions in this module format fractions in batches instead, joining the
+strings of a whole batch and encoding them at once, and write to the file
+in large buffers. Arrays of fractions are formatted straight from their
+numerators and denominators, without creating :class:`Frac` instances.
+
+The output is deterministic: it only depends on the values, the format
+specification and the separator, never on the platform (no floats involved).
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import IO, TYPE_CHECKING, Final
+
+from frac_v2 import Frac
+
+if TYPE_CHECKING:
+    from .arrays import FracArray
+
+BATCH_SIZE: Final[int] = 1 << 14
+""" Number of fractions formatted at a time. """
+
+
+def _pair_strs(pairs: Iterable[tuple[int, int]]) -> list[str]:
+    """ The a/b forms (as by str) of numerator-denominator pairs. """
+    return [str(n) if d == 1 else f"{n}/{d}" for n, d in pairs]
+
+
+def _batches(
+    fracs: Iterable[Frac] | FracArray, spec: str
+) -> Iterator[list[str]]:
+    """ Yields the formatted fractions, in batches. """
+    arrays = sys.modules.get(f"{__package__}.arrays")
+    if arrays is not None and isinstance(fracs, arrays.FracArray):
+        # A FracArray can only exist if its module was imported already.
+        nums, dens = fracs.nums, fracs.dens
+        for start in range(0, len(nums), BATCH_SIZE):
+            pairs = zip(
+                nums[start:start+BATCH_SIZE].tolist(),
+                dens[start:start+BATCH_SIZE].tolist()
+            )
+            if spec:
+                yield [format(Frac._trusted(n, d), spec) for n, d in pairs]
+            else:
+                yield _pair_strs(pairs)
+        return
+    values = iter(fracs)
+    while batch := list(islice(values, BATCH_SIZE)):
+        if spec:
+            yield [format(frac, spec) for frac in batch]
+        else:
+            yield _pair_strs(frac.num_den_pair for frac in batch)
+
+
+def dump(
+    fracs: Iterable[Frac] | FracArray,
+    file: IO[bytes],
+    spec: str = "",
+    sep: str = "\n",
+    buffer_size: int = 1 << 20
+) -> int:
+    """
+    Writes the fractions (an iterable or a :class:`FracArray`) to a binary
+    file object, each one formatted with the given format specification
+    (see :meth:`Frac.__format__`; the default is the a/b form) and followed
+    by the separator, encoded in UTF-8 (the output is ASCII unless the
+    fill character or the separator are not). Returns the number of
+    fractions written.
+    """
+    out = bytearray()
+    count = 0
+    for batch in _batches(fracs, spec):
+        batch.append("") # the separator also follows the last value
+        out += sep.join(batch).encode("utf-8")
+        count += len(batch)-1
+        if len(out) >= buffer_size:
+            file.write(out)
+            out.clear()
+    if out:
+        file.write(out)
+    return count
+
+
+def dumps(
+    fracs: Iterable[Frac] | FracArray, spec: str = "", sep: str = "\n"
+) -> bytes:
+    """ Returns the fractions formatted as by :func:`dump`. """
+    from io import BytesIO
+    buffer = BytesIO()
+    dump(fracs, buffer, spec, sep)
+    return buffer.getvalue()
@@ -0,0 +1,268 @@
+"""
+A sorted index of fractions, supporting fast insertion, deletion,
+range queries, rank/select and nearest-value lookup.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterable, Iterator
+from typing import Any, Final
+
+from frac_v2 import Frac
+
+LOAD: Final[int] = 512
+"""
+Target length of the sorted sublists: sublists are split when they grow
+to twice this length. Insertion into a Python list shifts pointers with
+memmove, which is very fast for lists of this size.
+"""
+
+
+class SortedFracIndex:
+    """
+    A sorted multiset of fractions (duplicates are allowed).
+
+    Values are stored in a list of sorted sublists of bounded length, and
+    the maximum of each sublist is kept in a separate list: locating a value
+    bisects the maxima first, then the sublist. A Fenwick tree (aka binary
+    indexed tree) over the sublist lengths maps between positions in the
+    index and positions in the sublists, in O(log n) time.
+    """
+
+    __lists: list[list[Frac]]
+    """ The sorted sublists, concatenated in order. """
+
+    __maxes: list[Frac]
+    """ The maximum (i.e. last value) of each sublist. """
+
+    __tree: list[int]
+    """ Fenwick tree of sublist lengths (1-based, tree[0] unused). """
+
+    __len: int
+    """ The total number of values. """
+
+    def __init__(self, values: Iterable[Frac | int] = ()) -> None:
+        self.__lists = []
+        self.__maxes = []
+        self.__tree = [0]
+        self.__len = 0
+        self.update(values)
+
+    def update(self, values: Iterable[Frac | int]) -> None:
+        """
+        Adds all the given values. Large batches are merged by sorting
+        once and rebuilding the sublists, rather than inserted one by one.
+        """
+        new = [Frac(v) if isinstance(v, int) else v for v in values]
+        if len(new) < LOAD:
+            for value in new:
+                self.add(value)
+            return
+        merged = sorted([*self, *new])
+        self.__lists = [
+            merged[start:start+LOAD] for start in range(0, len(merged), LOAD)
+        ]
+        self.__maxes = [sublist[-1] for sublist in self.__lists]
+        self.__len = len(merged)
+        self.__rebuild()
+
+    # Fenwick tree over sublist lengths
+
+    def __rebuild(self) -> None:
+        """ Rebuilds the Fenwick tree, in O(number of sublists) time. """
+        tree = [0]+[len(sublist) for sublist in self.__lists]
+        for i in range(1, len(tree)):
+            parent = i+(i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self.__tree = tree
+
+    def __increment(self, idx: int, delta: int) -> None:
+        """ Adds delta to the length of the sublist at index idx. """
+        tree = self.__tree
+        i = idx+1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def __prefix(self, idx: int) -> int:
+        """ Total length of the sublists before the one at index idx. """
+        tree = self.__tree
+        total = 0
+        i = idx
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def __locate(self, pos: int) -> tuple[int, int]:
+        """
+        The index of the sublist containing the value at position pos,
+        and the position of the value within that sublist.
+        """
+        tree = self.__tree
+        idx = 0
+        step = 1 << (len(tree)-1).bit_length()
+        while step:
+            nxt = idx+step
+            if nxt < len(tree) and tree[nxt] <= pos:
+                idx = nxt
+                pos -= tree[nxt]
+            step >>= 1
+        return idx, pos
+
+    # Insertion and deletion
+
+    def add(self, value: Frac | int) -> None:
+        """ Inserts a value, in O(log n) time. """
+        if isinstance(value, int):
+            value = Frac(value)
+        lists, maxes = self.__lists, self.__maxes
+        self.__len += 1
+        if not lists:
+            lists.append([value])
+            maxes.append(value)
+            self.__rebuild()
+            return
+        idx = bisect_right(maxes, value)
+        if idx == len(maxes):
+            idx -= 1
+            lists[idx].append(value)
+            maxes[idx] = value
+        else:
+            insort(lists[idx], value)
+        if len(lists[idx]) > 2*LOAD:
+            sublist = lists[idx]
+            lists[idx:idx+1] = [sublist[:LOAD], sublist[LOAD:]]
+            maxes[idx:idx+1] = [sublist[LOAD-1], sublist[-1]]
+            self.__rebuild()
+        else:
+            self.__increment(idx, 1)
+
+    def remove(self, value: Frac | int) -> None:
+        """
+        Removes one occurrence of a value, in O(log n) time.
+        Raises ValueError if the value is not in the index.
+        """
+        if not self.discard(value):
+            raise ValueError(f"Value not in index, found {value = }")
+
+    def discard(self, value: Frac | int) -> bool:
+        """
+        Removes one occurrence of a value, if present.
+        Returns whether a value was removed.
+        """
+        lists, maxes = self.__lists, self.__maxes
+        idx = bisect_left(maxes, value)
+        if idx == len(maxes):
+            return False
+        sublist = lists[idx]
+        pos = bisect_left(sublist, value)
+        if sublist[pos] != value:
+            return False
+        del sublist[pos]
+        self.__len -= 1
+        if not sublist:
+            del lists[idx]
+            del maxes[idx]
+            self.__rebuild()
+            return True
+        maxes[idx] = sublist[-1]
+        self.__increment(idx, -1)
+        return True
+
+    # Queries
+
+    def rank(self, value: Frac | int) -> int:
+        """ The number of values strictly less than the given one. """
+        idx = bisect_left(self.__maxes, value)
+        if idx == len(self.__maxes):
+            return self.__len
+        return self.__prefix(idx)+bisect_left(self.__lists[idx], value)
+
+    def count(self, value: Frac | int) -> int:
+        """ The number of occurrences of the given value. """
+        return self.__rank_right(value)-self.rank(value)
+
+    def __rank_right(self, value: Frac | int) -> int:
+        """ The number of values less than or equal to the given one. """
+        idx = bisect_right(self.__maxes, value)
+        if idx == len(self.__maxes):
+            return self.__len
+        return self.__prefix(idx)+bisect_right(self.__lists[idx], value)
+
+    def select(self, pos: int) -> Frac:
+        """ The value at the given position in sorted order (aka [pos]). """
+        if pos < 0:
+            pos += self.__len
+        if not 0 <= pos < self.__len:
+            raise IndexError(f"Index out of range, found {pos = }")
+        idx, offset = self.__locate(pos)
+        return self.__lists[idx][offset]
+
+    def between(
+        self,
+        low: Frac | int,
+        high: Frac | int,
+        inclusive: tuple[bool, bool] = (True, True)
+    ) -> Iterator[Frac]:
+        """
+        Iterates, in order, over the values between low and high
+        (inclusive or exclusive at each end, as specified).
+        """
+        include_low, include_high = inclusive
+        start = self.rank(low) if include_low else self.__rank_right(low)
+        stop = self.__rank_right(high) if include_high else self.rank(high)
+        if start >= stop:
+            return
+        idx, offset = self.__locate(start)
+        remaining = stop-start
+        for sublist in self.__lists[idx:]:
+            chunk = sublist[offset:offset+remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            if not remaining:
+                return
+            offset = 0
+
+    def nearest(self, value: Frac | int) -> Frac:
+        """
+        The value in the index closest to the given one
+        (the smaller one, in case of ties).
+        Raises ValueError if the index is empty.
+        """
+        if not self.__len:
+            raise ValueError("nearest() of empty index")
+        pos = self.rank(value)
+        if pos == 0:
+            return self.select(0)
+        below = self.select(pos-1)
+        if pos == self.__len:
+            return below
+        above = self.select(pos)
+        return below if value-below <= above-value else above
+
+    # Special methods
+
+    def __len__(self) -> int:
+        return self.__len
+
+    def __getitem__(self, pos: int) -> Frac:
+        return self.select(pos)
+
+    def __contains__(self, value: Any) -> bool:
+        if not isinstance(value, (Frac, int)):
+            return False
+        idx = bisect_left(self.__maxes, value)
+        if idx == len(self.__maxes):
+            return False
+        sublist = self.__lists[idx]
+        return sublist[bisect_left(sublist, value)] == value
+
+    def __iter__(self) -> Iterator[Frac]:
+        for sublist in self.__lists:
+            yield from sublist
+
+    def __repr__(self) -> str:
+        return f"SortedFracIndex({list(self)!r})"
@@ -0,0 +1,274 @@
+"""
+Exact matrices of fractions, with fraction-free linear algebra.
+
+Gaussian elimination on a matrix of :class:`frac_v2.Frac` normalises every
+entry after every update, which costs a gcd each time. Instead, the methods
+below multiply each row by the lcm of its denominators, and run Bareiss'
+fraction-free elimination on the resulting integer matrix: each update is
+``(p*a - f*b) // prev``, where ``prev`` is the previous pivot and the
+division is exact. Entries stay as small as the minors of the matrix, and
+results are converted back to fractions only at the end.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+from math import lcm, prod
+from operator import mul
+from typing import Any, overload
+
+from frac_v2 import Frac
+
+
+def _scaled_rows(rows: Iterable[Iterable[Frac]]) -> tuple[list[list[int]], list[int]]:
+    """
+    Multiplies each row by the lcm of its denominators, returning the
+    integer rows and the multipliers.
+    """
+    int_rows: list[list[int]] = []
+    multipliers: list[int] = []
+    for row in rows:
+        pairs = [f.num_den_pair for f in row]
+        m = lcm(*(d for _, d in pairs))
+        int_rows.append([n*(m//d) for n, d in pairs])
+        multipliers.append(m)
+    return int_rows, multipliers
+
+
+def _bareiss(rows: list[list[int]], cols: int) -> tuple[list[int], int]:
+    """
+    Fraction-free forward elimination, in place, on the first ``cols``
+    columns of the integer rows (the remaining columns are updated too).
+    Rows are swapped to find non-zero pivots.
+
+    Returns the columns of the pivots (their number is the rank), and the
+    sign of the row permutation. The i-th pivot is the determinant of the
+    top-left i x i submatrix (up to row swaps) of the pivot columns.
+    """
+    pivot_cols: list[int] = []
+    sign = 1
+    prev = 1
+    r = 0
+    n = len(rows)
+    for c in range(cols):
+        if r == n:
+            break
+        p = next((i for i in range(r, n) if rows[i][c]), None)
+        if p is None:
+            continue
+        if p != r:
+            rows[r], rows[p] = rows[p], rows[r]
+            sign = -sign
+        pivot_row = rows[r]
+        pivot = pivot_row[c]
+        tail = pivot_row[c+1:]
+        for i in range(r+1, n):
+            row = rows[i]
+            f = row[c]
+            if f:
+                row[c+1:] = [
+                    (pivot*a-f*b)//prev for a, b in zip(row[c+1:], tail)
+                ]
+            elif pivot != prev:
+                row[c+1:] = [pivot*a//prev for a in row[c+1:]]
+            row[c] = 0
+        prev = pivot
+        pivot_cols.append(c)
+        r += 1
+    return pivot_cols, sign
+
+
+class FracMatrix:
+    """
+    An immutable matrix of fractions, supporting matrix multiplication,
+    determinant, rank, inverse and the solution of linear systems.
+    """
+
+    @staticmethod
+    def identity(n: int) -> FracMatrix:
+        """ The n x n identity matrix. """
+        zero, one = Frac.ZERO, Frac.ONE
+        return FracMatrix._trusted(tuple(
+            tuple(one if i == j else zero for j in range(n)) for i in range(n)
+        ), n)
+
+    @staticmethod
+    def _trusted(rows: tuple[tuple[Frac, ...], ...], cols: int) -> FracMatrix:
+        """ Private constructor, skipping validation and conversion. """
+        instance = FracMatrix.__new__(FracMatrix)
+        instance.__rows = rows
+        instance.__cols = cols
+        return instance
+
+    @staticmethod
+    def __from_ints(rows: Iterable[Iterable[int]], den: int, cols: int) -> FracMatrix:
+        """ The matrix of the given integers, all divided by den. """
+        return FracMatrix._trusted(tuple(
+            tuple(Frac(n, den) for n in row) for row in rows
+        ), cols)
+
+    __rows: tuple[tuple[Frac, ...], ...]
+    """ The entries, row by row. """
+
+    __cols: int
+    """ The number of columns (stored separately, for empty matrices). """
+
+    def __init__(self, rows: Iterable[Iterable[Frac | int]]) -> None:
+        """
+        Builds a matrix from its rows, which must all have the same length.
+        Raises ValueError otherwise.
+        """
+        self.__rows = tuple(
+            tuple(Frac.from_int(x) if isinstance(x, int) else x for x in row)
+            for row in rows
+        )
+        lengths = {len(row) for row in self.__rows}
+        if len(lengths) > 1:
+            raise ValueError(f"Rows must have the same length, found {lengths = }")
+        self.__cols = lengths.pop() if lengths else 0
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """ The number of rows and columns. """
+        return len(self.__rows), self.__cols
+
+    @property
+    def rows(self) -> tuple[tuple[Frac, ...], ...]:
+        """ The entries, row by row. """
+        return self.__rows
+
+    def transpose(self) -> FracMatrix:
+        """ The transposed matrix. """
+        return FracMatrix._trusted(tuple(zip(*self.__rows)), len(self.__rows))
+
+    def __check_square(self) -> int:
+        """ Raises ValueError if the matrix is not square, returns its size. """
+        n, m = self.shape
+        if n != m:
+            raise ValueError(f"Expected a square matrix, found {self.shape = }")
+        return n
+
+    # Linear algebra
+
+    def det(self) -> Frac:
+        """ The determinant. Raises ValueError if the matrix is not square. """
+        n = self.__check_square()
+        if n == 0:
+            return Frac.ONE
+        rows, multipliers = _scaled_rows(self.__rows)
+        pivot_cols, sign = _bareiss(rows, n)
+        if len(pivot_cols) < n:
+            return Frac.ZERO
+        # The last pivot is the determinant of the scaled integer matrix.
+        return Frac(sign*rows[-1][-1], prod(multipliers))
+
+    def rank(self) -> int:
+        """ The rank (scaling rows by non-zero integers doesn't change it). """
+        rows, _ = _scaled_rows(self.__rows)
+        pivot_cols, _ = _bareiss(rows, self.__cols)
+        return len(pivot_cols)
+
+    def inverse(self) -> FracMatrix:
+        """
+        The inverse matrix. Raises ValueError if the matrix is not square,
+        and ZeroDivisionError if it is singular.
+        """
+        n = self.__check_square()
+        return self.__solve(FracMatrix.identity(n).__rows, n)
+
+    @overload
+    def solve(self, rhs: FracMatrix) -> FracMatrix: ...
+
+    @overload
+    def solve(self, rhs: Sequence[Frac | int]) -> list[Frac]: ...
+
+    def solve(self, rhs: FracMatrix | Sequence[Frac | int]) -> FracMatrix | list[Frac]:
+        """
+        Solves self @ x == rhs, for a matrix or vector rhs (the solution x
+        is a matrix or a list, respectively). Raises ValueError if the
+        matrix is not square or the shapes don't match, and ZeroDivisionError
+        if the matrix is singular.
+        """
+        n = self.__check_square()
+        if isinstance(rhs, FracMatrix):
+            if rhs.shape[0] != n:
+                raise ValueError(f"Shape mismatch, found {self.shape = }, {rhs.shape = }")
+            return self.__solve(rhs.__rows, rhs.__cols)
+        if len(rhs) != n:
+            raise ValueError(f"Shape mismatch, found {self.shape = }, {len(rhs) = }")
+        column = tuple((x,) for x in FracMatrix([rhs]).__rows[0])
+        return [x for x, in self.__solve(column, 1).__rows]
+
+    def __solve(self, rhs: tuple[tuple[Frac, ...], ...], k: int) -> FracMatrix:
+        """
+        Solves self @ x == rhs, where rhs has k columns: eliminates on the
+        augmented integer matrix, then back-substitutes in integers. By
+        Cramer's rule, the solutions times the determinant d of the scaled
+        matrix are integers, so the divisions in back-substitution are exact.
+        """
+        n = len(self.__rows)
+        rows, _ = _scaled_rows(row+b for row, b in zip(self.__rows, rhs))
+        pivot_cols, _ = _bareiss(rows, n)
+        if len(pivot_cols) < n:
+            raise ZeroDivisionError("Matrix is singular.")
+        d = rows[-1][n-1] if n else 1
+        y = [[0]*n for _ in range(k)] # y = d*x, column by column
+        for i in range(n-1, -1, -1):
+            row = rows[i]
+            pivot = row[i]
+            coeffs = row[i+1:n]
+            for c, column in enumerate(y):
+                t = d*row[n+c]-sum(map(mul, coeffs, column[i+1:]))
+                column[i] = t//pivot
+        return FracMatrix.__from_ints(zip(*y), d, k)
+
+    # Special methods
+
+    def __matmul__(self, rhs: FracMatrix) -> FracMatrix:
+        """
+        Implements the binary operator @
+
+        Brings each matrix to a common denominator, multiplies the integer
+        matrices, and normalises each entry of the result once.
+        """
+        if not isinstance(rhs, FracMatrix):
+            return NotImplemented
+        if self.__cols != len(rhs.__rows):
+            raise ValueError(f"Shape mismatch, found {self.shape = }, {rhs.shape = }")
+        lhs_ints, lhs_den = self.__common_den()
+        rhs_ints, rhs_den = rhs.__common_den()
+        columns = list(zip(*rhs_ints))
+        products = (
+            [sum(map(mul, row, col)) for col in columns]
+            for row in lhs_ints
+        )
+        return FracMatrix.__from_ints(products, lhs_den*rhs_den, rhs.__cols)
+
+    def __common_den(self) -> tuple[list[list[int]], int]:
+        """ The entries brought to their least common denominator. """
+        den = lcm(*(f.den for row in self.__rows for f in row))
+        return [
+            [f.num*(den//f.den) for f in row] for row in self.__rows
+        ], den
+
+    def __getitem__(self, idx: tuple[int, int]) -> Frac:
+        """ The entry at row i and column j, as self[i, j]. """
+        i, j = idx
+        return self.__rows[i][j]
+
+    def __iter__(self) -> Iterator[tuple[Frac, ...]]:
+        return iter(self.__rows)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, FracMatrix):
+            return NotImplemented
+        return self.shape == other.shape and self.__rows == other.__rows
+
+    def __hash__(self) -> int:
+        return hash((self.__cols, self.__rows))
+
+    def __repr__(self) -> str:
+        rows = ", ".join(
+            "[" + ", ".join(repr(f) for f in row) + "]" for row in self.__rows
+        )
+        return f"FracMatrix([{rows}])"
@@ -0,0 +1,176 @@
+"""
+Streaming parsers for large amounts of fractions in text form.
+
+:meth:`frac_v2.Frac.from_str` parses a single string: to load a large file,
+one would have to read all of its lines into memory first. The functions in
+this module read their input in fixed-size chunks instead, so that peak memory
+is bounded regardless of input size.
+
+Each non-blank line of input must contain an integer or a fraction ``a/b``,
+optionally with signs and surrounding whitespace, e.g. ``-22 / 7``.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from collections.abc import Iterator
+from typing import IO, TYPE_CHECKING, Final
+
+from frac_v2 import Frac
+
+if TYPE_CHECKING:
+    from .arrays import FracArray
+
+Source = (
+    str | os.PathLike[str] | IO[bytes]
+    | bytes | bytearray | memoryview | mmap.mmap
+)
+"""
+Sources of fractions: a file path, a binary file object,
+or an in-memory (possibly memory-mapped) buffer.
+"""
+
+CHUNK_SIZE: Final[int] = 1 << 20
+""" Number of bytes read from the source at a time. """
+
+
+class FracParseError(ValueError):
+    """
+    Error raised (or collected) when a line of input isn't a fraction.
+    """
+
+    line_number: Final[int]
+    """ The number of the offending line, starting from 1. """
+
+    line: Final[bytes]
+    """ The contents of the offending line. """
+
+    def __init__(self, line_number: int, line: bytes, reason: str) -> None:
+        super().__init__(f"Line {line_number}: {reason}, found {line!r}")
+        self.line_number = line_number
+        self.line = line
+
+
+def _chunks(source: Source, chunk_size: int) -> Iterator[bytes]:
+    """ Yields the contents of the source, in chunks of bounded size. """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start+chunk_size])
+        return
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            yield from _chunks(file, chunk_size)
+        return
+    while chunk := source.read(chunk_size):
+        yield chunk
+
+
+def _lines(source: Source, chunk_size: int) -> Iterator[bytes]:
+    """
+    Yields the lines of the source (without line terminators),
+    holding at most one chunk (plus one incomplete line) in memory.
+    """
+    carry = b""
+    for chunk in _chunks(source, chunk_size):
+        lines = (carry+chunk).split(b"\n")
+        carry = lines.pop()
+        yield from lines
+    if carry:
+        yield carry
+
+
+def iter_num_den_pairs(
+    source: Source,
+    errors: list[FracParseError] | None = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[int, int]]:
+    """
+    Yields the (not necessarily normalised) numerator and denominator
+    of each fraction in the source, skipping blank lines.
+
+    If a list of errors is given, invalid lines are recorded there and
+    skipped; otherwise, the first invalid line raises :class:`FracParseError`.
+    """
+    for line_number, line in enumerate(_lines(source, chunk_size), 1):
+        # int(...) accepts bytes, surrounding whitespace and signs,
+        # so the common case needs no further processing.
+        try:
+            num_str, slash, den_str = line.partition(b"/")
+            num = int(num_str)
+            den = int(den_str) if slash else 1
+            if den == 0:
+                raise FracParseError(line_number, line, "zero denominator")
+        except ValueError as e:
+            if not slash and not line.strip():
+                continue # blank line
+            error = e if isinstance(e, FracParseError) else FracParseError(
+                line_number, line, "not an integer or fraction"
+            )
+            if errors is None:
+                raise error from None
+            errors.append(error)
+            continue
+        yield num, den
+
+
+def iter_fracs(
+    source: Source,
+    errors: list[FracParseError] | None = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[Frac]:
+    """
+    Yields the fractions in the source, one per non-blank line.
+    See :func:`iter_num_den_pairs` for error handling.
+    """
+    for num, den in iter_num_den_pairs(source, errors, chunk_size):
+        yield Frac(num, den)
+
+
+def iter_frac_arrays(
+    source: Source,
+    rows: int = 1 << 16,
+    errors: list[FracParseError] | None = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[FracArray]:
+    """
+    Yields the fractions in the source as arrays of (at most) the given
+    number of rows. Values are written into preallocated int64 buffers,
+    and normalised with a single vectorised gcd per array.
+    See :func:`iter_num_den_pairs` for error handling.
+    """
+    # Imported here, so that NumPy is only required by this function.
+    import numpy as np
+    from .arrays import FracArray
+
+    int64_max = 2**63-1
+    nums = np.empty(rows, dtype=np.int64)
+    dens = np.empty(rows, dtype=np.int64)
+    big_nums: list[int] = [] # Python int copies of the current array,
+    big_dens: list[int] = [] # only used once a value overflows int64
+    filled = 0
+    for num, den in iter_num_den_pairs(source, errors, chunk_size):
+        if big_nums or not (-int64_max <= num <= int64_max
+                            and -int64_max <= den <= int64_max):
+            if not big_nums:
+                big_nums.extend(nums[:filled].tolist())
+                big_dens.extend(dens[:filled].tolist())
+            big_nums.append(num)
+            big_dens.append(den)
+        else:
+            nums[filled] = num
+            dens[filled] = den
+        filled += 1
+        if filled == rows:
+            if big_nums:
+                yield FracArray(big_nums, big_dens)
+                big_nums, big_dens = [], []
+            else:
+                # Copies, because the buffers are reused for the next array.
+                yield FracArray(nums.copy(), dens.copy())
+            filled = 0
+    if big_nums:
+        yield FracArray(big_nums, big_dens)
+    elif filled:
+        yield FracArray(nums[:filled].copy(), dens[:filled].copy())
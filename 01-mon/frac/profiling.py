@@ -0,0 +1,246 @@
+"""
+Opt-in instrumentation of the hot paths of :class:`frac_v2.Frac`.
+
+While a :func:`track` block is running, the constructor, the operators and
+the gcd function used by :mod:`frac_v2` are replaced by wrappers which count
+calls, record the bit lengths of the operands and (optionally) the call sites
+in user code. The original functions are restored when the last block exits,
+so there is no overhead at all when tracking is disabled:
+
+.. code-block:: python
+
+    with frac.profiling.track() as profile:
+        run_workload()
+    print(profile.to_json(indent=2))
+
+Tracking is process-wide: operations in all threads are counted.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import partial
+from types import FrameType
+from typing import Any, Final
+
+import frac_v2
+from frac_v2 import Frac
+
+from . import _patching
+
+_OPERATORS: Final[tuple[str, ...]] = (
+    "__add__", "__radd__", "__sub__", "__rsub__",
+    "__mul__", "__rmul__", "__truediv__", "__rtruediv__", "__neg__",
+    "__eq__", "__lt__", "__le__", "__gt__", "__ge__", "__hash__",
+)
+""" The operators of Frac which are counted. """
+
+_INTERNAL_FILES: Final[frozenset[str]] = frozenset({
+    os.path.normcase(os.path.abspath(frac_v2.__file__)),
+    *(
+        os.path.normcase(os.path.join(os.path.dirname(__file__), name))
+        for name in os.listdir(os.path.dirname(__file__))
+    ),
+})
+""" Source files whose frames are skipped when looking for call sites. """
+
+
+class Profile:
+    """
+    The counts collected by a :func:`track` block.
+
+    Operand sizes are recorded as histograms of the bit length of the
+    largest numerator or denominator involved in each operation, in buckets
+    of powers of two: the bucket b counts operations with size in (b/2, b].
+    """
+
+    __sites: bool
+    """ Whether call sites are recorded. """
+
+    constructions: Counter[str]
+    """
+    Counts of instance creations by path: "new" for the public (validating)
+    constructor, "trusted" for the private one used by the operators, and
+    "allocations" for those which didn't return a shared instance.
+    """
+
+    gcd_calls: int
+    """ Number of calls to gcd made by :mod:`frac_v2`. """
+
+    operators: Counter[str]
+    """ Number of calls of each operator. """
+
+    bit_lengths: dict[str, Counter[int]]
+    """ Histogram of operand bit lengths, for each operator. """
+
+    call_sites: Counter[str]
+    """
+    Number of operations and constructions by call site in user code,
+    as "file:line (function)".
+    """
+
+    def __init__(self, sites: bool = True) -> None:
+        self.__sites = sites
+        self.constructions = Counter()
+        self.gcd_calls = 0
+        self.operators = Counter()
+        self.bit_lengths = {}
+        self.call_sites = Counter()
+
+    @property
+    def sites(self) -> bool:
+        """ Whether call sites are recorded. """
+        return self.__sites
+
+    def to_dict(self) -> dict[str, Any]:
+        """ The collected counts, as a JSON-serialisable dictionary. """
+        return {
+            "constructions": dict(self.constructions),
+            "gcd_calls": self.gcd_calls,
+            "operators": dict(self.operators.most_common()),
+            "bit_lengths": {
+                op: {str(b): n for b, n in sorted(hist.items())}
+                for op, hist in self.bit_lengths.items()
+            },
+            "call_sites": dict(self.call_sites.most_common()),
+        }
+
+    def to_json(self, **kwargs: Any) -> str:
+        """ The collected counts as JSON (arguments are passed to json.dumps). """
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def _operator(self, name: str, bits: int, site: str | None) -> None:
+        """ Records a call to an operator. Called by the wrappers. """
+        self.operators[name] += 1
+        bucket = 1 << (bits-1).bit_length() if bits > 1 else bits
+        hist = self.bit_lengths.get(name)
+        if hist is None:
+            hist = self.bit_lengths[name] = Counter()
+        hist[bucket] += 1
+        if site is not None:
+            self.call_sites[site] += 1
+
+    def _construction(self, kind: str, site: str | None) -> None:
+        """ Records an instance creation. Called by the wrappers. """
+        self.constructions[kind] += 1
+        if site is not None:
+            self.call_sites[site] += 1
+
+    def __repr__(self) -> str:
+        return f"Profile({self.to_dict()!r})"
+
+
+_lock: Final[threading.Lock] = threading.Lock()
+""" Protects the list of active profiles and the wrappers below. """
+
+_active: list[Profile] = []
+""" The profiles of the running track() blocks. """
+
+
+def _call_site() -> str | None:
+    """
+    The innermost frame outside of the fractions code, as a call site,
+    or None if no active profile records call sites.
+    """
+    if not any(p.sites for p in _active):
+        return None
+    frame: FrameType | None = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if os.path.normcase(code.co_filename) not in _INTERNAL_FILES:
+            return f"{code.co_filename}:{frame.f_lineno} ({code.co_name})"
+        frame = frame.f_back
+    return None
+
+
+def _bits(value: Any) -> int:
+    """ The bit length of the largest part of a Frac or int (0 otherwise). """
+    if isinstance(value, Frac):
+        num, den = value.num_den_pair
+        return (abs(num) | den).bit_length()
+    if isinstance(value, int):
+        return abs(value).bit_length()
+    return 0
+
+
+def _wrap_operator(name: str, op: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(self: Frac, *args: Any) -> Any:
+        bits = max([_bits(self), *map(_bits, args)])
+        site = _call_site()
+        for profile in _active:
+            profile._operator(name, bits, site)
+        return op(self, *args)
+    wrapper.__name__ = op.__name__
+    wrapper.__doc__ = op.__doc__
+    return wrapper
+
+
+def _wrap_construction(
+    kind: str, method: staticmethod[..., Frac]
+) -> staticmethod[..., Frac]:
+    func = method.__func__
+
+    def wrapper(*args: Any, **kwargs: Any) -> Frac:
+        site = _call_site()
+        for profile in _active:
+            profile._construction(kind, site)
+        return func(*args, **kwargs)
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return staticmethod(wrapper)
+
+
+def _wrap_gcd(gcd: Callable[..., int]) -> Callable[..., int]:
+    def wrapper(*args: int) -> int:
+        for profile in _active:
+            profile.gcd_calls += 1
+        return gcd(*args)
+    return wrapper
+
+
+def _install() -> None:
+    """ Replaces the instrumented functions by their wrappers. """
+    wrappings: dict[tuple[Any, str], _patching.Wrapping] = {
+        (frac_v2, "gcd"): _wrap_gcd,
+        (Frac, "__new__"): partial(_wrap_construction, "new"),
+        (Frac, "_trusted"): partial(_wrap_construction, "trusted"),
+        (Frac, "_Frac__unshared"): partial(_wrap_construction, "allocations"),
+    }
+    for name in _OPERATORS:
+        wrappings[Frac, name] = partial(_wrap_operator, name)
+    _patching.add_layer(__name__, wrappings)
+
+
+def _uninstall() -> None:
+    """ Restores the original functions. """
+    _patching.remove_layer(__name__)
+
+
+@contextmanager
+def track(sites: bool = True) -> Iterator[Profile]:
+    """
+    Counts the fraction operations performed in the block, returning the
+    :class:`Profile` with the results. Blocks can be nested, in which case
+    each one counts its own operations.
+
+    Recording call sites (on by default) walks the stack on each operation,
+    which makes tracking noticeably slower.
+    """
+    profile = Profile(sites)
+    with _lock:
+        if not _active:
+            _install()
+        _active.append(profile)
+    try:
+        yield profile
+    finally:
+        with _lock:
+            _active.remove(profile)
+            if not _active:
+                _uninstall()
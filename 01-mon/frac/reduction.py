@@ -0,0 +1,163 @@
+"""
+Sums and products of long sequences of fractions, by balanced tree reduction.
+
+A left-to-right ``sum()`` adds each (small) value to an ever-growing partial
+sum: every step costs time proportional to the size of the partial sum, and
+the whole reduction is quadratic. Combining values pairwise in a balanced
+tree instead keeps both operands of each operation of similar size, which is
+where CPython's subquadratic (Karatsuba) multiplication pays off.
+
+The reduction can also run in worker processes: chunks of values are shipped
+to the workers in the compact encoding of :mod:`frac.binary`, reduced there,
+and the partial results are merged pairwise, also in the workers.
+"""
+
+from __future__ import annotations
+
+import operator
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+
+from frac_v2 import Frac
+
+from .binary import decode_frac, encode_frac
+
+Op = Callable[[Frac, Frac], Frac]
+""" An associative binary operation on fractions. """
+
+
+def reduce_sum(
+    values: Iterable[Frac | int],
+    workers: int = 1,
+    chunk_size: int = 1 << 14
+) -> Frac:
+    """
+    The sum of the values, combined pairwise in a balanced tree.
+    With workers > 1, chunks of chunk_size values are summed in that
+    many worker processes.
+    """
+    return _reduce(operator.add, Frac.ZERO, values, workers, chunk_size)
+
+
+def reduce_prod(
+    values: Iterable[Frac | int],
+    workers: int = 1,
+    chunk_size: int = 1 << 14
+) -> Frac:
+    """
+    The product of the values, combined pairwise in a balanced tree.
+    With workers > 1, chunks of chunk_size values are multiplied in that
+    many worker processes.
+    """
+    return _reduce(operator.mul, Frac.ONE, values, workers, chunk_size)
+
+
+def _fracs(values: Iterable[Frac | int]) -> Iterator[Frac]:
+    return (Frac.from_int(v) if isinstance(v, int) else v for v in values)
+
+
+def _tree_reduce(op: Op, identity: Frac, values: Iterable[Frac]) -> Frac:
+    """
+    Reduces the values in a balanced binary tree, streaming: the stack holds
+    at most one partial result per level, where a partial result at level k
+    combines 2**k values (like the digits of a binary counter).
+    """
+    stack: list[tuple[int, Frac]] = []
+    for value in values:
+        level = 0
+        while stack and stack[-1][0] == level:
+            _, top = stack.pop()
+            value = op(top, value)
+            level += 1
+        stack.append((level, value))
+    if not stack:
+        return identity
+    _, result = stack.pop()
+    while stack: # smallest partial results first
+        _, top = stack.pop()
+        result = op(top, result)
+    return result
+
+
+def _reduce(
+    op: Op,
+    identity: Frac,
+    values: Iterable[Frac | int],
+    workers: int,
+    chunk_size: int
+) -> Frac:
+    if workers <= 0:
+        raise ValueError(f"Expected positive, found {workers = }")
+    if chunk_size <= 0:
+        raise ValueError(f"Expected positive, found {chunk_size = }")
+    if workers == 1:
+        return _tree_reduce(op, identity, _fracs(values))
+    return _reduce_parallel(op, identity, _fracs(values), workers, chunk_size)
+
+
+def _encode(fracs: Iterable[Frac]) -> bytes:
+    """ Encodes fractions back to back, as in :mod:`frac.binary`. """
+    out = bytearray()
+    for frac in fracs:
+        encode_frac(frac, out)
+    return bytes(out)
+
+
+def _decode(data: bytes) -> Iterator[Frac]:
+    """ Decodes fractions encoded by :func:`_encode`. """
+    view = memoryview(data)
+    pos = 0
+    while pos < len(view):
+        frac, pos = decode_frac(view, pos)
+        yield frac
+
+
+def _reduce_chunk(op: Op, identity: Frac, data: bytes) -> bytes:
+    """ Runs in worker processes: reduces an encoded chunk of values. """
+    return _encode([_tree_reduce(op, identity, _decode(data))])
+
+
+def _merge(op: Op, lhs: bytes, rhs: bytes) -> bytes:
+    """ Runs in worker processes: combines two encoded partial results. """
+    (x,), (y,) = _decode(lhs), _decode(rhs)
+    return _encode([op(x, y)])
+
+
+def _reduce_parallel(
+    op: Op,
+    identity: Frac,
+    values: Iterator[Frac],
+    workers: int,
+    chunk_size: int
+) -> Frac:
+    """
+    Reduces chunks in worker processes, then merges partial results in
+    pairs as they become ready. Only commutative operations can be merged
+    in completion order, which is the case of sum and product.
+    """
+    # Bound the number of tasks in flight, so that the input is not read
+    # (and sent to the workers) faster than it can be reduced.
+    max_pending = 2*workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: set[Future[bytes]] = set()
+        ready: list[bytes] = []
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                chunk = list(islice(values, chunk_size))
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(_reduce_chunk, op, identity, _encode(chunk)))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            ready.extend(future.result() for future in done)
+            while len(ready) >= 2:
+                pending.add(pool.submit(_merge, op, ready.pop(), ready.pop()))
+    if not ready:
+        return identity
+    (result,) = _decode(ready[0])
+    return result
@@ -7,13 +7,14 @@ ie any name which can be used as a legit variable name in Python code.
 
 from __future__ import annotations
 
-from math import gcd
 from typing import Any, Final
 
-print(f"  In frac_v1.py, just before Frac, {dir() = }")
-#      a list of all names defined in scope ^^^^^
+# print(f"  In frac_v1.py, just before Frac, {dir() = }")
+#        a list of all names defined in scope ^^^^^
 
-assert "Frac" not in dir() # True: Frac has not been defined yet
+# assert "Frac" not in dir() # True: Frac has not been defined yet
+# (Printing and assertions are commented out: importing a module should not
+# have side effects, and should be as fast as possible.)
 
 
 class Frac:
@@ -152,8 +153,12 @@ class Frac:
             return NotImplemented # the correct way to return False in __eq__
         sn, sd = self._num, self._den
         on, od = other._num, other._den
-        sg, og = gcd(sn, sd), gcd(on, od)
-        return sn//sg == on//og and sd//sg == od//og
+        return sn*od == on*sd
+        # Cross-multiplication: since denominators are non-zero,
+        # sn/sd == on/od exactly when sn*od == on*sd.
+        # This is cheaper than normalising both sides first, as in:
+        # sg, og = gcd(sn, sd), gcd(on, od)
+        # return sn//sg == on//og and sd//sg == od//og
         #                       ^^^ boolean operator
         # 'and', 'or', 'not' are bool operators
         # 'and' and 'or' are short-circuited
@@ -186,12 +191,12 @@ class Frac:
         return f"{self._num}/{self._den}"
 
 
-    assert "Frac" not in dir() # True: Frac has not been defined yet
+    # assert "Frac" not in dir() # True: Frac has not been defined yet
 
-assert "Frac" in dir() # True: Frac has been defined once we left its scope
+# assert "Frac" in dir() # True: Frac has been defined once we left its scope
 
 # print("  In frac_v1.py, just after Frac")
-print(f"  In frac_v1.py, {Frac = }")
+# print(f"  In frac_v1.py, {Frac = }")
 
 ZERO: Final[Frac] = Frac(0, 1)
 ONE: Final[Frac] = Frac(1, 1)
@@ -3,11 +3,21 @@ A better implementation of fractions, with more bells and whistles.
 """
 
 from __future__ import annotations
+import sys
 from math import gcd
-from typing import Any, ClassVar
+from collections.abc import Iterable
+from typing import Any, ClassVar, Final
+
+_HASH_MODULUS: Final[int] = sys.hash_info.modulus
+""" The prime P used to hash numeric types. """
+
+_HASH_INF: Final[int] = sys.hash_info.inf
+""" The hash of infinity, used if the denominator is a multiple of P. """
 
 class Frac:
 
+    ZERO: ClassVar[Frac]
+    ONE: ClassVar[Frac]
     PI: ClassVar[Frac] # can't set it here because Frac doesn't exist yet.
 
     @staticmethod
@@ -18,6 +28,7 @@ class Frac:
 
         A static method is a method on the class object Frac.
         Called as Frac.from_int(...) rather than Frac(22, 7).from_int(...).
+        Small integers are shared instances, not fresh allocations.
         """
         return Frac(num, 1)
 
@@ -37,22 +48,71 @@ class Frac:
         # 2. int(...) raise ValueError if not int representation of num and den
         # 3. Frac(..., ...) raises ZeroDivisionError if den == 0
 
+    @staticmethod
+    def sum(values: Iterable[Frac|int], start: Frac|int = 0) -> Frac:
+        """
+        The sum of the given values, added to start.
+        Normalises once at the end, rather than at every step.
+        """
+        acc = FracAccumulator(start)
+        acc.add_all(values)
+        return acc.value
+
+    @staticmethod
+    def prod(values: Iterable[Frac|int], start: Frac|int = 1) -> Frac:
+        """
+        The product of the given values, multiplied by start.
+        Normalises once at the end, rather than at every step.
+        """
+        acc = FracAccumulator(start)
+        acc.mul_all(values)
+        return acc.value
+
     # Private attributes store the class data
 
+    __slots__ = ("__num", "__den", "__hash")
+    # Instances store their attributes in fixed slots rather than in
+    # a __dict__, which saves memory. Names in __slots__ are name-mangled
+    # just like the attributes, so these become _Frac__num and _Frac__den.
+
     __num: int
     """ This stores the numerator. """
 
     __den: int
     """ This stores the denominator. """
 
-    # Initialiser (still not a constructor)
-    def __init__(self, num: int, den: int = 1) -> None:
-        #                   default value ^^^
+    __hash: int
+    """ This caches the hash (unset until __hash__ is first called). """
+
+    __small_ints: ClassVar[list[Frac | None]]
+    """
+    Shared instances for the integers -SMALL_INT_MAX..SMALL_INT_MAX,
+    indexed by value+SMALL_INT_MAX (None until the value is first created).
+    """
+
+    __small_fracs: ClassVar[dict[tuple[int, int], Frac]]
+    """
+    Shared instances for fractions with small numerator and denominator
+    (added when the value is first created), as well as for other common
+    values (e.g. PI), keyed by (num, den).
+    """
+
+    SMALL_INT_MAX: ClassVar[int] = 256
+    """ Integers up to this absolute value are interned. """
+
+    SMALL_FRAC_MAX: ClassVar[int] = 16
+    """ Fractions with |num| and den up to this value are interned. """
+
+    # Constructor (this time a real one)
+    def __new__(cls, num: int, den: int = 1) -> Frac:
+        #                      default value ^^^
         """
-        Initialiser (not technically a constructor).
+        Constructor: responsible for the instance creation process.
 
-        Validates constructor data and sets values for the attributes.
-        Not responsible for the instance creation process.
+        Validates constructor data and normalises it. Because instances are
+        immutable, common values can be shared rather than re-created
+        (flyweight pattern): the constructor returns the interned instance,
+        if there is one.
         """
         # 1. Validation
         if den == 0:
@@ -60,10 +120,75 @@ class Frac:
         if den < 0:
             num, den = -num, -den
         g = gcd(num, den)
-        num, den = num//g, den//g
-        # 2. Setting attributes
-        self.__num = num
-        self.__den = den
+        if g != 1:
+            num, den = num//g, den//g
+        # 2. Lookup of shared instances (only for Frac, not for subclasses)
+        if cls is Frac:
+            return Frac._trusted(num, den)
+        # 3. Creation and setting attributes
+        instance = super().__new__(cls)
+        instance.__num = num
+        instance.__den = den
+        return instance
+
+    @staticmethod
+    def _trusted(num: int, den: int) -> Frac:
+        """
+        Private constructor for data which is already normalised,
+        i.e. with den > 0 and gcd(num, den) == 1,
+        skipping validation and gcd computation.
+        Returns the shared instance for the value, if there is one.
+        """
+        if den == 1 and -Frac.SMALL_INT_MAX <= num <= Frac.SMALL_INT_MAX:
+            i = num+Frac.SMALL_INT_MAX
+            shared = Frac.__small_ints[i]
+            if shared is None:
+                shared = Frac.__small_ints[i] = Frac.__unshared(num, 1)
+            return shared
+        if den <= Frac.SMALL_FRAC_MAX:
+            shared = Frac.__small_fracs.get((num, den))
+            if shared is not None:
+                return shared
+            if -Frac.SMALL_FRAC_MAX <= num <= Frac.SMALL_FRAC_MAX:
+                return Frac._intern(Frac.__unshared(num, den))
+        return Frac.__unshared(num, den)
+
+    @staticmethod
+    def __unshared(num: int, den: int) -> Frac:
+        """
+        Creates a new instance from normalised data,
+        bypassing the lookup of shared instances.
+        """
+        instance = object.__new__(Frac)
+        instance.__num = num
+        instance.__den = den
+        return instance
+
+    @staticmethod
+    def _build_shared() -> None:
+        """
+        Creates the (empty) tables of shared instances.
+        Called once, right after the class is defined: the instances are
+        created on first use of each value, rather than all of them at
+        import time, which would make importing the module slower.
+        """
+        Frac.__small_ints = [None]*(2*Frac.SMALL_INT_MAX+1)
+        Frac.__small_fracs = {}
+
+    @staticmethod
+    def _intern(frac: Frac) -> Frac:
+        """
+        Registers a fraction as a shared instance, so that the constructor
+        returns it for equal values. Returns the shared instance.
+        """
+        return Frac.__small_fracs.setdefault(frac.num_den_pair, frac)
+
+    def __reduce__(self) -> tuple[type[Frac], tuple[int, int]]:
+        """
+        Tells pickle and copy how to re-create the instance,
+        which is required because __new__ takes arguments.
+        """
+        return (Frac, (self.__num, self.__den))
 
     @property
     def num(self) -> int:
@@ -79,69 +204,168 @@ class Frac:
     def num_den_pair(self) -> tuple[int, int]:
         return self.__num, self.__den
 
+    def limit_denominator(self, max_den: int = 1_000_000) -> Frac:
+        """
+        The closest fraction to self with denominator at most max_den
+        (same as :meth:`fractions.Fraction.limit_denominator`).
+
+        Uses continued fractions: the convergents p/q of self are its best
+        approximations, so we expand self until the next convergent would
+        have a denominator larger than max_den. The answer is then either
+        the last convergent p1/q1, or the semiconvergent between it and the
+        previous one with the largest allowed denominator.
+        """
+        if max_den < 1:
+            raise ValueError(f"Expected positive max_den, found {max_den = }")
+        if self.__den <= max_den:
+            return self
+        p0, q0, p1, q1 = 0, 1, 1, 0
+        n, d = self.__num, self.__den
+        while True:
+            a = n//d
+            q2 = q0+a*q1
+            if q2 > max_den:
+                break
+            p0, q0, p1, q1 = p1, q1, p0+a*p1, q2
+            n, d = d, n-a*d
+        k = (max_den-q0)//q1
+        # The semiconvergent is at distance 1/(q1*(q0+k*q1)) from p1/q1,
+        # while p1/q1 is at distance d/(q1*self.den) from self.
+        if 2*d*(q0+k*q1) <= self.__den:
+            return Frac._trusted(p1, q1)
+        return Frac._trusted(p0+k*p1, q0+k*q1)
+
+    # The arithmetic operators below use Henrici's algorithms: common factors
+    # are cancelled *before* multiplying, so that intermediate integers stay
+    # small and the results are already normalised. This means that they can
+    # use the trusted constructor, skipping the gcd in __new__.
+
     def __neg__(self) -> Frac:
         """ Implements the unary operator - """
-        return Frac(-self.num, self.den)
+        return Frac._trusted(-self.__num, self.__den)
 
     def __add__(self, rhs: Frac|int) -> Frac:
         """ Implements the binary operator + """
+        sn, sd = self.__num, self.__den
         if isinstance(rhs, int):
-            # other = Frac(other, 1)     # Option 1
-            # other = Frac(other)        # Option 2, if den=1 in __init__
-            rhs = Frac.from_int(rhs) # Option 3, utility constructor
-        sn, sd = self.num_den_pair
-        on, od = rhs.num_den_pair
-        return Frac(sn*od+sd*on, sd*od)
+            # No need to create a temporary Frac.from_int(rhs):
+            # sn/sd + rhs/1 = (sn+sd*rhs)/sd, and gcd(sn+sd*rhs, sd) = 1
+            return Frac._trusted(sn+sd*rhs, sd)
+        if not isinstance(rhs, Frac):
+            return NotImplemented
+        return Frac.__add_pairs(sn, sd, rhs.__num, rhs.__den)
+
+    @staticmethod
+    def __add_pairs(sn: int, sd: int, on: int, od: int) -> Frac:
+        """
+        Computes sn/sd + on/od, for normalised fractions.
+        With g = gcd(sd, od), the sum is t/(sd*od//g) with t as below,
+        and the only common factors of t and the denominator divide g.
+        """
+        g = gcd(sd, od)
+        if g == 1:
+            return Frac._trusted(sn*od+sd*on, sd*od)
+        s = sd//g
+        t = sn*(od//g)+on*s
+        g2 = gcd(t, g)
+        if g2 == 1:
+            return Frac._trusted(t, s*od)
+        return Frac._trusted(t//g2, s*(od//g2))
 
     def __radd__(self, lhs: int) -> Frac:
         """
         Implements int+Frac
                lhs ^^^ ^^^^ self
         """
-        return Frac.from_int(lhs)+self
+        return self+lhs # addition is commutative
 
     def __sub__(self, rhs: Frac|int) -> Frac:
         """ Implements the binary operator - """
-        return self+(-rhs)
+        sn, sd = self.__num, self.__den
+        if isinstance(rhs, int):
+            return Frac._trusted(sn-sd*rhs, sd)
+        if not isinstance(rhs, Frac):
+            return NotImplemented
+        return Frac.__add_pairs(sn, sd, -rhs.__num, rhs.__den)
 
     def __rsub__(self, lhs: int) -> Frac:
         """
         Implements int-Frac
                lhs ^^^ ^^^^ self
         """
-        return Frac.from_int(lhs)-self
+        return (-self)+lhs
 
     def __mul__(self, rhs: Frac|int) -> Frac:
         """ Implements the binary operator * """
+        sn, sd = self.__num, self.__den
         if isinstance(rhs, int):
-            rhs = Frac.from_int(rhs)
-        return Frac(self.num*rhs.num, self.den*rhs.den)
+            g = gcd(rhs, sd)
+            return Frac._trusted(sn*(rhs//g), sd//g)
+        if not isinstance(rhs, Frac):
+            return NotImplemented
+        return Frac.__mul_pairs(sn, sd, rhs.__num, rhs.__den)
+
+    @staticmethod
+    def __mul_pairs(sn: int, sd: int, on: int, od: int) -> Frac:
+        """
+        Computes (sn*on)/(sd*od) for normalised fractions sn/sd and on/od,
+        cancelling the common factors of sn and od, and of on and sd, first.
+        Presumes sd > 0, but allows od < 0: division passes the divisor
+        reversed, as (sn, sd, den, num), so that its numerator becomes od.
+        """
+        g1 = gcd(sn, od)
+        g2 = gcd(on, sd)
+        num = (sn//g1)*(on//g2)
+        den = (sd//g2)*(od//g1)
+        if den < 0:
+            num, den = -num, -den
+        return Frac._trusted(num, den)
 
     def __rmul__(self, lhs: int) -> Frac:
         """
         Implements int*Frac
                lhs ^^^ ^^^^ self
         """
-        return Frac.from_int(lhs)*self
+        return self*lhs # multiplication is commutative
 
-    def __truediv__(self, rhs: Frac) -> Frac:
+    def __truediv__(self, rhs: Frac|int) -> Frac:
         """
         Implements the binary operator /
         __floordiv__ implements the binary operator //
         """
-        if rhs == 0: # exploiting our __eq__ implementation!
-            raise ZeroDivisionError()
+        sn, sd = self.__num, self.__den
         if isinstance(rhs, int):
-            rhs = Frac.from_int(rhs)
-        return Frac(self.num*rhs.den,self.den*rhs.num
-        )
+            if rhs == 0:
+                raise ZeroDivisionError()
+            g = gcd(sn, rhs)
+            num, den = sn//g, sd*(rhs//g)
+            if den < 0:
+                num, den = -num, -den
+            return Frac._trusted(num, den)
+        if not isinstance(rhs, Frac):
+            # Checked before comparing rhs to zero, which would be
+            # elementwise for arrays (see FracArray.__rtruediv__).
+            return NotImplemented
+        if rhs.__num == 0:
+            raise ZeroDivisionError()
+        # sn/sd divided by on/od is sn/sd times od/on
+        return Frac.__mul_pairs(sn, sd, rhs.__den, rhs.__num)
 
     def __rtruediv__(self, lhs: int) -> Frac:
         """
         Implements int/Frac
                lhs ^^^ ^^^^ self
         """
-        return Frac.from_int(lhs)/self
+        if not isinstance(lhs, int):
+            return NotImplemented
+        sn, sd = self.__num, self.__den
+        if sn == 0:
+            raise ZeroDivisionError()
+        g = gcd(lhs, sn)
+        num, den = (lhs//g)*sd, sn//g
+        if den < 0:
+            num, den = -num, -den
+        return Frac._trusted(num, den)
 
     def __eq__(self, other: Any) -> bool:
         """
@@ -160,20 +384,117 @@ class Frac:
 
         Necessarily, equality implies equal hash with this implementation.
         """
-        if isinstance(other, int) and self.den == 1:
-            return self.num == other
-        if not isinstance(other, Frac):
+        if isinstance(other, Frac):
+            if self is other: # e.g. shared instances
+                return True
+            return self.__num == other.__num and self.__den == other.__den
+        if isinstance(other, int):
+            return self.__den == 1 and self.__num == other
+        # Other numeric types (float, Fraction, Decimal) provide their exact
+        # value as a normalised (numerator, denominator) pair.
+        as_integer_ratio = getattr(other, "as_integer_ratio", None)
+        if as_integer_ratio is None:
             return NotImplemented
-        return self.num == other.num and self.den == other.den
+        num: int
+        den: int
+        try:
+            num, den = as_integer_ratio()
+        except (ValueError, OverflowError): # infinities and NaNs
+            return False
+        return self.__num == num and self.__den == den
+
+    # Rich comparisons: together with __eq__, they make fractions totally
+    # ordered, so they can be sorted, bisected, passed to min/max, etc.
+
+    def __compare(self, other: Any) -> Any:
+        """
+        Returns a number which is negative, zero or positive as self is
+        less than, equal to or greater than other (NaN if other is NaN),
+        or None if other is not a number which we can compare with.
+        """
+        if isinstance(other, Frac):
+            on, od = other.__num, other.__den
+        elif isinstance(other, int):
+            on, od = other, 1
+        else:
+            as_integer_ratio = getattr(other, "as_integer_ratio", None)
+            if as_integer_ratio is None:
+                return None
+            try:
+                on, od = as_integer_ratio()
+            except (ValueError, OverflowError): # infinities and NaNs
+                return -float(other)
+        sn, sd = self.__num, self.__den
+        if sd == od:
+            return sn-on
+        # Pre-screening with floats: int/int division is correctly rounded,
+        # hence monotonic, so different floats imply the same ordering for
+        # the exact values. Only equal floats need the exact comparison.
+        if sn.bit_length() <= 64 and sd.bit_length() <= 64 \
+                and on.bit_length() <= 64 and od.bit_length() <= 64:
+            fs, fo = sn/sd, on/od
+            if fs != fo:
+                return fs-fo
+        # Cross-multiplication (denominators are positive).
+        return sn*od-on*sd
+
+    def __lt__(self, other: Frac|int) -> bool:
+        """ Implements the binary operator < """
+        c = self.__compare(other)
+        if c is None:
+            return NotImplemented
+        return bool(c < 0)
+
+    def __le__(self, other: Frac|int) -> bool:
+        """ Implements the binary operator <= """
+        c = self.__compare(other)
+        if c is None:
+            return NotImplemented
+        return bool(c <= 0)
+
+    def __gt__(self, other: Frac|int) -> bool:
+        """ Implements the binary operator > """
+        c = self.__compare(other)
+        if c is None:
+            return NotImplemented
+        return bool(c > 0)
+
+    def __ge__(self, other: Frac|int) -> bool:
+        """ Implements the binary operator >= """
+        c = self.__compare(other)
+        if c is None:
+            return NotImplemented
+        return bool(c >= 0)
 
     def __hash__(self) -> int:
         """
-        To ensure that this respects the requirements,
-        derive the hash from data which uniquely identifies a Frac instance.
+        To ensure that this respects the requirements, we use the same
+        algorithm as the builtin numeric types: the hash of num/den is
+        num * den^-1 modulo a fixed prime P (see the "Hashing of numeric
+        types" section of the Python docs). Then hash(Frac(1, 2)) equals
+        hash(0.5), hash(Fraction(1, 2)) and hash(Decimal("0.5")), just like
+        Frac(1, 2) == 0.5, etc.
+
+        The hash is computed on first use and stored in a slot,
+        since it costs a modular inverse.
         """
-        if self.den == 1:
-            return hash(self.num)
-        return hash((self.num, self.den))
+        try:
+            return self.__hash
+        except AttributeError: # not computed yet
+            pass
+        num, den = self.__num, self.__den
+        try:
+            inverse = pow(den, -1, _HASH_MODULUS)
+        except ValueError: # den is a multiple of P, so it has no inverse
+            result = _HASH_INF
+        else:
+            result = hash(hash(abs(num))*inverse)
+        if num < 0:
+            result = -result
+        if result == -1: # -1 is reserved for errors in the C API
+            result = -2
+        self.__hash = result
+        return result
 
     def __repr__(self) -> str:
         return f"Frac({self.num}, {self.den})"
@@ -183,4 +504,308 @@ class Frac:
             return str(self.num)
         return f"{self.num}/{self.den}"
 
-Frac.PI = Frac(22, 7)
+    # Exact decimal expansions, computed with integer arithmetic only
+    # (going through float would round to 53 bits, and depend on the platform
+    # for very small or very large values).
+
+    def to_decimal(self, digits: int, rounding: str = "half_even") -> str:
+        """
+        The fixed-point decimal expansion of the fraction, with the given
+        number of digits after the decimal point, rounded as specified
+        by one of the ROUNDING_MODES (same meaning as in :mod:`decimal`).
+        """
+        if digits < 0:
+            raise ValueError(f"Expected non-negative digits, found {digits = }")
+        if rounding not in ROUNDING_MODES:
+            raise ValueError(f"Unknown rounding mode, found {rounding = }")
+        num, den = self.__num, self.__den
+        negative = num < 0
+        q, r = divmod(abs(num)*10**digits, den)
+        if r and _rounds_away(rounding, negative, q, 2*r-den):
+            q += 1
+        text = str(q).rjust(digits+1, "0")
+        if digits:
+            text = f"{text[:-digits]}.{text[-digits:]}"
+        return f"-{text}" if negative else text
+
+    def to_repeating(self, max_digits: int = 1000) -> str:
+        """
+        The exact decimal expansion of the fraction, with the repeating
+        digits (if any) in parentheses, e.g. "0.1(6)" for 1/6. If the
+        expansion needs more than max_digits digits after the decimal point,
+        it is truncated to max_digits and followed by "...".
+
+        The digits before the repeating part are as many as the larger of
+        the exponents of 2 and 5 in the denominator: after those, the
+        remainders of the long division repeat with a period dividing
+        the multiplicative order of 10 modulo the rest of the denominator.
+        """
+        num, den = self.__num, self.__den
+        int_part, r = divmod(abs(num), den)
+        sign = "-" if num < 0 else ""
+        if not r:
+            return f"{sign}{int_part}"
+        twos = (den & -den).bit_length()-1
+        fives, rest = 0, den
+        while rest % 5 == 0:
+            rest //= 5
+            fives += 1
+        prefix_len = max(twos, fives)
+        digits: list[str] = []
+        for _ in range(min(prefix_len, max_digits)):
+            d, r = divmod(10*r, den)
+            digits.append(str(d))
+        if prefix_len > max_digits:
+            return f"{sign}{int_part}.{''.join(digits)}..."
+        if not r:
+            return f"{sign}{int_part}.{''.join(digits)}"
+        start = r
+        period: list[str] = []
+        while len(digits)+len(period) < max_digits:
+            d, r = divmod(10*r, den)
+            period.append(str(d))
+            if r == start:
+                return f"{sign}{int_part}.{''.join(digits)}({''.join(period)})"
+        return f"{sign}{int_part}.{''.join(digits)}{''.join(period)}..."
+
+    def __format__(self, spec: str) -> str:
+        """
+        Implements format(frac, spec) and f"{frac:spec}", where spec is:
+
+            [[fill]align][sign][width][.precision][type][:rounding]
+
+        - type "f" is the fixed-point expansion with the given precision
+          (6 if not specified), rounded as specified (see ROUNDING_MODES,
+          default "half_even"), e.g. f"{Frac(2, 3):.3f}" is "0.667";
+        - type "r" is the exact expansion, with the repeating digits in
+          parentheses, up to precision digits (1000 if not specified),
+          e.g. f"{Frac(2, 3):r}" is "0.(6)";
+        - no type is the usual a/b form (precision not allowed).
+
+        Fill, align, sign and width are as for builtin numbers: values are
+        right-aligned by default, align "=" pads between the sign and the
+        digits, and a width starting with "0" pads with zeros after the sign
+        (e.g. f"{Frac(-1, 3):07.3f}" is "-00.333"). Unlike floats, the
+        digits are exact: no conversion to float takes place.
+        """
+        spec, _, rounding = spec.partition(":")
+        kind = spec[-1:] if spec[-1:] in ("f", "r") else ""
+        body = spec[:len(spec)-len(kind)]
+        body, dot, precision = body.partition(".")
+        if dot and not precision.isdigit():
+            raise ValueError(f"Invalid precision, found {spec = }")
+        fill, align = "", ""
+        if body[1:2] in _ALIGNMENTS:
+            fill, align, body = body[0], body[1], body[2:]
+        elif body[:1] in _ALIGNMENTS:
+            align, body = body[0], body[1:]
+        sign = body[:1] if body[:1] in ("+", "-", " ") else ""
+        body = body[len(sign):]
+        if body[:1] == "0":
+            # Zero-padding, unless the fill or the alignment are explicit.
+            fill, align = fill or "0", align or "="
+        if body and not body.isdigit():
+            raise ValueError(f"Invalid format spec, found {spec = }")
+        if kind == "f":
+            text = self.to_decimal(int(precision or 6), rounding or "half_even")
+        elif kind == "r":
+            text = self.to_repeating(int(precision or 1000))
+        elif dot or rounding:
+            raise ValueError(f"Precision and rounding need a type, found {spec = }")
+        else:
+            text = str(self)
+        if sign in ("+", " ") and not text.startswith("-"):
+            text = sign+text
+        pad = int(body or 0)-len(text)
+        if pad <= 0:
+            return text
+        fill = fill or " "
+        if align == "<":
+            return text+fill*pad
+        if align == "^":
+            return fill*(pad//2)+text+fill*(pad-pad//2)
+        if align == "=":
+            signed = 1 if text[:1] in ("+", "-", " ") else 0
+            return text[:signed]+fill*pad+text[signed:]
+        return fill*pad+text
+
+_ALIGNMENTS: Final[tuple[str, ...]] = ("<", ">", "=", "^")
+""" The alignment characters of format specs. """
+
+ROUNDING_MODES: Final[frozenset[str]] = frozenset({
+    "half_even", "half_up", "half_down", "down", "up", "floor", "ceiling",
+})
+"""
+Rounding modes of :meth:`Frac.to_decimal`, as in :mod:`decimal`: "down" and
+"up" round towards and away from zero, "floor" and "ceiling" towards
+negative and positive infinity; the "half" modes round to the nearest,
+and differ on ties.
+"""
+
+def _rounds_away(rounding: str, negative: bool, q: int, half_cmp: int) -> bool:
+    """
+    Whether an inexact magnitude q (with a non-zero remainder) is rounded
+    away from zero, given the sign of the value and the sign of half_cmp,
+    which compares the remainder to half a unit.
+    """
+    if rounding == "down":
+        return False
+    if rounding == "up":
+        return True
+    if rounding == "floor":
+        return negative
+    if rounding == "ceiling":
+        return not negative
+    if half_cmp != 0:
+        return half_cmp > 0
+    if rounding == "half_up":
+        return True
+    if rounding == "half_down":
+        return False
+    return q % 2 == 1 # half_even
+
+class FracAccumulator:
+    """
+    A mutable accumulator for long sums and products of fractions.
+
+    Keeps an unreduced numerator and denominator, so that each step costs
+    a few multiplications rather than a full gcd normalisation:
+
+    - sums keep the least common multiple of the denominators seen so far,
+      so that repeated denominators only cost a divisibility check;
+    - products simply multiply numerators and denominators.
+
+    The fraction is normalised when :attr:`value` is read, or when the
+    denominator grows past :attr:`normalise_bits` bits. If the normalised
+    denominator itself is that large, the threshold is raised to twice its
+    size, so that large values don't trigger a (costly) gcd at every step.
+
+    While the fraction is known to be reduced, sums with new denominators
+    keep it reduced as in :meth:`Frac.__add__` (Henrici's algorithm, whose
+    gcds only involve the small denominator): sums of fractions with many
+    distinct denominators then skip normalisation entirely, which would
+    cost a gcd of the (large) numerator and denominator.
+    """
+
+    __num: int
+    """ The (unreduced) numerator. """
+
+    __den: int
+    """ The (unreduced, positive) denominator. """
+
+    __normalise_bits: int
+    """ Denominator size (in bits) beyond which we normalise eagerly. """
+
+    __limit_bits: int
+    """ The current threshold: normalise_bits, or more for large values. """
+
+    __reduced: bool
+    """ Whether the numerator and denominator are known to be coprime. """
+
+    def __init__(self, start: Frac|int = 0, normalise_bits: int = 4096) -> None:
+        if isinstance(start, int):
+            start = Frac.from_int(start)
+        if normalise_bits <= 0:
+            raise ValueError(f"Expected positive size, found {normalise_bits = }")
+        self.__num, self.__den = start.num_den_pair
+        self.__normalise_bits = normalise_bits
+        self.__limit_bits = normalise_bits
+        self.__reduced = True
+
+    @property
+    def normalise_bits(self) -> int:
+        """ Denominator size (in bits) beyond which we normalise eagerly. """
+        return self.__normalise_bits
+
+    @property
+    def value(self) -> Frac:
+        """ The current value, normalised (the accumulator is unaffected). """
+        if self.__reduced:
+            return Frac._trusted(self.__num, self.__den)
+        return Frac(self.__num, self.__den)
+
+    def add(self, value: Frac|int) -> None:
+        """ Adds the given value to the accumulator. """
+        if isinstance(value, int):
+            self.__num += value*self.__den
+            return
+        on, od = value.num_den_pair
+        num, den = self.__num, self.__den
+        # Divisions of large ints cost several multiplications:
+        # each path below runs a single one, the gcd.
+        g = gcd(den, od)
+        if g == od:
+            # Fast path: od divides the current lcm of denominators.
+            self.__num = num+on*(den//od)
+            self.__reduced = False
+            return
+        if g == 1:
+            # Coprime denominators: the sum stays reduced if self was.
+            self.__num = num*od+on*den
+            self.__den = den*od
+        elif self.__reduced:
+            # Both fractions are reduced: common factors of the sum can
+            # only be factors of g (as in Frac.__add__).
+            t = num*(od//g)+on*(den//g)
+            g2 = gcd(t, g)
+            self.__num = t//g2 if g2 != 1 else t
+            self.__den = den//g*(od//g2)
+            return
+        else:
+            self.__num = num*(od//g)+on*(den//g)
+            self.__den = den//g*od
+        if not self.__reduced and self.__den.bit_length() > self.__limit_bits:
+            self.__normalise()
+
+    def mul(self, value: Frac|int) -> None:
+        """ Multiplies the accumulator by the given value. """
+        self.__reduced = False
+        if isinstance(value, int):
+            self.__num *= value
+            return
+        on, od = value.num_den_pair
+        self.__num *= on
+        self.__den *= od
+        if self.__den.bit_length() > self.__limit_bits:
+            self.__normalise()
+
+    def add_all(self, values: Iterable[Frac|int]) -> None:
+        """ Adds all the given values to the accumulator. """
+        add = self.add # avoids attribute lookups in the loop
+        for value in values:
+            add(value)
+
+    def mul_all(self, values: Iterable[Frac|int]) -> None:
+        """ Multiplies the accumulator by all the given values. """
+        mul = self.mul
+        for value in values:
+            mul(value)
+
+    def __iadd__(self, value: Frac|int) -> FracAccumulator:
+        """ Implements acc += value """
+        self.add(value)
+        return self
+
+    def __imul__(self, value: Frac|int) -> FracAccumulator:
+        """ Implements acc *= value """
+        self.mul(value)
+        return self
+
+    def __normalise(self) -> None:
+        """ Divides out the common factors of numerator and denominator. """
+        g = gcd(self.__num, self.__den)
+        if g != 1:
+            self.__num //= g
+            self.__den //= g
+        self.__reduced = True
+        self.__limit_bits = max(
+            self.__normalise_bits, 2*self.__den.bit_length()
+        )
+
+    def __repr__(self) -> str:
+        return f"FracAccumulator({self.value!r})"
+
+Frac._build_shared()
+Frac.ZERO = Frac(0)
+Frac.ONE = Frac(1)
+Frac.PI = Frac._intern(Frac(22, 7))
@@ -0,0 +1,403 @@
+"""
+Runtime validation of values against type hints, such as ``tuple[int, str]``
+or ``dict[str, list[int | None]]``.
+
+Validating by hand, as in ``process_bad_pair`` from ``01-hello-world.py``,
+is fast but drifts from the annotations it duplicates. Walking annotations
+at runtime (with :func:`typing.get_origin` and :func:`typing.get_args`) is
+always up to date, but it pays the cost of inspecting the annotation again
+for every value, and for every item of every container.
+
+:func:`validator` does the inspection once: it generates the source of a
+function specialised to the annotation, with one ``isinstance`` check for
+each class in the annotation and one loop for each container, and caches
+it per annotation. Error messages are only formatted when a check fails,
+following the style of the hand-written checks: for a value passed as
+``pair``, e.g. ``"pair[1] must be str, found pair[1] = 2"``.
+
+The following annotations are supported:
+
+- classes (including generic classes without parameters, e.g. ``list``),
+  with ``int`` accepted for ``float`` and ``complex``, as by type checkers;
+- ``None``, :data:`typing.Any` and ``object`` (which accept anything);
+- unions, written ``X | Y`` or with :data:`typing.Union`/:data:`typing.Optional`;
+- ``tuple[X, Y, ...]`` (fixed length), ``tuple[X, ...]`` and ``tuple[()]``;
+- ``list[X]``, ``set[X]``, ``frozenset[X]``, ``dict[K, V]``, and
+  their abstract counterparts ``Sequence[X]``, ``AbstractSet[X]`` and
+  ``Mapping[K, V]`` from :mod:`collections.abc` or :mod:`typing`.
+"""
+
+from __future__ import annotations
+
+import collections.abc
+import reprlib
+import types
+import typing
+from collections.abc import Callable, Iterable
+from typing import Any, Final
+
+_SEQUENCES: Final[frozenset[Any]] = frozenset({
+    list, collections.abc.Sequence, collections.abc.MutableSequence,
+})
+""" Origins of sequence annotations, whose items are checked by index. """
+
+_SETS: Final[frozenset[Any]] = frozenset({
+    set, frozenset, collections.abc.Set, collections.abc.MutableSet,
+})
+""" Origins of set annotations, whose items have no index. """
+
+_MAPPINGS: Final[frozenset[Any]] = frozenset({
+    dict, collections.abc.Mapping, collections.abc.MutableMapping,
+})
+""" Origins of mapping annotations, whose keys and values are checked. """
+
+_NUMERIC_TOWER: Final[dict[type, tuple[type, ...]]] = {
+    float: (int, float),
+    complex: (int, float, complex),
+}
+""" Classes accepting other classes, as for type checkers (PEP 484). """
+
+_repr: Final[Callable[[object], str]] = reprlib.repr
+""" Abbreviated repr of the values in error messages, e.g. for long lists. """
+
+
+def _index(seq: Iterable[object], item: object) -> int:
+    """
+    The index of the item in the sequence, by identity. Loops in the
+    generated code don't keep track of indices: they are only looked up
+    when a check fails, to format the error message.
+    """
+    return next(i for i, x in enumerate(seq) if x is item)
+
+
+def _is_class(annotation: Any) -> bool:
+    """
+    Whether the annotation is a plain class. Parametrised builtins, such as
+    ``list[int]``, pass ``isinstance(annotation, type)`` but are not classes.
+    """
+    return isinstance(annotation, type) and not isinstance(annotation, types.GenericAlias)
+
+
+def _describe(annotation: Any) -> str:
+    """ The annotation, as written in code, e.g. ``"dict[str, int | None]"``. """
+    if annotation is None or annotation is types.NoneType:
+        return "None"
+    if annotation is Any:
+        return "Any"
+    if _is_class(annotation):
+        name: str = annotation.__qualname__
+        return name
+    args = typing.get_args(annotation)
+    if _is_union(annotation):
+        return " | ".join(_describe(arg) for arg in args)
+    origin = typing.get_origin(annotation)
+    if origin is not None and not hasattr(annotation, "__args__"):
+        return _describe(origin)
+    if origin is tuple and not args:
+        return "tuple[()]"
+    if origin is not None:
+        described = ", ".join("..." if arg is Ellipsis else _describe(arg) for arg in args)
+        return f"{_describe(origin)}[{described}]"
+    return repr(annotation)
+
+
+def _is_union(annotation: Any) -> bool:
+    """ Whether the annotation is a union, of either syntax. """
+    origin = typing.get_origin(annotation)
+    return origin is typing.Union or origin is types.UnionType
+
+
+def _classes(annotation: Any) -> tuple[type, ...] | None:
+    """
+    The classes accepted by the annotation, if it is checked with a single
+    ``isinstance`` call (a class, None, or a union of those), else None.
+    """
+    if annotation is None or annotation is types.NoneType:
+        return (types.NoneType,)
+    if _is_union(annotation):
+        classes: list[type] = []
+        for arg in typing.get_args(annotation):
+            arg_classes = _classes(arg)
+            if arg_classes is None:
+                return None
+            classes.extend(c for c in arg_classes if c not in classes)
+        return tuple(classes)
+    if _is_class(annotation):
+        cls: type = annotation
+        return _NUMERIC_TOWER.get(cls, (cls,))
+    origin = typing.get_origin(annotation)
+    if origin is not None and not hasattr(annotation, "__args__"):
+        # Unparametrised aliases, e.g. typing.List (unlike tuple[()]).
+        return _classes(origin)
+    return None
+
+
+class _CodeGen:
+    """
+    Generates the statements validating a value against an annotation.
+    Each value is held by a variable of the generated code, and its path
+    (e.g. ``pair[1]``) by an f-string fragment, only evaluated in the error
+    messages. Objects used by the code (classes, and the validators of union
+    members) are passed to it as constants, by name.
+    """
+
+    lines: list[str]
+    """ The generated statements. """
+
+    constants: dict[str, Any]
+    """ The objects referenced by the generated code, by name. """
+
+    __vars: int
+    """ The number of temporary variables generated so far. """
+
+    def __init__(self) -> None:
+        self.lines = []
+        self.constants = {"_index": _index, "_repr": _repr}
+        self.__vars = 0
+
+    def __var(self) -> str:
+        """ A new temporary variable. """
+        self.__vars += 1
+        return f"_v{self.__vars}"
+
+    def __const(self, value: Any) -> str:
+        """ The name of a constant for the given object (or an equal one). """
+        for name, existing in self.constants.items():
+            if existing is value or existing == value:
+                return name
+        name = f"_c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def __raise(self, indent: str, path: str, expected: str, found: str) -> None:
+        """
+        Raises TypeError, in the style of the hand-written validators:
+        ``"{path} must be {expected}, found {found}"``.
+        """
+        expected = expected.replace("{", "{{").replace("}", "}}")
+        self.lines.append(
+            f"{indent}    raise TypeError(f\"{path} must be {expected}, found {found}\")"
+        )
+
+    def __mismatch(self, annotation: Any, var: str, path: str, indent: str) -> None:
+        """ Raises TypeError for a value which doesn't match the annotation. """
+        self.__raise(indent, path, _describe(annotation), f"{path} = {{_repr({var})}}")
+
+    def check(self, annotation: Any, var: str, path: str, indent: str) -> None:
+        """
+        Generates the statements validating the value of the variable
+        against the annotation, at the given indentation. Raises TypeError
+        if the annotation is not supported.
+        """
+        lines = self.lines
+        if annotation is Any or annotation is object:
+            return
+        classes = _classes(annotation)
+        if classes is not None:
+            if classes == (types.NoneType,):
+                lines.append(f"{indent}if {var} is not None:")
+            else:
+                # isinstance() is fastest with a single class.
+                arg = classes[0] if len(classes) == 1 else classes
+                lines.append(f"{indent}if not isinstance({var}, {self.__const(arg)}):")
+            self.__mismatch(annotation, var, path, indent)
+            return
+        if _is_union(annotation):
+            self.__union(annotation, var, path, indent)
+            return
+        origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+        if origin is tuple:
+            self.__tuple(annotation, args, var, path, indent)
+            return
+        if origin in _SEQUENCES or origin in _SETS or origin in _MAPPINGS:
+            self.__collection(annotation, origin, args, var, path, indent)
+            return
+        raise TypeError(f"Unsupported annotation, found {annotation = }")
+
+    def __union(self, annotation: Any, var: str, path: str, indent: str) -> None:
+        """
+        Unions with generic members: classes are checked first, with a single
+        ``isinstance`` call, then each generic member with its own validator,
+        until one of them accepts the value.
+        """
+        classes: list[type] = []
+        generics: list[Any] = []
+        for arg in typing.get_args(annotation):
+            if arg is Any or arg is object:
+                return
+            arg_classes = _classes(arg)
+            if arg_classes is None:
+                generics.append(arg)
+            else:
+                classes.extend(arg_classes)
+        test = " or ".join(
+            f"{self.__const(validator(arg).is_valid)}({var})" for arg in generics
+        )
+        if classes:
+            test = f"isinstance({var}, {self.__const(tuple(classes))}) or {test}"
+        self.lines.append(f"{indent}if not ({test}):")
+        self.__mismatch(annotation, var, path, indent)
+
+    def __tuple(
+        self, annotation: Any, args: tuple[Any, ...], var: str, path: str, indent: str
+    ) -> None:
+        """ Fixed-length tuples are destructured, variable-length ones looped over. """
+        lines = self.lines
+        lines.append(f"{indent}if not isinstance({var}, tuple):")
+        self.__mismatch(annotation, var, path, indent)
+        if len(args) == 2 and args[1] is Ellipsis:
+            self.__items(args[0], var, f"{path}[{{_index({var}, {{item}})}}]", indent)
+            return
+        if args == ((),): # tuple[()] on Python < 3.11
+            args = ()
+        lines.append(f"{indent}if len({var}) != {len(args)}:")
+        self.__raise(
+            indent, path, f"a tuple of length {len(args)}", f"len({path}) = {{len({var})}}"
+        )
+        if not args:
+            return
+        items = [self.__var() for _ in args]
+        lines.append(f"{indent}{', '.join(items)}, = {var}")
+        for i, (arg, item) in enumerate(zip(args, items)):
+            self.check(arg, item, f"{path}[{i}]", indent)
+
+    def __collection(
+        self, annotation: Any, origin: Any, args: tuple[Any, ...],
+        var: str, path: str, indent: str
+    ) -> None:
+        """ Lists, sets, dicts and their abstract counterparts. """
+        lines = self.lines
+        lines.append(f"{indent}if not isinstance({var}, {self.__const(origin)}):")
+        self.__mismatch(annotation, var, path, indent)
+        if origin in _SEQUENCES:
+            self.__items(args[0], var, f"{path}[{{_index({var}, {{item}})}}]", indent)
+        elif origin in _SETS:
+            self.__items(args[0], var, f"item of {path}", indent)
+        else:
+            key_type, value_type = args
+            if key_type in (Any, object):
+                self.__items(value_type, f"{var}.values()", f"{path}[...]", indent)
+                return
+            key, value = self.__var(), self.__var()
+            inner = indent+"    "
+            lines.append(f"{indent}for {key}, {value} in {var}.items():")
+            start = len(lines)
+            self.check(key_type, key, f"key of {path}", inner)
+            self.check(value_type, value, f"{path}[{{_repr({key})}}]", inner)
+            if len(lines) == start:
+                lines.append(f"{inner}pass")
+
+    def __items(self, annotation: Any, iterable: str, path: str, indent: str) -> None:
+        """
+        Loops over the items of a container, unless anything is accepted.
+        The ``{item}`` placeholder in the path is replaced by the loop variable.
+        """
+        if annotation is Any or annotation is object:
+            return
+        item = self.__var()
+        self.lines.append(f"{indent}for {item} in {iterable}:")
+        self.check(annotation, item, path.replace("{item}", item), indent+"    ")
+
+
+class Validator:
+    """
+    A validator compiled by :func:`validator`: call it on a value to check
+    it against the annotation, raising TypeError if it doesn't match.
+    """
+
+    __annotation: Any
+    """ The annotation validated against. """
+
+    __source: str
+    """ The generated code. """
+
+    __validate: Callable[[object, str], None]
+    """ The generated function, validating a single value. """
+
+    __validate_all: Callable[[Iterable[object], str], None]
+    """ The generated function, validating each value of an iterable. """
+
+    def __init__(self, annotation: Any) -> None:
+        self.__annotation = annotation
+        gen = _CodeGen()
+        gen.check(annotation, "value", "{_name}", "    ")
+        body = gen.lines or ["    pass"]
+        gen.lines = []
+        gen.check(annotation, "value", "{_name}[{_i}]", "        ")
+        lines = [
+            "def _validate(value, _name):",
+            *body,
+            "def _validate_all(values, _name):",
+            "    for _i, value in enumerate(values):",
+            *(gen.lines or ["        pass"]),
+        ]
+        self.__source = "\n".join(lines)+"\n"
+        namespace = dict(gen.constants)
+        code = compile(self.__source, f"<validator {_describe(annotation)}>", "exec")
+        exec(code, namespace)
+        self.__validate = namespace["_validate"]
+        self.__validate_all = namespace["_validate_all"]
+
+    @property
+    def annotation(self) -> Any:
+        """ The annotation validated against. """
+        return self.__annotation
+
+    @property
+    def source(self) -> str:
+        """ The generated Python code. """
+        return self.__source
+
+    def __call__(self, value: object, name: str = "value") -> None:
+        """
+        Checks the value against the annotation, raising TypeError if it
+        doesn't match. The name of the value is used in error messages.
+        """
+        self.__validate(value, name)
+
+    def validate_all(self, values: Iterable[object], name: str = "values") -> None:
+        """
+        Checks each value against the annotation, e.g. for a batch of
+        records, raising TypeError for the first value which doesn't match.
+        Faster than calling the validator on each value.
+        """
+        self.__validate_all(values, name)
+
+    def is_valid(self, value: object) -> bool:
+        """ Whether the value matches the annotation. """
+        try:
+            self.__validate(value, "value")
+        except TypeError:
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"validator({_describe(self.__annotation)})"
+
+
+_validators: dict[Any, Validator] = {}
+""" Cache of the validators compiled so far, by annotation. """
+
+
+def validator(annotation: Any) -> Validator:
+    """
+    The validator for the given annotation, e.g. ``validator(tuple[int, str])``,
+    compiled on first use and cached. Raises TypeError if the annotation
+    (or any annotation nested in it) is not supported.
+    """
+    try:
+        return _validators[annotation]
+    except KeyError:
+        pass
+    compiled = Validator(annotation)
+    _validators[annotation] = compiled
+    return compiled
+
+
+def validate(value: object, annotation: Any, name: str = "value") -> None:
+    """
+    Checks the value against the annotation, with a cached validator:
+    ``validate(pair, tuple[int, str], "pair")`` raises TypeError unless
+    ``pair`` is a tuple of an int and a str.
+    """
+    validator(annotation)(value, name)
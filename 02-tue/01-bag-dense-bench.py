@@ -0,0 +1,46 @@
+"""
+Script to benchmark dense bags against hash-counted bags,
+on random small ints (e.g. bucket ids or category codes).
+
+Usage: python 01-bag-dense-bench.py [exponents, default 6 7 8]
+(each exponent k benchmarks bags of 10**k items)
+"""
+
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from more_collections import Bag
+from more_collections.dense_bags import DenseBag
+
+UNIVERSE_SIZE = 1_000
+
+def timed(f: Callable[[], Any]) -> tuple[Any, float]:
+    """ Returns the result of f() and the time it took, in seconds. """
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter()-start
+
+exponents = [int(arg) for arg in sys.argv[1:]] or [6, 7, 8]
+rng = np.random.default_rng(0)
+print(f"{'items':>12} {'op':>8} {'Bag':>10} {'DenseBag':>10}")
+for k in exponents:
+    n = 10**k
+    xs = rng.integers(0, UNIVERSE_SIZE, size=n)
+    ys = rng.integers(0, UNIVERSE_SIZE, size=n)
+    xs_list, ys_list = xs.tolist(), ys.tolist()
+    bag_x, t_bag = timed(lambda: Bag(xs_list))
+    bag_y = Bag(ys_list)
+    dense_x, t_dense = timed(lambda: Bag.dense(UNIVERSE_SIZE, xs))
+    dense_y = Bag.dense(UNIVERSE_SIZE, ys)
+    assert dense_x == bag_x
+    print(f"{n:>12_} {'build':>8} {t_bag:9.4f}s {t_dense:9.4f}s")
+    for name, op in [("|", "__or__"), ("&", "__and__"),
+                     ("+", "__add__"), ("-", "__sub__")]:
+        _, t_bag = timed(lambda: getattr(bag_x, op)(bag_y))
+        _, t_dense = timed(lambda: getattr(dense_x, op)(dense_y))
+        print(f"{n:>12_} {name:>8} {t_bag:9.4f}s {t_dense:9.4f}s")
+    del xs_list, ys_list
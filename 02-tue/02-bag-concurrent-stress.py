@@ -0,0 +1,58 @@
+"""
+Stress test for :class:`ConcurrentBag`: many threads add items at once,
+and the totals are checked at the end. Also prints the throughput for
+an increasing number of threads: on builds with the GIL, this is expected
+to stay flat; on free-threaded builds, it should scale with threads.
+
+Usage: python 02-bag-concurrent-stress.py [items per thread, default 200_000]
+"""
+
+import sys
+import threading
+import time
+
+from more_collections.concurrent_bags import ConcurrentBag
+
+ITEMS_PER_THREAD = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+BATCH_SIZE = 1_000
+NUM_KEYS = 10_000
+
+def worker(bag: ConcurrentBag[int], seed: int) -> None:
+    """ Adds ITEMS_PER_THREAD items, mostly in batches, some one by one. """
+    batch: list[int] = []
+    for i in range(ITEMS_PER_THREAD):
+        item = (seed*7919+i) % NUM_KEYS
+        if i % 10 == 0:
+            bag.add(item)
+            continue
+        batch.append(item)
+        if len(batch) == BATCH_SIZE:
+            bag.add_many(batch)
+            batch = []
+    bag.add_many(batch)
+
+gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+print(f"{sys.version = }")
+print(f"{gil_enabled = }")
+for num_threads in (1, 2, 4, 8):
+    bag: ConcurrentBag[int] = ConcurrentBag()
+    threads = [
+        threading.Thread(target=worker, args=(bag, seed))
+        for seed in range(num_threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter()-start
+    # Check the totals against a single-threaded count.
+    expected = [0]*NUM_KEYS
+    for seed in range(num_threads):
+        for i in range(ITEMS_PER_THREAD):
+            expected[(seed*7919+i) % NUM_KEYS] += 1
+    snapshot = bag.snapshot()
+    assert len(bag) == len(snapshot) == num_threads*ITEMS_PER_THREAD
+    assert all(snapshot.count(k) == c for k, c in enumerate(expected))
+    throughput = num_threads*ITEMS_PER_THREAD/elapsed
+    print(f"{num_threads = }: {throughput:>12_.0f} items/s, totals OK")
@@ -0,0 +1,48 @@
+"""
+Script to benchmark :meth:`Bag.from_iterable_parallel` against
+the single-process :class:`Bag` constructor, for an increasing number
+of worker processes, on a list of ints and on a memory-mapped array.
+
+Usage: python 03-bag-parallel-bench.py [number of items, default 10**8]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from more_collections import Bag
+
+def main() -> None:
+    # The guard below is required: worker processes import this module.
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10**8
+    values = np.random.default_rng(0).integers(0, 100_000, size=n)
+    print(f"{n = :_}, {os.cpu_count() = }")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "values.bin")
+        values.tofile(path)
+        mapped = np.memmap(path, dtype=values.dtype, mode="r")
+        items = values.tolist()
+
+        start = time.perf_counter()
+        expected = Bag(items)
+        baseline = time.perf_counter()-start
+        print(f"{'single process':>20}: {baseline:8.2f}s")
+
+        for workers in (1, 2, 4, 8):
+            for name, source in (("list", items), ("memmap", mapped)):
+                start = time.perf_counter()
+                bag = Bag.from_iterable_parallel(source, workers=workers)
+                elapsed = time.perf_counter()-start
+                assert bag == expected
+                print(
+                    f"{name:>8} {workers = }: {elapsed:8.2f}s "
+                    f"(speedup {baseline/elapsed:5.2f}x)"
+                )
+        del mapped
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Script to benchmark snapshots of bags: copying a :class:`Bag` after each
+update, against deriving a new :class:`FrozenBag` (which shares most of
+its structure with the previous one). Also times equality checks between
+snapshots, which frozen bags short-circuit using their cached hashes.
+
+Usage: python 04-bag-frozen-bench.py [exponents, default 3 4 5]
+(each exponent k benchmarks bags of 10**k distinct items)
+"""
+
+import random
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+from more_collections import Bag, FrozenBag
+
+NUM_UPDATES = 100
+""" Number of snapshots taken (all kept in memory, as for an undo history). """
+
+def timed(f: Callable[[], Any]) -> tuple[Any, float]:
+    """ Returns the result of f() and the time it took, in seconds. """
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter()-start
+
+def bag_snapshots(
+    bag: Bag[int], updates: list[tuple[int, int]]
+) -> list[Bag[int]]:
+    snapshots = []
+    for added, removed in updates:
+        bag.add(added)
+        bag.discard(removed)
+        snapshots.append(bag.copy())
+    return snapshots
+
+def frozen_snapshots(
+    bag: FrozenBag[int], updates: list[tuple[int, int]]
+) -> list[FrozenBag[int]]:
+    snapshots = []
+    for added, removed in updates:
+        bag = bag.with_added(added)
+        bag = bag.with_count(removed, max(bag.count(removed)-1, 0))
+        snapshots.append(bag)
+    return snapshots
+
+exponents = [int(arg) for arg in sys.argv[1:]] or [3, 4, 5]
+rng = random.Random(0)
+print(f"{'distinct':>12} {'op':>10} {'Bag':>10} {'FrozenBag':>10}")
+for k in exponents:
+    n = 10**k
+    items = [rng.randrange(n) for _ in range(2*n)]
+    # Each update moves a copy of an item, so sizes rarely tell bags apart.
+    updates = [(rng.randrange(n), rng.choice(items)) for _ in range(NUM_UPDATES)]
+    bag, t_bag = timed(lambda: Bag(items))
+    frozen, t_frozen = timed(lambda: FrozenBag(items))
+    print(f"{n:>12_} {'build':>10} {t_bag:9.4f}s {t_frozen:9.4f}s")
+    # Frozen bags first: the memory used by the bag copies slows down
+    # everything which runs after them (e.g. through garbage collection).
+    frozens, t_frozen = timed(lambda: frozen_snapshots(frozen, updates))
+    bags, t_bag = timed(lambda: bag_snapshots(bag, updates))
+    assert bags[-1] == frozens[-1]
+    per_bag, per_frozen = t_bag/NUM_UPDATES*1e6, t_frozen/NUM_UPDATES*1e6
+    print(f"{n:>12_} {'snapshot':>10} {per_bag:8.1f}us {per_frozen:8.1f}us")
+    eq_bags = lambda: sum(x == y for x, y in zip(bags, bags[1:]))
+    eq_frozens = lambda: sum(x == y for x, y in zip(frozens, frozens[1:]))
+    (equal_bags, t_bag), (equal_frozens, t_frozen) = timed(eq_bags), timed(eq_frozens)
+    assert equal_bags == equal_frozens
+    per_bag, per_frozen = t_bag/NUM_UPDATES*1e6, t_frozen/NUM_UPDATES*1e6
+    print(f"{n:>12_} {'unequal':>10} {per_bag:8.1f}us {per_frozen:8.1f}us")
+    # Equal bags built separately share no structure, and are compared in full.
+    rebuilt, rebuilt_frozen = bags[-1].copy(), FrozenBag.from_bag(bags[-1])
+    _, t_bag = timed(lambda: rebuilt == bags[-1])
+    _, t_frozen = timed(lambda: rebuilt_frozen == frozens[-1])
+    print(f"{n:>12_} {'equal':>10} {t_bag*1e6:8.1f}us {t_frozen*1e6:8.1f}us")
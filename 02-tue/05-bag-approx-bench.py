@@ -0,0 +1,76 @@
+"""
+Script to check and benchmark approximate bags against exact ones, on
+Zipf-distributed items (a few very frequent items, and a long tail of
+rare ones, as for most real-world event streams).
+
+The items are fed in batches, both to a single approximate bag and to
+approximate bags for 4 shards which are then merged. The error bounds
+are checked against the exact counts, for all items, and the script
+prints the throughput and the accuracy of the top items.
+
+Usage: python 05-bag-approx-bench.py [exponents, default 6 7]
+(each exponent k benchmarks streams of 10**k items)
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from more_collections import Bag
+from more_collections.approx_bags import ApproxBag
+
+ZIPF_EXPONENT = 1.2
+BATCH_SIZE = 10_000
+NUM_SHARDS = 4
+TOP = 20
+CAPACITIES = (100, 1_000, 10_000)
+
+def check(approx: ApproxBag[int], exact: Bag[int]) -> None:
+    """ Checks the guarantees of the approximate bag against exact counts. """
+    assert len(approx) == len(exact)
+    assert approx.num_counted <= approx.capacity
+    error_bound = approx.error_bound
+    counted = dict(approx.most_common())
+    for item, count in exact.counts():
+        low, high = approx.count_bounds(item)
+        assert low <= count <= high <= count+error_bound
+        assert count <= error_bound or item in counted
+
+exponents = [int(arg) for arg in sys.argv[1:]] or [6, 7]
+rng = np.random.default_rng(0)
+print(f"{'items':>12} {'capacity':>9} {'items/s':>12} {'error bound':>12} "
+      f"{'top-k found':>12} {'top-k error':>12}")
+for k in exponents:
+    n = 10**k
+    items = rng.zipf(ZIPF_EXPONENT, size=n).tolist()
+    batches = [items[i:i+BATCH_SIZE] for i in range(0, n, BATCH_SIZE)]
+    start = time.perf_counter()
+    exact: Bag[int] = Bag()
+    for batch in batches:
+        exact.update(batch)
+    elapsed = time.perf_counter()-start
+    print(f"{n:>12_} {'exact':>9} {n/elapsed:>12_.0f} "
+          f"{exact.num_distinct:>12_} distinct items")
+    top = sorted(exact.counts(), key=lambda pair: pair[1], reverse=True)[:TOP]
+    for capacity in CAPACITIES:
+        start = time.perf_counter()
+        approx: ApproxBag[int] = Bag.approximate(capacity)
+        for batch in batches:
+            approx.update(batch)
+        elapsed = time.perf_counter()-start
+        check(approx, exact)
+        shards: list[ApproxBag[int]] = [
+            Bag.approximate(capacity) for _ in range(NUM_SHARDS)
+        ]
+        for i, batch in enumerate(batches):
+            shards[i % NUM_SHARDS].update(batch)
+        merged = shards[0]
+        for shard in shards[1:]:
+            merged = merged+shard
+        check(merged, exact)
+        found = {item for item, _ in approx.most_common(TOP)}
+        recall = sum(item in found for item, _ in top)/len(top)
+        max_error = max((approx.count(item)-count)/count for item, count in top)
+        print(f"{n:>12_} {capacity:>9_} {n/elapsed:>12_.0f} "
+              f"{approx.error_bound:>12_} {recall:>12.0%} {max_error:>12.2%}")
@@ -0,0 +1,69 @@
+"""
+Script to benchmark disk bags against (in-memory) hash-counted bags, on
+random string keys: building the bag in batches, random increments one
+at a time and in batches, reopening the bag, and exporting it to a Bag.
+
+Usage: python 06-bag-disk-bench.py [exponents, default 5 6]
+(each exponent k benchmarks bags of ~10**k distinct items)
+"""
+
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+from more_collections import Bag
+from more_collections.disk_bags import DiskBag
+
+BATCH_SIZE = 100_000
+NUM_INCREMENTS = 100_000
+
+def timed(f: Callable[[], Any]) -> tuple[Any, float]:
+    """ Returns the result of f() and the time it took, in seconds. """
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter()-start
+
+def build_bag(keys: list[str]) -> Bag[str]:
+    bag: Bag[str] = Bag()
+    for start in range(0, len(keys), BATCH_SIZE):
+        bag.update(keys[start:start+BATCH_SIZE])
+    return bag
+
+def build_disk(keys: list[str], path: str) -> DiskBag:
+    disk = DiskBag(path)
+    for start in range(0, len(keys), BATCH_SIZE):
+        disk.update(keys[start:start+BATCH_SIZE])
+    return disk
+
+def add_one_by_one(bag: Bag[str] | DiskBag, keys: list[str]) -> None:
+    for key in keys:
+        bag.add(key)
+
+exponents = [int(arg) for arg in sys.argv[1:]] or [5, 6]
+rng = random.Random(0)
+print(f"{'items':>12} {'op':>12} {'Bag':>10} {'DiskBag':>10}")
+for k in exponents:
+    n = 10**k
+    keys = [f"user:{rng.randrange(n)}" for _ in range(2*n)]
+    increments = rng.choices(keys, k=NUM_INCREMENTS)
+    with tempfile.TemporaryDirectory() as tmp:
+        bag, t_bag = timed(lambda: build_bag(keys))
+        disk, t_disk = timed(lambda: build_disk(keys, tmp))
+        print(f"{n:>12_} {'build':>12} {t_bag:9.3f}s {t_disk:9.3f}s")
+        _, t_bag = timed(lambda: add_one_by_one(bag, increments))
+        _, t_disk = timed(lambda: add_one_by_one(disk, increments))
+        print(f"{n:>12_} {'add':>12} {t_bag:9.3f}s {t_disk:9.3f}s")
+        _, t_bag = timed(lambda: bag.update(increments))
+        _, t_disk = timed(lambda: disk.update(increments))
+        print(f"{n:>12_} {'update':>12} {t_bag:9.3f}s {t_disk:9.3f}s")
+        disk.close()
+        disk, t_disk = timed(lambda: DiskBag(tmp))
+        assert len(disk) == len(bag) and disk.num_distinct == bag.num_distinct
+        print(f"{n:>12_} {'reopen':>12} {'':>10} {t_disk:9.3f}s")
+        exported, t_disk = timed(disk.to_bag)
+        assert exported == bag
+        print(f"{n:>12_} {'to_bag':>12} {'':>10} {t_disk:9.3f}s")
+        disk.close()
@@ -1,3 +1,6 @@
 from __future__ import annotations
 
-from.bags_local import Bag
\ No newline at end of file
+from.bags_local import Bag
+from .frozen_bags import FrozenBag
+
+__all__ = ["Bag", "FrozenBag"]
@@ -0,0 +1,275 @@
+"""
+An approximate variant of :class:`Bag`, for unbounded streams of items with
+too many distinct items to count them all: it uses a constant amount of
+memory, and counts the most frequent items (the "heavy hitters") with
+guaranteed error bounds.
+
+Counts are kept with the Space-Saving algorithm (Metwally et al., 2005):
+at most ``capacity`` items are counted at any time. When a new item arrives
+and all counters are taken, the item with the smallest count is evicted, and
+the new item takes over its counter: its count is an overestimate, by at
+most the evicted count (recorded as the error of the new item's count).
+Batches of items are counted exactly first, then merged into the counts all
+at once, keeping the items with the highest counts: this is faster than
+adding items one by one, and rare items in a batch evict fewer counts.
+
+For a single stream of n items, no count is overestimated by more than
+n/capacity, and every item occurring more than n/capacity times is counted.
+Approximate bags of separate streams (e.g. shards) can be merged, with error
+bounds adding up (Cafaro et al., 2016).
+"""
+
+from __future__ import annotations
+import heapq
+from collections import Counter
+from collections.abc import Iterable
+from operator import itemgetter
+from typing import Generic
+
+from .bags_local import ItemT
+
+class ApproxBag(Generic[ItemT]):
+    """
+    A bag which only counts (approximately) its most frequent items,
+    using memory proportional to its capacity.
+
+    Estimated counts are upper bounds of the exact counts: see
+    :meth:`count_bounds` for lower bounds, and :attr:`error_bound`
+    for the largest possible overestimate.
+    """
+
+    __capacity: int
+    """ The maximum number of items counted at a time. """
+
+    __counts: dict[ItemT, int]
+    """ The estimated multiplicity of each counted item (an upper bound). """
+
+    __errors: dict[ItemT, int]
+    """ The maximum overestimate of each count (absent if zero). """
+
+    __heap: list[tuple[int, int, ItemT]]
+    """
+    Min-heap of (count, sequence number, item) entries, one per counted item,
+    used to find the item with the smallest count. Counts in the heap are
+    updated lazily: an entry's count may be lower than the item's count (but
+    never higher), and is refreshed when it reaches the top of the heap.
+    The sequence numbers break ties, so that items are never compared.
+    """
+
+    __seq: int
+    """ The next sequence number for entries in the heap. """
+
+    __floor: int
+    """ An upper bound for the multiplicity of any item not counted. """
+
+    __len: int
+    """ Total number of items added to the bag (exact). """
+
+    def __init__(self, capacity: int, items: Iterable[ItemT] = ()) -> None:
+        if capacity <= 0:
+            raise ValueError(f"Expected positive, found {capacity = }")
+        self.__capacity = capacity
+        self.__counts = {}
+        self.__errors = {}
+        self.__heap = []
+        self.__seq = 0
+        self.__floor = 0
+        self.__len = 0
+        self.update(items)
+
+    @property
+    def capacity(self) -> int:
+        """ The maximum number of items counted at a time. """
+        return self.__capacity
+
+    @property
+    def error_bound(self) -> int:
+        """
+        The largest possible overestimate of the counts, which is also an
+        upper bound for the multiplicity of any item which is not counted.
+        For a single stream, it is at most ``len(self)/capacity``.
+        """
+        return self.__floor
+
+    @property
+    def num_counted(self) -> int:
+        """ The number of items currently counted (at most the capacity). """
+        return len(self.__counts)
+
+    def count(self, item: ItemT) -> int:
+        """
+        The estimated multiplicity of the item in the bag: an upper bound,
+        exceeding the exact multiplicity by at most :attr:`error_bound`.
+        """
+        return self.__counts.get(item, self.__floor)
+
+    def count_bounds(self, item: ItemT) -> tuple[int, int]:
+        """ Lower and upper bounds for the multiplicity of the item. """
+        count = self.__counts.get(item)
+        if count is None:
+            return 0, self.__floor
+        return count-self.__errors.get(item, 0), count
+
+    def add(self, item: ItemT, multiplicity: int = 1) -> None:
+        """ Adds the item to the bag, with the given multiplicity. """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        if multiplicity:
+            self.__add(item, multiplicity)
+            self.__len += multiplicity
+
+    def update(self, items: Iterable[ItemT]) -> None:
+        """
+        Adds all the given items to the bag. The items are first counted
+        exactly (in C), then the counts are merged into the bag all at once,
+        which is faster and more accurate than adding items one at a time.
+        For unbounded iterables, pass batches of items instead.
+        """
+        added = Counter(iter(items)) # keys of mappings, not counts
+        counts, floor = self.__counts, self.__floor
+        new: list[tuple[ItemT, int, int]] = []
+        for item, count in added.items():
+            if item in counts:
+                counts[item] += count
+            else:
+                new.append((item, floor+count, floor))
+        self.__len += added.total()
+        if len(new) >= self.__capacity:
+            # Cheaper to select the items to keep from scratch.
+            errors = self.__errors
+            merged = [(item, count, errors.get(item, 0)) for item, count in counts.items()]
+            self.__prune(merged+new, floor)
+            return
+        # Drop the items with the smallest counts, old or new, to make room.
+        new.sort(key=itemgetter(1))
+        start = 0
+        for _ in range(len(counts)+len(new)-self.__capacity):
+            if start < len(new) and (not counts or new[start][1] <= self.__peek_min()[0]):
+                floor = max(floor, new[start][1])
+                start += 1
+            else:
+                floor = max(floor, self.__evict())
+        self.__floor = floor
+        for item, count, error in new[start:]:
+            self.__insert(item, count, error)
+
+    def __insert(self, item: ItemT, count: int, error: int) -> None:
+        """ Starts counting an item, presuming that there is room for it. """
+        self.__counts[item] = count
+        if error:
+            self.__errors[item] = error
+        heapq.heappush(self.__heap, (count, self.__seq, item))
+        self.__seq += 1
+
+    def __prune(self, merged: list[tuple[ItemT, int, int]], floor: int) -> None:
+        """
+        Replaces the counts with the given (item, count, error) triples,
+        keeping only the items with the highest counts. The multiplicity of
+        items not in the triples must be at most the floor, and at most the
+        count of any item in the triples.
+        """
+        capacity = self.__capacity
+        if len(merged) > capacity:
+            merged.sort(key=itemgetter(1), reverse=True)
+            floor = max(floor, merged[capacity][1])
+            del merged[capacity:]
+        self.__floor = floor
+        self.__counts = {item: count for item, count, _ in merged}
+        self.__errors = {item: error for item, _, error in merged if error}
+        self.__heap = [(count, seq, item) for seq, (item, count, _) in enumerate(merged)]
+        heapq.heapify(self.__heap)
+        self.__seq = len(merged)
+
+    def __add(self, item: ItemT, multiplicity: int) -> None:
+        """ Counts the item, evicting the item with the smallest count if needed. """
+        counts = self.__counts
+        if item in counts:
+            counts[item] += multiplicity
+            return
+        if len(counts) >= self.__capacity:
+            self.__floor = max(self.__floor, self.__evict())
+        # The item may have been counted (and evicted) before: its
+        # multiplicity so far is at most the floor.
+        self.__insert(item, self.__floor+multiplicity, self.__floor)
+
+    def __peek_min(self) -> tuple[int, int, ItemT]:
+        """ The heap entry of the item with the smallest count. """
+        heap, counts = self.__heap, self.__counts
+        while True:
+            count, _, item = heap[0]
+            current = counts[item]
+            if count == current:
+                return heap[0]
+            heapq.heapreplace(heap, (current, self.__seq, item))
+            self.__seq += 1
+
+    def __evict(self) -> int:
+        """ Stops counting the item with the smallest count, returning its count. """
+        _, _, item = self.__peek_min()
+        heapq.heappop(self.__heap)
+        self.__errors.pop(item, None)
+        return self.__counts.pop(item)
+
+    def most_common(self, n: int | None = None) -> list[tuple[ItemT, int]]:
+        """
+        The n counted items with the highest estimated counts (all of them
+        if n is None), with their estimated counts, most frequent first.
+        Every item with multiplicity above :attr:`error_bound` is counted.
+        """
+        if n is None:
+            return sorted(self.__counts.items(), key=itemgetter(1), reverse=True)
+        return heapq.nlargest(n, self.__counts.items(), key=itemgetter(1))
+
+    def copy(self) -> ApproxBag[ItemT]:
+        """ A copy of the approximate bag. """
+        bag: ApproxBag[ItemT] = ApproxBag(self.__capacity)
+        bag.__counts = self.__counts.copy()
+        bag.__errors = self.__errors.copy()
+        bag.__heap = self.__heap.copy()
+        bag.__seq = self.__seq
+        bag.__floor = self.__floor
+        bag.__len = self.__len
+        return bag
+
+    # Special methods
+
+    def __len__(self) -> int:
+        """ The total number of items added to the bag, with repetition. """
+        return self.__len
+
+    def __add__(self, other: ApproxBag[ItemT]) -> ApproxBag[ItemT]:
+        """
+        Merges two approximate bags with the same capacity (e.g. counting
+        shards of the same stream), approximating the sum of the bags.
+        Items counted in only one of the bags are presumed to occur as much
+        as possible in the other one, and only the items with the highest
+        counts are kept: the error bounds of the two bags add up.
+        """
+        if not isinstance(other, ApproxBag):
+            return NotImplemented
+        if self.__capacity != other.__capacity:
+            raise ValueError(
+                f"Capacity mismatch, found {self.__capacity} and {other.__capacity}"
+            )
+        floors = self.__floor, other.__floor
+        merged: list[tuple[ItemT, int, int]] = []
+        for item in self.__counts.keys() | other.__counts.keys():
+            count, error = 0, 0
+            for source, floor in zip((self, other), floors):
+                if item in source.__counts:
+                    count += source.__counts[item]
+                    error += source.__errors.get(item, 0)
+                else:
+                    count += floor
+                    error += floor
+            merged.append((item, count, error))
+        bag: ApproxBag[ItemT] = ApproxBag(self.__capacity)
+        bag.__prune(merged, sum(floors))
+        bag.__len = self.__len+other.__len
+        return bag
+
+    def __repr__(self) -> str:
+        return (
+            f"<ApproxBag capacity={self.__capacity}, len={self.__len}, "
+            f"error_bound={self.__floor}>"
+        )
@@ -1,6 +1,12 @@
 from __future__ import annotations
-from collections.abc import Iterable
-from typing import Generic, Iterable, TypeVar
+import os
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from .approx_bags import ApproxBag
+    from .dense_bags import DenseBag
 
 ItemT = TypeVar("ItemT") #Type variable for items of bag
 #be carefull you are importing from typing
@@ -9,8 +15,243 @@ ItemT = TypeVar("ItemT") #Type variable for items of bag
 
 class Bag(Generic[ItemT]):
     """
+    A bag (aka multiset): an unordered collection with repetition.
+
+    Items are stored together with their multiplicity (hash-counted),
+    so that counting, adding and removing items take constant time,
+    and operations between bags take time proportional to the number
+    of distinct items, rather than to the total number of items.
     """
-    def __init__(self, items: Iterable[ItemT]) -> None: 
+
+    @staticmethod
+    def from_counts(counts: Mapping[ItemT, int]) -> Bag[ItemT]:
+        """
+        Alternative constructor, building a bag from a mapping of items
+        to their (non-negative) multiplicities.
+        """
+        bag: Bag[ItemT] = Bag()
+        for item, count in counts.items():
+            bag.add(item, count)
+        return bag
+
+    @staticmethod
+    def dense(
+        universe_size: int, items: Iterable[int] = ()
+    ) -> DenseBag:
+        """
+        Alternative constructor, building a dense bag for ints in
+        range(universe_size), which stores counts in a NumPy array.
+        """
+        # Imported here, so that NumPy is only required for dense bags.
+        from .dense_bags import DenseBag
+        return DenseBag(universe_size, items)
+
+    @staticmethod
+    def approximate(
+        capacity: int, items: Iterable[ItemT] = ()
+    ) -> ApproxBag[ItemT]:
+        """
+        Alternative constructor, building an approximate bag which only
+        counts (up to) capacity items at a time, the most frequent ones,
+        with guaranteed error bounds.
+        See :class:`more_collections.approx_bags.ApproxBag`.
+        """
+        from .approx_bags import ApproxBag
+        return ApproxBag(capacity, items)
+
+    @staticmethod
+    def from_iterable_parallel(
+        items: Iterable[ItemT] | os.PathLike[str],
+        workers: int | None = None,
+        chunk_size: int | None = None
+    ) -> Bag[Any]:
+        """
+        Alternative constructor, counting chunks of the items in a pool
+        of worker processes. The items can also be a path to a text file
+        (an os.PathLike, whose lines are counted) or a (memory-mapped)
+        NumPy array. The chunk size is a number of items, or of bytes
+        for files.
+        See :func:`more_collections.parallel_bags.from_iterable_parallel`.
+        """
+        from .parallel_bags import from_iterable_parallel
+        return from_iterable_parallel(items, workers, chunk_size)
+
+    __counts: Counter[ItemT]
+    """ Multiplicity of each item in the bag (only positive ones stored). """
+
+    __len: int
+    """ Total number of items in the bag, kept up to date incrementally. """
+
+    def __init__(self, items: Iterable[ItemT] = ()) -> None:
         #Advantage of ItemT over Any is to ensure all elements are the same type
         #ItemT is stored in mypy, not available at runtime
-        raise NotImplementedError()
\ No newline at end of file
+        # Counter counts an iterable in C, without per-item Python calls.
+        # The iterator hides mappings, which Counter would take as counts:
+        # counts can only be passed to Bag.from_counts (which checks them).
+        self.__counts = Counter(iter(items))
+        self.__len = sum(self.__counts.values())
+
+    def count(self, item: ItemT) -> int:
+        """ The multiplicity of the item in the bag (0 if not present). """
+        return self.__counts[item]
+
+    def add(self, item: ItemT, multiplicity: int = 1) -> None:
+        """ Adds the item to the bag, with the given multiplicity. """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        if multiplicity:
+            self.__counts[item] += multiplicity
+            self.__len += multiplicity
+
+    def update(self, items: Iterable[ItemT]) -> None:
+        """ Adds all the given items to the bag (bulk counting). """
+        added = Counter(iter(items)) # mappings are iterables of keys too
+        self.__counts.update(added)
+        self.__len += added.total()
+
+    def remove(self, item: ItemT, multiplicity: int = 1) -> None:
+        """
+        Removes the item from the bag, with the given multiplicity.
+        Raises KeyError if the item is not in the bag,
+        and ValueError if it doesn't have sufficient multiplicity.
+        """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        count = self.__counts.get(item)
+        if count is None:
+            raise KeyError(item)
+        if multiplicity > count:
+            raise ValueError(
+                f"Cannot remove {multiplicity} copies, found {count = }"
+            )
+        if multiplicity == count:
+            del self.__counts[item]
+        else:
+            self.__counts[item] = count-multiplicity
+        self.__len -= multiplicity
+
+    def discard(self, item: ItemT, multiplicity: int = 1) -> int:
+        """
+        Removes up to the given multiplicity of the item from the bag,
+        returning the number of copies actually removed.
+        """
+        count = self.__counts.get(item, 0)
+        removed = min(count, multiplicity)
+        if removed:
+            self.remove(item, removed)
+        return removed
+
+    def distinct(self) -> Iterator[ItemT]:
+        """ Iterates over the distinct items in the bag. """
+        return iter(self.__counts)
+
+    def counts(self) -> Iterator[tuple[ItemT, int]]:
+        """ Iterates over the distinct items and their multiplicities. """
+        return iter(self.__counts.items())
+
+    @property
+    def num_distinct(self) -> int:
+        """ The number of distinct items in the bag. """
+        return len(self.__counts)
+
+    def copy(self) -> Bag[ItemT]:
+        """ A shallow copy of the bag. """
+        return Bag.__from_counter(self.__counts.copy(), self.__len)
+
+    @staticmethod
+    def __from_counter(counts: Counter[Any], length: int) -> Bag[Any]:
+        """
+        Private constructor, taking ownership of a counter
+        with positive counts only, whose total is the given length.
+        """
+        bag: Bag[Any] = Bag.__new__(Bag)
+        bag.__counts = counts
+        bag.__len = length
+        return bag
+
+    # Special methods
+
+    def __len__(self) -> int:
+        """ The total number of items in the bag, with repetition. """
+        return self.__len
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self.__counts
+
+    def __iter__(self) -> Iterator[ItemT]:
+        """ Iterates over the items in the bag, with repetition. """
+        return self.__counts.elements()
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Bag):
+            return NotImplemented
+        # Compare lengths first, to avoid comparing counts when possible.
+        return self.__len == other.__len and self.__counts == other.__counts
+
+    __hash__ = None # type: ignore[assignment]
+    # Bags are mutable, so they must not be hashable.
+
+    def __or__(self, other: Bag[ItemT]) -> Bag[ItemT]:
+        """ Union: the maximum of the multiplicities. """
+        if not isinstance(other, Bag):
+            return NotImplemented
+        big, small = self.__by_size(other)
+        counts = big.__counts.copy()
+        length = big.__len
+        for item, count in small.__counts.items():
+            current = counts[item]
+            if count > current:
+                counts[item] = count
+                length += count-current
+        return Bag.__from_counter(counts, length)
+
+    def __and__(self, other: Bag[ItemT]) -> Bag[ItemT]:
+        """ Intersection: the minimum of the multiplicities. """
+        if not isinstance(other, Bag):
+            return NotImplemented
+        big, small = self.__by_size(other)
+        big_counts = big.__counts
+        counts: Counter[ItemT] = Counter()
+        length = 0
+        for item, count in small.__counts.items():
+            common = min(count, big_counts[item])
+            if common:
+                counts[item] = common
+                length += common
+        return Bag.__from_counter(counts, length)
+
+    def __add__(self, other: Bag[ItemT]) -> Bag[ItemT]:
+        """ Sum: the sum of the multiplicities. """
+        if not isinstance(other, Bag):
+            return NotImplemented
+        big, small = self.__by_size(other)
+        counts = big.__counts.copy()
+        counts.update(small.__counts)
+        return Bag.__from_counter(counts, self.__len+other.__len)
+
+    def __sub__(self, other: Bag[ItemT]) -> Bag[ItemT]:
+        """ Difference: the multiplicities are subtracted (down to zero). """
+        if not isinstance(other, Bag):
+            return NotImplemented
+        counts = self.__counts.copy()
+        length = self.__len
+        for item, count in other.__counts.items():
+            current = counts.get(item)
+            if current is None:
+                continue
+            if count >= current:
+                del counts[item]
+                length -= current
+            else:
+                counts[item] = current-count
+                length -= count
+        return Bag.__from_counter(counts, length)
+
+    def __by_size(self, other: Bag[ItemT]) -> tuple[Bag[ItemT], Bag[ItemT]]:
+        """ The two bags, the one with more distinct items first. """
+        if len(self.__counts) >= len(other.__counts):
+            return self, other
+        return other, self
+
+    def __repr__(self) -> str:
+        return f"Bag.from_counts({dict(self.__counts)!r})"
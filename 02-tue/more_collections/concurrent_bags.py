@@ -0,0 +1,144 @@
+"""
+A thread-safe bag, for ingesting items from many threads at once.
+"""
+
+from __future__ import annotations
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from threading import Lock
+from typing import Any, Generic
+
+from .bags_local import Bag, ItemT
+
+class _Shard(Generic[ItemT]):
+    """ A portion of the counts of a concurrent bag, with its own lock. """
+
+    lock: Lock
+    counts: Counter[ItemT]
+    length: int
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.counts = Counter()
+        self.length = 0
+
+class ConcurrentBag(Generic[ItemT]):
+    """
+    A bag which can be safely updated from multiple threads.
+
+    Counts are striped across a number of shards, each protected by its
+    own lock (items are assigned to shards by hash): threads updating
+    different shards don't contend with each other. Reading the bag as
+    a whole takes a consistent snapshot, holding all locks at once.
+    """
+
+    __shards: tuple[_Shard[ItemT], ...]
+    """ The shards, each holding the counts for some of the items. """
+
+    def __init__(
+        self, items: Iterable[ItemT] = (), num_shards: int = 16
+    ) -> None:
+        if num_shards <= 0:
+            raise ValueError(f"Expected positive, found {num_shards = }")
+        self.__shards = tuple(_Shard() for _ in range(num_shards))
+        self.add_many(items)
+
+    @property
+    def num_shards(self) -> int:
+        """ The number of shards (and locks) that counts are striped across. """
+        return len(self.__shards)
+
+    def __shard(self, item: ItemT) -> _Shard[ItemT]:
+        return self.__shards[hash(item) % len(self.__shards)]
+
+    def count(self, item: ItemT) -> int:
+        """ The multiplicity of the item in the bag (0 if not present). """
+        shard = self.__shard(item)
+        with shard.lock:
+            return shard.counts[item]
+
+    def add(self, item: ItemT, multiplicity: int = 1) -> None:
+        """ Adds the item to the bag, with the given multiplicity. """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        if not multiplicity:
+            return # only positive counts are stored, as in Bag
+        shard = self.__shard(item)
+        with shard.lock:
+            shard.counts[item] += multiplicity
+            shard.length += multiplicity
+
+    def add_many(self, items: Iterable[ItemT]) -> None:
+        """
+        Adds all the given items to the bag. Items are first counted
+        locally without holding any lock, then each shard is updated
+        by taking its lock only once.
+        """
+        num_shards = len(self.__shards)
+        batches: list[dict[ItemT, int]] = [{} for _ in range(num_shards)]
+        for item, count in Counter(iter(items)).items(): # keys of mappings, as in Bag
+            batches[hash(item) % num_shards][item] = count
+        for shard, batch in zip(self.__shards, batches):
+            if not batch:
+                continue
+            total = sum(batch.values())
+            with shard.lock:
+                shard.counts.update(batch)
+                shard.length += total
+
+    def remove(self, item: ItemT, multiplicity: int = 1) -> None:
+        """
+        Removes the item from the bag, with the given multiplicity.
+        Raises KeyError if the item is not in the bag,
+        and ValueError if it doesn't have sufficient multiplicity.
+        """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        shard = self.__shard(item)
+        with shard.lock:
+            count = shard.counts.get(item)
+            if count is None:
+                raise KeyError(item)
+            if multiplicity > count:
+                raise ValueError(
+                    f"Cannot remove {multiplicity} copies, found {count = }"
+                )
+            if multiplicity == count:
+                del shard.counts[item]
+            else:
+                shard.counts[item] = count-multiplicity
+            shard.length -= multiplicity
+
+    def snapshot(self) -> Bag[ItemT]:
+        """
+        A consistent copy of the bag's contents: all shards are locked
+        (always in the same order, to avoid deadlocks) while copying.
+        """
+        for shard in self.__shards:
+            shard.lock.acquire()
+        try:
+            merged: Counter[ItemT] = Counter()
+            for shard in self.__shards:
+                merged.update(shard.counts)
+        finally:
+            for shard in reversed(self.__shards):
+                shard.lock.release()
+        return Bag.from_counts(merged)
+
+    def __len__(self) -> int:
+        """ The total number of items, summed over shards (not atomic). """
+        total = 0
+        for shard in self.__shards:
+            with shard.lock:
+                total += shard.length
+        return total
+
+    def __contains__(self, item: Any) -> bool:
+        return self.count(item) > 0
+
+    def __iter__(self) -> Iterator[ItemT]:
+        """ Iterates over a consistent snapshot of the bag. """
+        return iter(self.snapshot())
+
+    def __repr__(self) -> str:
+        return f"ConcurrentBag({self.snapshot()!r})"
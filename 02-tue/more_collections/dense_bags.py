@@ -0,0 +1,235 @@
+"""
+A dense variant of :class:`Bag`, for items which are small non-negative ints.
+
+Counts are stored in a NumPy array indexed by item, rather than in a dict:
+this uses 8 bytes per possible item (rather than ~100 bytes per distinct
+item), and bags can be built and combined with vectorised operations.
+"""
+
+from __future__ import annotations
+from collections.abc import Iterable, Iterator, Sequence
+from numbers import Integral
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from .bags_local import Bag
+
+Counts = npt.NDArray[np.int64]
+""" Type alias for arrays of counts. """
+
+class DenseBag:
+    """
+    A bag of ints in ``range(universe_size)``, with the same API as
+    :class:`Bag` (and conversions to and from it).
+    """
+
+    @staticmethod
+    def from_bag(bag: Bag[int], universe_size: int) -> DenseBag:
+        """ Converts a bag of ints to a dense bag. """
+        dense = DenseBag(universe_size)
+        for item, count in bag.counts():
+            dense.add(item, count)
+        return dense
+
+    __counts: Counts
+    """ Multiplicity of each item, indexed by item. """
+
+    __len: int
+    """ Total number of items in the bag, kept up to date incrementally. """
+
+    def __init__(
+        self,
+        universe_size: int,
+        items: Iterable[int] | npt.NDArray[np.integer[Any]] = ()
+    ) -> None:
+        if universe_size < 0:
+            raise ValueError(f"Expected non-negative, found {universe_size = }")
+        self.__counts = np.zeros(universe_size, dtype=np.int64)
+        self.__len = 0
+        self.update(items)
+
+    @property
+    def universe_size(self) -> int:
+        """ Items are ints in range(universe_size). """
+        return len(self.__counts)
+
+    @property
+    def count_array(self) -> Counts:
+        """ A read-only view of the multiplicities, indexed by item. """
+        view = self.__counts.view()
+        view.flags.writeable = False
+        return view
+
+    def __check(self, item: int) -> None:
+        # Same items as update: floats such as 3.0 would index the counts.
+        if not isinstance(item, Integral):
+            raise TypeError(f"Expected integer items, found {item = }")
+        if not 0 <= item < len(self.__counts):
+            raise ValueError(
+                f"Item must be in range({len(self.__counts)}), found {item = }"
+            )
+
+    def count(self, item: int) -> int:
+        """ The multiplicity of the item in the bag (0 if not present). """
+        if not isinstance(item, Integral) or not 0 <= item < len(self.__counts):
+            return 0
+        return int(self.__counts[int(item)])
+
+    def add(self, item: int, multiplicity: int = 1) -> None:
+        """ Adds the item to the bag, with the given multiplicity. """
+        self.__check(item)
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        self.__counts[int(item)] += multiplicity
+        self.__len += multiplicity
+
+    def update(
+        self,
+        items: Iterable[int] | npt.NDArray[np.integer[Any]]
+    ) -> None:
+        """ Adds all the given items to the bag, counting with bincount. """
+        if isinstance(items, np.ndarray):
+            arr = items.ravel()
+        else:
+            # Not np.fromiter(items, dtype=np.int64), which would silently
+            # truncate floats and parse strings: NumPy infers the dtype of
+            # the items instead, which must be an integer one.
+            arr = np.asarray(items if isinstance(items, Sequence) else list(items))
+        if not arr.size:
+            return
+        if arr.dtype.kind not in "iu":
+            raise TypeError(f"Expected integer items, found {arr.dtype = }")
+        low, high = int(arr.min()), int(arr.max())
+        self.__check(low)
+        self.__check(high)
+        # Safe after the range checks (bincount rejects e.g. uint64).
+        arr = arr.astype(np.intp, copy=False)
+        self.__counts += np.bincount(arr, minlength=len(self.__counts))
+        self.__len += int(arr.size)
+
+    def remove(self, item: int, multiplicity: int = 1) -> None:
+        """
+        Removes the item from the bag, with the given multiplicity.
+        Raises KeyError if the item is not in the bag,
+        and ValueError if it doesn't have sufficient multiplicity.
+        """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        count = self.count(item)
+        if not count:
+            raise KeyError(item)
+        if multiplicity > count:
+            raise ValueError(
+                f"Cannot remove {multiplicity} copies, found {count = }"
+            )
+        self.__counts[item] -= multiplicity
+        self.__len -= multiplicity
+
+    def discard(self, item: int, multiplicity: int = 1) -> int:
+        """
+        Removes up to the given multiplicity of the item from the bag,
+        returning the number of copies actually removed.
+        """
+        removed = min(self.count(item), multiplicity)
+        if removed:
+            self.remove(item, removed)
+        return removed
+
+    def distinct(self) -> Iterator[int]:
+        """ Iterates over the distinct items in the bag. """
+        return iter(np.flatnonzero(self.__counts).tolist())
+
+    def counts(self) -> Iterator[tuple[int, int]]:
+        """ Iterates over the distinct items and their multiplicities. """
+        items = np.flatnonzero(self.__counts)
+        return zip(items.tolist(), self.__counts[items].tolist())
+
+    @property
+    def num_distinct(self) -> int:
+        """ The number of distinct items in the bag. """
+        return int(np.count_nonzero(self.__counts))
+
+    def copy(self) -> DenseBag:
+        """ A copy of the bag. """
+        return DenseBag.__from_counts(self.__counts.copy(), self.__len)
+
+    def to_bag(self) -> Bag[int]:
+        """ Converts the dense bag to a (hash-counted) bag. """
+        return Bag.from_counts(dict(self.counts()))
+
+    @staticmethod
+    def __from_counts(counts: Counts, length: int | None = None) -> DenseBag:
+        """ Private constructor, taking ownership of an array of counts. """
+        bag = DenseBag.__new__(DenseBag)
+        bag.__counts = counts
+        bag.__len = int(counts.sum()) if length is None else length
+        return bag
+
+    # Special methods
+
+    def __len__(self) -> int:
+        """ The total number of items in the bag, with repetition. """
+        return self.__len
+
+    def __contains__(self, item: Any) -> bool:
+        # Integral includes the integer types of NumPy, e.g. np.int64.
+        return self.count(item) > 0
+
+    def __iter__(self) -> Iterator[int]:
+        """ Iterates over the items in the bag, with repetition. """
+        for item, count in self.counts():
+            for _ in range(count):
+                yield item
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Bag):
+            return self.to_bag() == other
+        if not isinstance(other, DenseBag):
+            return NotImplemented
+        if self.__len != other.__len:
+            return False
+        lhs, rhs = self.__aligned(other)
+        return bool(np.array_equal(lhs, rhs))
+
+    __hash__ = None # type: ignore[assignment]
+    # Bags are mutable, so they must not be hashable.
+
+    def __aligned(self, other: DenseBag) -> tuple[Counts, Counts]:
+        """ The count arrays of the two bags, padded to the same size. """
+        lhs, rhs = self.__counts, other.__counts
+        if len(lhs) < len(rhs):
+            lhs = np.pad(lhs, (0, len(rhs)-len(lhs)))
+        elif len(rhs) < len(lhs):
+            rhs = np.pad(rhs, (0, len(lhs)-len(rhs)))
+        return lhs, rhs
+
+    def __or__(self, other: DenseBag) -> DenseBag:
+        """ Union: the maximum of the multiplicities. """
+        if not isinstance(other, DenseBag):
+            return NotImplemented
+        return DenseBag.__from_counts(np.maximum(*self.__aligned(other)))
+
+    def __and__(self, other: DenseBag) -> DenseBag:
+        """ Intersection: the minimum of the multiplicities. """
+        if not isinstance(other, DenseBag):
+            return NotImplemented
+        return DenseBag.__from_counts(np.minimum(*self.__aligned(other)))
+
+    def __add__(self, other: DenseBag) -> DenseBag:
+        """ Sum: the sum of the multiplicities. """
+        if not isinstance(other, DenseBag):
+            return NotImplemented
+        lhs, rhs = self.__aligned(other)
+        return DenseBag.__from_counts(lhs+rhs, self.__len+other.__len)
+
+    def __sub__(self, other: DenseBag) -> DenseBag:
+        """ Difference: the multiplicities are subtracted (down to zero). """
+        if not isinstance(other, DenseBag):
+            return NotImplemented
+        lhs, rhs = self.__aligned(other)
+        return DenseBag.__from_counts(np.maximum(lhs-rhs, 0))
+
+    def __repr__(self) -> str:
+        return f"DenseBag({self.universe_size}, {list(self)!r})"
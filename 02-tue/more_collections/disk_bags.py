@@ -0,0 +1,517 @@
+"""
+A persistent variant of :class:`Bag`, stored on disk, for bags with more
+distinct items than fit in memory. Items are limited to str, bytes and int.
+
+The bag is a directory holding two memory-mapped files:
+
+- the table: an open-addressing hash table (with linear probing), whose
+  slots hold fixed-width fields: a 64-bit hash of the item, its count,
+  and the position and length of the item in the keys file;
+- the keys: the items themselves, encoded as bytes and appended one after
+  the other, which are only read to confirm a match when hashes are equal.
+
+Hashes are computed with BLAKE2 (not with :func:`hash`, which changes from
+one process to the next for str and bytes), so that a bag can be reopened
+at once, without reloading or rehashing anything: the operating system
+pages in the parts of the table which are used.
+
+Each slot takes 32 bytes, so that a page of 4 KiB holds 128 slots, and
+linear probing almost always stays within one page. Batches of items are
+counted in memory first, then sorted by slot, so that the table is updated
+in a single sweep, touching each page at most once.
+
+The header of the table (the counters of the bag) is updated in the mapped
+file after every change, and marked dirty until the changes are flushed:
+a bag which was not closed (e.g. if the process was killed in the middle
+of an update) recovers its counters from the slots when it is reopened.
+"""
+
+from __future__ import annotations
+import os
+import struct
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from hashlib import blake2b
+from itertools import repeat
+from mmap import mmap
+from pathlib import Path
+from typing import Any, BinaryIO, Final, Union
+
+from .bags_local import Bag
+
+Item = Union[str, bytes, int]
+""" Type alias for the items of disk bags. """
+
+_MAGIC: Final = b"DISKBAG\x02"
+""" Identifies table files (and the version of the format). """
+
+_HEADER: Final = struct.Struct("<8sQQQQQQ")
+"""
+Header of the table file: magic, number of slots, number of slots used,
+number of distinct items, total number of items, bytes used in the keys file,
+and whether there are changes which were not flushed (1) or not (0).
+"""
+
+_HEADER_SIZE: Final = 4096
+""" Space reserved for the header: a page, so that slots are page-aligned. """
+
+_SLOT_WORDS: Final = 4
+""" Fields in a slot (64-bit each): hash, count, key offset, key length. """
+
+_USED: Final = 1 << 63
+""" Set in all stored hashes, so that a zero hash marks an empty slot. """
+
+_MAX_LOAD: Final = 0.7
+""" The table is doubled before more than this fraction of slots is used. """
+
+_MIN_KEYS_SIZE: Final = 1 << 20
+""" Initial size of the keys file, doubled whenever it is full. """
+
+
+def _encode(item: Item) -> bytes:
+    """ Encodes an item as bytes, tagged with its type. """
+    if type(item) is str:
+        return b"s"+item.encode()
+    if type(item) is bytes:
+        return b"b"+item
+    if type(item) is int:
+        return b"i"+str(item).encode()
+    raise TypeError(f"Expected str, bytes or int, found {item = }")
+
+
+def _decode(key: bytes) -> Item:
+    """ Decodes an item encoded by :func:`_encode`. """
+    tag, data = key[:1], key[1:]
+    if tag == b"s":
+        return data.decode()
+    if tag == b"b":
+        return data
+    return int(data)
+
+
+def _hash(key: bytes) -> int:
+    """ The hash of an encoded item, as stored in the table. """
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little") | _USED
+
+
+class DiskBag:
+    """
+    A bag of str, bytes and int items, stored in a directory on disk,
+    with the same API as :class:`Bag` (and conversions to and from it).
+
+    Changes are written to memory-mapped files, and reach the disk when
+    the operating system decides to, or when :meth:`flush` or :meth:`close`
+    is called (also on exiting a ``with`` block).
+    """
+
+    @staticmethod
+    def from_bag(bag: Bag[Any], path: str | os.PathLike[str]) -> DiskBag:
+        """ Stores a bag of str, bytes and int items on disk. """
+        disk = DiskBag(path)
+        disk.__update_counts(bag.counts())
+        return disk
+
+    __path: Path
+    """ The directory holding the files of the bag. """
+
+    __table_file: BinaryIO
+    __table: mmap
+    __slots: memoryview
+    """ The slots of the table, as a flat sequence of 64-bit fields. """
+
+    __keys_file: BinaryIO
+    __keys: mmap
+
+    __num_slots: int
+    """ The number of slots in the table, a power of 2. """
+
+    __num_used: int
+    """ The number of slots used (including by items whose count is now 0). """
+
+    __num_distinct: int
+    """ The number of items with a positive count. """
+
+    __len: int
+    """ Total number of items in the bag. """
+
+    __keys_used: int
+    """ Number of bytes used in the keys file (the rest is preallocated). """
+
+    __dirty: bool
+    """ Whether there are changes which were not flushed. """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        items: Iterable[Item] = (),
+        num_slots: int = 1 << 16
+    ) -> None:
+        """
+        Opens the bag stored in the directory (creating it if needed, with
+        the given initial number of slots), and adds the given items.
+        """
+        if num_slots <= 0 or num_slots & (num_slots-1):
+            raise ValueError(f"Expected a power of 2, found {num_slots = }")
+        self.__path = Path(path)
+        table_path = self.__path/"table.bin"
+        if table_path.exists():
+            self.__table_file = open(table_path, "r+b")
+            self.__keys_file = open(self.__path/"keys.bin", "r+b")
+            self.__map_table()
+            magic, *fields, dirty = _HEADER.unpack_from(self.__table)
+            if magic != _MAGIC:
+                # Not a table of this format (or version): the files are left
+                # untouched, closed directly (close() would write a header).
+                self.__close_table()
+                self.__keys_file.close()
+                raise ValueError(f"Not a disk bag, found {path = }")
+            (self.__num_slots, self.__num_used, self.__num_distinct,
+             self.__len, self.__keys_used) = fields
+            self.__dirty = bool(dirty)
+        else:
+            self.__path.mkdir(parents=True, exist_ok=True)
+            self.__table_file = open(table_path, "w+b")
+            self.__table_file.truncate(_HEADER_SIZE+num_slots*_SLOT_WORDS*8)
+            self.__keys_file = open(self.__path/"keys.bin", "w+b")
+            self.__keys_file.truncate(_MIN_KEYS_SIZE)
+            self.__num_slots = num_slots
+            self.__num_used = self.__num_distinct = self.__len = 0
+            self.__keys_used = 0
+            self.__dirty = False
+            self.__map_table()
+            self.__write_header()
+        self.__keys = mmap(self.__keys_file.fileno(), 0)
+        if self.__dirty:
+            # Not flushed since it was last changed: the header may lag
+            # behind the slots, so the counters are recounted from them.
+            self.__recover()
+        self.update(items)
+
+    def __map_table(self) -> None:
+        self.__table = mmap(self.__table_file.fileno(), 0)
+        self.__slots = memoryview(self.__table)[_HEADER_SIZE:].cast("Q")
+
+    def __write_header(self) -> None:
+        _HEADER.pack_into(
+            self.__table, 0, _MAGIC, self.__num_slots, self.__num_used,
+            self.__num_distinct, self.__len, self.__keys_used, self.__dirty
+        )
+
+    def __mark_dirty(self) -> None:
+        """ Marks the header dirty, before the first change since the last flush. """
+        if not self.__dirty:
+            self.__dirty = True
+            self.__write_header()
+
+    def __recover(self) -> None:
+        """
+        Recomputes the counters in the header from the slots, after changes
+        which were not flushed (the header may lag behind the slots). Keys
+        appended to the keys file without a slot are lost (and overwritten).
+        """
+        slots = self.__slots
+        num_used = num_distinct = total = keys_used = 0
+        for base in range(0, self.__num_slots*_SLOT_WORDS, _SLOT_WORDS):
+            if not slots[base]:
+                continue
+            count = slots[base+1]
+            num_used += 1
+            num_distinct += count > 0
+            total += count
+            keys_used = max(keys_used, slots[base+2]+slots[base+3])
+        self.__num_used, self.__num_distinct = num_used, num_distinct
+        self.__len, self.__keys_used = total, keys_used
+        self.flush()
+
+    @property
+    def path(self) -> Path:
+        """ The directory holding the files of the bag. """
+        return self.__path
+
+    @property
+    def num_slots(self) -> int:
+        """ The number of slots in the hash table. """
+        return self.__num_slots
+
+    def __find(self, h: int, key: bytes) -> int:
+        """
+        The index of the slot holding the encoded item with hash h, or of
+        the empty slot where it would be stored.
+        """
+        slots, keys = self.__slots, self.__keys
+        mask = self.__num_slots-1
+        i = h & mask
+        while True:
+            base = i*_SLOT_WORDS
+            stored = slots[base]
+            if not stored:
+                return i
+            if stored == h:
+                offset = slots[base+2]
+                if keys[offset:offset+slots[base+3]] == key:
+                    return i
+            i = (i+1) & mask
+
+    def count(self, item: Item) -> int:
+        """ The multiplicity of the item in the bag (0 if not present). """
+        key = _encode(item)
+        i = self.__find(_hash(key), key)
+        return self.__slots[i*_SLOT_WORDS+1]
+
+    def add(self, item: Item, multiplicity: int = 1) -> None:
+        """ Adds the item to the bag, with the given multiplicity. """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        if multiplicity:
+            key = _encode(item)
+            self.__mark_dirty()
+            self.__reserve(1)
+            self.__increment(_hash(key), key, multiplicity)
+            self.__write_header()
+
+    def update(self, items: Iterable[Item]) -> None:
+        """
+        Adds all the given items to the bag. Items are first counted in
+        memory, then the table is updated in the order of its slots.
+        """
+        # The iterator hides mappings, which Counter would take as counts.
+        self.__update_counts(Counter(iter(items)).items())
+
+    def __update_counts(self, counts: Iterable[tuple[Item, int]]) -> None:
+        """ Adds items with the given (non-negative) multiplicities. """
+        batch: list[tuple[int, bytes, int]] = []
+        for item, count in counts:
+            # Checked before anything is written, so that errors leave no trace.
+            if count < 0:
+                raise ValueError(f"Expected non-negative, found {count = }")
+            if count:
+                key = _encode(item)
+                batch.append((_hash(key), key, count))
+        if not batch:
+            return
+        self.__mark_dirty()
+        while batch:
+            batch = self.__sweep(batch)
+            if batch:
+                self.__resize(2*self.__num_slots)
+        self.__write_header()
+
+    def __sweep(self, batch: list[tuple[int, bytes, int]]) -> list[tuple[int, bytes, int]]:
+        """
+        Adds the (hash, encoded item, count) entries to the table, in the
+        order of its slots, until a new item would overload the table:
+        returns the entries which were not added. The table only grows
+        for new items, which are not known before probing for them.
+        """
+        mask = self.__num_slots-1
+        max_used = int(_MAX_LOAD*self.__num_slots)
+        # Probing goes up from the home slot, wrapping around at the end.
+        batch.sort(key=lambda entry: entry[0] & mask)
+        # Same as calling __increment for each item, inlined (hot loop).
+        slots, keys = self.__slots, self.__keys
+        num_used, num_distinct, total = self.__num_used, self.__num_distinct, self.__len
+        try:
+            for n, (h, key, count) in enumerate(batch):
+                i = h & mask
+                while True:
+                    base = i*_SLOT_WORDS
+                    stored = slots[base]
+                    if not stored:
+                        if num_used >= max_used:
+                            return batch[n:]
+                        slots[base+2] = self.__append_key(key)
+                        keys = self.__keys # remapped if the file grew
+                        slots[base+3] = len(key)
+                        slots[base+1] = count
+                        slots[base] = h # last: the slot is complete once used
+                        num_used += 1
+                        num_distinct += 1
+                        break
+                    if stored == h:
+                        offset = slots[base+2]
+                        if keys[offset:offset+slots[base+3]] == key:
+                            current = slots[base+1]
+                            slots[base+1] = current+count
+                            num_distinct += not current
+                            break
+                    i = (i+1) & mask
+                total += count
+            return []
+        finally:
+            # Counters are kept consistent with the slots, even on errors.
+            self.__num_used, self.__num_distinct, self.__len = num_used, num_distinct, total
+
+    def __increment(self, h: int, key: bytes, delta: int) -> None:
+        """
+        Adds delta to the count of the encoded item with hash h, storing
+        the item if needed (there must be room for it in the table).
+        """
+        slots = self.__slots
+        base = self.__find(h, key)*_SLOT_WORDS
+        count = slots[base+1]
+        if not slots[base]:
+            slots[base+2] = self.__append_key(key)
+            slots[base+3] = len(key)
+            slots[base] = h # last: the slot is complete once used
+            self.__num_used += 1
+        new_count = count+delta
+        slots[base+1] = new_count
+        self.__num_distinct += (new_count > 0)-(count > 0)
+        self.__len += delta
+
+    def __append_key(self, key: bytes) -> int:
+        """ Appends an encoded item to the keys file, returning its offset. """
+        offset = self.__keys_used
+        end = offset+len(key)
+        if end > len(self.__keys):
+            size = max(2*len(self.__keys), end)
+            self.__keys.close()
+            self.__keys_file.truncate(size)
+            self.__keys = mmap(self.__keys_file.fileno(), 0)
+        self.__keys[offset:end] = key
+        self.__keys_used = end
+        return offset
+
+    def __reserve(self, extra: int) -> None:
+        """ Makes sure that the table has room for extra more items. """
+        num_slots = self.__num_slots
+        while self.__num_used+extra > _MAX_LOAD*num_slots:
+            num_slots *= 2
+        if num_slots != self.__num_slots:
+            self.__resize(num_slots)
+
+    def __resize(self, num_slots: int) -> None:
+        """
+        Moves the items to a new table with the given number of slots.
+        Only the stored hashes are needed to place the items: the keys
+        are left untouched. The new table replaces the old one atomically.
+        """
+        new_path = self.__path/"table.bin.new"
+        with open(new_path, "w+b") as new_file:
+            new_file.truncate(_HEADER_SIZE+num_slots*_SLOT_WORDS*8)
+            new_table = mmap(new_file.fileno(), 0)
+            new_slots = memoryview(new_table)[_HEADER_SIZE:].cast("Q")
+            old_slots = self.__slots
+            mask = num_slots-1
+            for base in range(0, self.__num_slots*_SLOT_WORDS, _SLOT_WORDS):
+                h = old_slots[base]
+                if not h:
+                    continue
+                i = h & mask
+                while new_slots[i*_SLOT_WORDS]:
+                    i = (i+1) & mask
+                new_base = i*_SLOT_WORDS
+                new_slots[new_base:new_base+_SLOT_WORDS] = old_slots[base:base+_SLOT_WORDS]
+            new_slots.release()
+            self.__num_slots = num_slots
+            self.__close_table()
+            self.__table = new_table
+            self.__write_header()
+            new_table.flush()
+            new_table.close()
+        os.replace(new_path, self.__path/"table.bin")
+        self.__table_file = open(self.__path/"table.bin", "r+b")
+        self.__map_table()
+
+    def remove(self, item: Item, multiplicity: int = 1) -> None:
+        """
+        Removes the item from the bag, with the given multiplicity.
+        Raises KeyError if the item is not in the bag,
+        and ValueError if it doesn't have sufficient multiplicity.
+        """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        key = _encode(item)
+        h = _hash(key)
+        count = self.__slots[self.__find(h, key)*_SLOT_WORDS+1]
+        if not count:
+            raise KeyError(item)
+        if multiplicity > count:
+            raise ValueError(
+                f"Cannot remove {multiplicity} copies, found {count = }"
+            )
+        # The item keeps its slot (with count 0), so that probing is unaffected.
+        self.__mark_dirty()
+        self.__increment(h, key, -multiplicity)
+        self.__write_header()
+
+    def discard(self, item: Item, multiplicity: int = 1) -> int:
+        """
+        Removes up to the given multiplicity of the item from the bag,
+        returning the number of copies actually removed.
+        """
+        removed = min(self.count(item), multiplicity)
+        if removed:
+            self.remove(item, removed)
+        return removed
+
+    def distinct(self) -> Iterator[Item]:
+        """ Iterates over the distinct items in the bag. """
+        return (item for item, _ in self.counts())
+
+    def counts(self) -> Iterator[tuple[Item, int]]:
+        """
+        Iterates over the distinct items and their multiplicities,
+        in the order of the table (unrelated to the items).
+        """
+        slots = self.__slots
+        for base in range(0, self.__num_slots*_SLOT_WORDS, _SLOT_WORDS):
+            count = slots[base+1]
+            if count:
+                offset = slots[base+2]
+                yield _decode(self.__keys[offset:offset+slots[base+3]]), count
+
+    @property
+    def num_distinct(self) -> int:
+        """ The number of distinct items in the bag. """
+        return self.__num_distinct
+
+    def to_bag(self) -> Bag[Item]:
+        """ Loads the disk bag into a (hash-counted, in-memory) bag. """
+        return Bag.from_counts(dict(self.counts()))
+
+    def flush(self) -> None:
+        """ Writes all changes to disk. """
+        # The keys go first: the slots of the table refer to them.
+        self.__keys.flush()
+        self.__table.flush()
+        self.__dirty = False
+        self.__write_header()
+        self.__table.flush()
+
+    def close(self) -> None:
+        """ Writes all changes to disk, and closes the files. """
+        if self.__table.closed:
+            return
+        self.flush()
+        self.__close_table()
+        self.__keys.close()
+        self.__keys_file.close()
+
+    def __close_table(self) -> None:
+        self.__slots.release()
+        self.__table.close()
+        self.__table_file.close()
+
+    # Special methods
+
+    def __enter__(self) -> DiskBag:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """ The total number of items in the bag, with repetition. """
+        return self.__len
+
+    def __contains__(self, item: Any) -> bool:
+        return type(item) in (str, bytes, int) and self.count(item) > 0
+
+    def __iter__(self) -> Iterator[Item]:
+        """ Iterates over the items in the bag, with repetition. """
+        for item, count in self.counts():
+            yield from repeat(item, count)
+
+    def __repr__(self) -> str:
+        return f"DiskBag({str(self.__path)!r})"
@@ -0,0 +1,462 @@
+"""
+An immutable, hashable variant of :class:`Bag`, which can be used as a dict
+key or set member, and from which modified bags can be derived cheaply.
+
+Counts are stored in a persistent hash array mapped trie (HAMT): a tree with
+up to 32 children per node, where the path to an item is given by 5-bit
+chunks of its hash. Deriving a bag with one item added or removed copies
+only the nodes on the path to that item (O(log n) of them, 32-way), and
+shares all the other nodes with the original bag, so that snapshots of a
+bag being modified are cheap in both time and memory.
+
+The hash of a bag is the sum of the hashes of its (item, multiplicity)
+pairs, which does not depend on the order of the items and is updated in
+constant time whenever an item's multiplicity changes.
+"""
+
+from __future__ import annotations
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any, Final, Generic, Union
+
+from .bags_local import Bag, ItemT
+
+_BITS: Final = 5
+""" Number of bits of the hash consumed at each level of the trie. """
+
+_MASK: Final = (1 << _BITS)-1
+""" Mask selecting the bits of the hash for one level of the trie. """
+
+_HASH_MASK: Final = (1 << 64)-1
+""" Hashes are taken modulo 2**64, so that they are non-negative. """
+
+_Leaf = tuple[int, Any, int]
+""" An item of the bag, as a triple (hash, item, multiplicity). """
+
+
+class _Node:
+    """
+    An inner node of the trie. Bit i of the bitmap is set if the node has
+    an entry for the 5-bit hash chunk i, and the entries are stored in order
+    of chunk, so that the entry for chunk i is at the index given by the
+    number of bits set below bit i.
+    """
+
+    __slots__ = ("bitmap", "entries")
+
+    bitmap: int
+    entries: tuple[_Entry, ...]
+
+    def __init__(self, bitmap: int, entries: tuple[_Entry, ...]) -> None:
+        self.bitmap = bitmap
+        self.entries = entries
+
+
+class _Collision:
+    """ Distinct items with the same (full) hash, in no particular order. """
+
+    __slots__ = ("hash", "leaves")
+
+    hash: int
+    leaves: tuple[_Leaf, ...]
+
+    def __init__(self, hash: int, leaves: tuple[_Leaf, ...]) -> None:
+        self.hash = hash
+        self.leaves = leaves
+
+
+_Entry = Union[_Leaf, _Node, _Collision]
+"""
+An entry of the trie. Nodes with a single leaf (or collision) below them are
+replaced by the leaf itself, so that a given set of items always has the
+same trie.
+"""
+
+
+def _same(leaf: _Leaf, h: int, item: Any) -> bool:
+    """ Whether the leaf holds the item with hash h. """
+    return leaf[0] == h and (leaf[1] is item or leaf[1] == item)
+
+
+def _lookup(entry: _Entry | None, h: int, item: Any) -> int:
+    """ The multiplicity of the item with hash h (0 if not present). """
+    shift = 0
+    while True:
+        if entry is None:
+            return 0
+        if type(entry) is tuple:
+            return entry[2] if _same(entry, h, item) else 0
+        if type(entry) is _Node:
+            bit = 1 << ((h >> shift) & _MASK)
+            if not entry.bitmap & bit:
+                return 0
+            entry = entry.entries[(entry.bitmap & (bit-1)).bit_count()]
+            shift += _BITS
+            continue
+        assert type(entry) is _Collision
+        for leaf in entry.leaves:
+            if _same(leaf, h, item):
+                return leaf[2]
+        return 0
+
+
+def _pair(shift: int, a: _Leaf | _Collision, b: _Leaf) -> _Entry:
+    """ The subtrie holding entries a and b (whose items are distinct). """
+    leaves = a.leaves if isinstance(a, _Collision) else (a,)
+    ha, hb = leaves[0][0], b[0]
+    if ha == hb:
+        return _Collision(ha, leaves+(b,))
+    ia, ib = (ha >> shift) & _MASK, (hb >> shift) & _MASK
+    if ia == ib:
+        return _Node(1 << ia, (_pair(shift+_BITS, a, b),))
+    entries: tuple[_Entry, ...] = (a, b) if ia < ib else (b, a)
+    return _Node((1 << ia) | (1 << ib), entries)
+
+
+def _assoc(
+    entry: _Entry | None, shift: int, leaf: _Leaf
+) -> tuple[_Entry | None, int]:
+    """
+    Sets the multiplicity of an item in the subtrie, given a leaf with the
+    new multiplicity (0 to remove the item). Returns the new subtrie (None
+    if empty) and the old multiplicity. The subtrie is never modified: nodes
+    on the path to the item are copied, and all other nodes are shared.
+    """
+    h, item, count = leaf
+    if entry is None:
+        return (leaf if count else None), 0
+    if type(entry) is tuple:
+        if _same(entry, h, item):
+            return (leaf if count else None), entry[2]
+        if not count:
+            return entry, 0
+        return _pair(shift, entry, leaf), 0
+    if type(entry) is _Collision:
+        if entry.hash != h:
+            if not count:
+                return entry, 0
+            return _pair(shift, entry, leaf), 0
+        leaves = entry.leaves
+        for i, other in enumerate(leaves):
+            if _same(other, h, item):
+                old = other[2]
+                if count:
+                    return _Collision(h, leaves[:i]+(leaf,)+leaves[i+1:]), old
+                rest = leaves[:i]+leaves[i+1:]
+                return (rest[0] if len(rest) == 1 else _Collision(h, rest)), old
+        if not count:
+            return entry, 0
+        return _Collision(h, leaves+(leaf,)), 0
+    assert type(entry) is _Node
+    bitmap, entries = entry.bitmap, entry.entries
+    bit = 1 << ((h >> shift) & _MASK)
+    index = (bitmap & (bit-1)).bit_count()
+    if not bitmap & bit:
+        if not count:
+            return entry, 0
+        return _Node(bitmap | bit, entries[:index]+(leaf,)+entries[index:]), 0
+    child = entries[index]
+    new_child, old = _assoc(child, shift+_BITS, leaf)
+    if new_child is child:
+        return entry, old
+    if new_child is None:
+        bitmap ^= bit
+        entries = entries[:index]+entries[index+1:]
+    else:
+        entries = entries[:index]+(new_child,)+entries[index+1:]
+    if not entries:
+        return None, old
+    if len(entries) == 1 and type(entries[0]) is not _Node:
+        return entries[0], old
+    return _Node(bitmap, entries), old
+
+
+def _build(leaves: list[_Leaf], shift: int) -> _Entry | None:
+    """ The trie holding the given leaves (of distinct items), in bulk. """
+    if len(leaves) <= 1:
+        return leaves[0] if leaves else None
+    h = leaves[0][0]
+    if all(leaf[0] == h for leaf in leaves):
+        return _Collision(h, tuple(leaves))
+    buckets: dict[int, list[_Leaf]] = {}
+    for leaf in leaves:
+        buckets.setdefault((leaf[0] >> shift) & _MASK, []).append(leaf)
+    bitmap = 0
+    entries: list[_Entry] = []
+    for index in sorted(buckets):
+        bitmap |= 1 << index
+        bucket = buckets[index]
+        if len(bucket) == 1: # most of the leaves, skip the call
+            entries.append(bucket[0])
+            continue
+        child = _build(bucket, shift+_BITS)
+        assert child is not None
+        entries.append(child)
+    return _Node(bitmap, tuple(entries))
+
+
+def _leaves(entry: _Entry | None) -> Iterator[_Leaf]:
+    """ Iterates over the leaves of the subtrie. """
+    if entry is None:
+        return
+    if type(entry) is tuple:
+        yield entry
+    elif type(entry) is _Node:
+        for child in entry.entries:
+            yield from _leaves(child)
+    else:
+        assert type(entry) is _Collision
+        yield from entry.leaves
+
+
+def _equal(a: _Entry | None, b: _Entry | None) -> bool:
+    """
+    Whether the subtries hold the same items, with the same multiplicities.
+    Since a set of items always has the same trie, this compares the tries
+    node by node, skipping the subtries shared by both.
+    """
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    if type(a) is tuple:
+        assert type(b) is tuple
+        return a[0] == b[0] and a[2] == b[2] and (a[1] is b[1] or a[1] == b[1])
+    if type(a) is _Node:
+        assert type(b) is _Node
+        return a.bitmap == b.bitmap and all(map(_equal, a.entries, b.entries))
+    assert type(a) is _Collision and type(b) is _Collision
+    return len(a.leaves) == len(b.leaves) and all(
+        _lookup(b, h, item) == count for h, item, count in a.leaves
+    )
+
+
+def _pair_hash(h: int, count: int) -> int:
+    """
+    The contribution to the hash of a bag of an item with hash h
+    and the given multiplicity.
+    """
+    return hash((h, count)) & _HASH_MASK
+
+
+class FrozenBag(Generic[ItemT]):
+    """
+    An immutable bag (aka multiset), with the same read-only API as
+    :class:`Bag`. Instead of modifying the bag, methods like
+    :meth:`with_added` return a new bag sharing most of its structure.
+
+    Frozen bags are hashable, with a hash computed incrementally and cached,
+    and compare equal to bags (frozen or not) with the same items.
+    """
+
+    @staticmethod
+    def from_counts(counts: Mapping[ItemT, int]) -> FrozenBag[ItemT]:
+        """
+        Alternative constructor, building a frozen bag from a mapping of
+        items to their (non-negative) multiplicities.
+        """
+        for item, count in counts.items():
+            if count < 0:
+                raise ValueError(f"Expected non-negative, found {count = }")
+        return FrozenBag.__from_pairs(
+            (item, count) for item, count in counts.items() if count
+        )
+
+    @staticmethod
+    def from_bag(bag: Bag[ItemT]) -> FrozenBag[ItemT]:
+        """ A frozen snapshot of the bag. """
+        return FrozenBag.__from_pairs(bag.counts())
+
+    @staticmethod
+    def __from_pairs(pairs: Iterable[tuple[Any, int]]) -> FrozenBag[Any]:
+        """ Builds a frozen bag from distinct items and positive counts. """
+        leaves = [(hash(item) & _HASH_MASK, item, count) for item, count in pairs]
+        return FrozenBag.__from_root(
+            _build(leaves, 0),
+            sum(leaf[2] for leaf in leaves),
+            len(leaves),
+            sum(_pair_hash(h, count) for h, _, count in leaves) & _HASH_MASK
+        )
+
+    @staticmethod
+    def __from_root(
+        root: _Entry | None, length: int, num_distinct: int, hash_sum: int
+    ) -> FrozenBag[Any]:
+        """ Private constructor, taking a trie and its statistics. """
+        bag: FrozenBag[Any] = FrozenBag.__new__(FrozenBag)
+        bag.__root = root
+        bag.__len = length
+        bag.__num_distinct = num_distinct
+        bag.__hash_sum = hash_sum
+        return bag
+
+    __root: _Entry | None
+    """ The trie of the items and their multiplicities (None if empty). """
+
+    __len: int
+    """ Total number of items in the bag. """
+
+    __num_distinct: int
+    """ Number of distinct items in the bag. """
+
+    __hash_sum: int
+    """ Sum of the hashes of the (item, multiplicity) pairs, modulo 2**64. """
+
+    def __init__(self, items: Iterable[ItemT] = ()) -> None:
+        bag = FrozenBag.__from_pairs(Counter(iter(items)).items()) # keys of mappings
+        self.__root = bag.__root
+        self.__len = bag.__len
+        self.__num_distinct = bag.__num_distinct
+        self.__hash_sum = bag.__hash_sum
+
+    def count(self, item: ItemT) -> int:
+        """ The multiplicity of the item in the bag (0 if not present). """
+        return _lookup(self.__root, hash(item) & _HASH_MASK, item)
+
+    def with_count(self, item: ItemT, count: int) -> FrozenBag[ItemT]:
+        """
+        A bag with the same items, except for the given item, which has
+        the given multiplicity (0 to remove it). Takes time O(log n).
+        """
+        if count < 0:
+            raise ValueError(f"Expected non-negative, found {count = }")
+        h = hash(item) & _HASH_MASK
+        root, old = _assoc(self.__root, 0, (h, item, count))
+        if old == count:
+            return self
+        hash_sum = self.__hash_sum
+        if old:
+            hash_sum -= _pair_hash(h, old)
+        if count:
+            hash_sum += _pair_hash(h, count)
+        return FrozenBag.__from_root(
+            root,
+            self.__len+count-old,
+            self.__num_distinct+(count > 0)-(old > 0),
+            hash_sum & _HASH_MASK
+        )
+
+    def with_added(self, item: ItemT, multiplicity: int = 1) -> FrozenBag[ItemT]:
+        """ A bag with the item added, with the given multiplicity. """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        if not multiplicity:
+            return self
+        return self.with_count(item, self.count(item)+multiplicity)
+
+    def with_removed(self, item: ItemT, multiplicity: int = 1) -> FrozenBag[ItemT]:
+        """
+        A bag with the item removed, with the given multiplicity.
+        Raises KeyError if the item is not in the bag,
+        and ValueError if it doesn't have sufficient multiplicity.
+        """
+        if multiplicity < 0:
+            raise ValueError(f"Expected non-negative, found {multiplicity = }")
+        count = self.count(item)
+        if not count:
+            raise KeyError(item)
+        if multiplicity > count:
+            raise ValueError(
+                f"Cannot remove {multiplicity} copies, found {count = }"
+            )
+        return self.with_count(item, count-multiplicity)
+
+    def distinct(self) -> Iterator[ItemT]:
+        """ Iterates over the distinct items in the bag. """
+        return (item for _, item, _ in _leaves(self.__root))
+
+    def counts(self) -> Iterator[tuple[ItemT, int]]:
+        """ Iterates over the distinct items and their multiplicities. """
+        return ((item, count) for _, item, count in _leaves(self.__root))
+
+    @property
+    def num_distinct(self) -> int:
+        """ The number of distinct items in the bag. """
+        return self.__num_distinct
+
+    def to_bag(self) -> Bag[ItemT]:
+        """ A (mutable) bag with the same items. """
+        return Bag.from_counts(dict(self.counts()))
+
+    # Special methods
+
+    def __len__(self) -> int:
+        """ The total number of items in the bag, with repetition. """
+        return self.__len
+
+    def __contains__(self, item: Any) -> bool:
+        return self.count(item) > 0
+
+    def __iter__(self) -> Iterator[ItemT]:
+        """ Iterates over the items in the bag, with repetition. """
+        for _, item, count in _leaves(self.__root):
+            for _ in range(count):
+                yield item
+
+    def __hash__(self) -> int:
+        return self.__hash_sum
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Bag):
+            if self.__len != len(other) or self.__num_distinct != other.num_distinct:
+                return False
+            return all(self.count(item) == count for item, count in other.counts())
+        if not isinstance(other, FrozenBag):
+            return NotImplemented
+        # Compare sizes and hashes first, to avoid comparing tries when possible.
+        if self.__len != other.__len or self.__hash_sum != other.__hash_sum:
+            return False
+        if self.__num_distinct != other.__num_distinct:
+            return False
+        return _equal(self.__root, other.__root)
+
+    def __or__(self, other: FrozenBag[ItemT]) -> FrozenBag[ItemT]:
+        """ Union: the maximum of the multiplicities. """
+        if not isinstance(other, FrozenBag):
+            return NotImplemented
+        big, small = self.__by_size(other)
+        for item, count in small.counts():
+            if count > big.count(item):
+                big = big.with_count(item, count)
+        return big
+
+    def __and__(self, other: FrozenBag[ItemT]) -> FrozenBag[ItemT]:
+        """ Intersection: the minimum of the multiplicities. """
+        if not isinstance(other, FrozenBag):
+            return NotImplemented
+        big, small = self.__by_size(other)
+        return FrozenBag.__from_pairs(
+            (item, common) for item, count in small.counts()
+            if (common := min(count, big.count(item)))
+        )
+
+    def __add__(self, other: FrozenBag[ItemT]) -> FrozenBag[ItemT]:
+        """ Sum: the sum of the multiplicities. """
+        if not isinstance(other, FrozenBag):
+            return NotImplemented
+        big, small = self.__by_size(other)
+        for item, count in small.counts():
+            big = big.with_added(item, count)
+        return big
+
+    def __sub__(self, other: FrozenBag[ItemT]) -> FrozenBag[ItemT]:
+        """ Difference: the multiplicities are subtracted (down to zero). """
+        if not isinstance(other, FrozenBag):
+            return NotImplemented
+        result = self
+        for item, count in other.counts():
+            current = result.count(item)
+            if current:
+                result = result.with_count(item, max(current-count, 0))
+        return result
+
+    def __by_size(
+        self, other: FrozenBag[ItemT]
+    ) -> tuple[FrozenBag[ItemT], FrozenBag[ItemT]]:
+        """ The two bags, the one with more distinct items first. """
+        if self.__num_distinct >= other.__num_distinct:
+            return self, other
+        return other, self
+
+    def __repr__(self) -> str:
+        return f"FrozenBag.from_counts({dict(self.counts())!r})"
@@ -0,0 +1,228 @@
+"""
+Building bags from huge inputs with a pool of worker processes.
+
+The input is split into chunks, each chunk is counted in a worker process,
+and the partial counts are merged pairwise (also in the workers) in a tree,
+so that the parent process only ever receives the final counts.
+
+Partial counts are shipped between processes as a sequence of distinct
+items together with an array of their counts, rather than as a dict:
+the counts pickle as a single buffer, and when the items are the values
+of a NumPy array the distinct items do too.
+"""
+
+from __future__ import annotations
+import os
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+)
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from .bags_local import Bag, ItemT
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+Partial = tuple[Any, Any]
+"""
+Partial counts: a sequence of distinct items (a list, or a NumPy array)
+and the corresponding counts (an array('q'), or a NumPy array).
+"""
+
+CHUNK_ITEMS = 1 << 20
+""" Default number of items counted by each task. """
+
+FILE_CHUNK_BYTES = 1 << 24
+""" Default size of the byte ranges of a file counted by each task. """
+
+
+def _count_items(items: list[Any]) -> Partial:
+    """ Counts a chunk of items. """
+    counts = Counter(items)
+    return list(counts), array("q", counts.values())
+
+
+def _count_lines(path: str, start: int, stop: int) -> Partial:
+    """
+    Counts the lines starting in the byte range [start, stop) of a file,
+    without their line terminators. A line belongs to the range where its
+    first byte is, so that ranges can be counted independently.
+    """
+    with open(path, "rb") as file:
+        if start > 0:
+            # Skip the line which started in the previous range.
+            file.seek(start-1)
+            file.readline()
+        counts: Counter[str] = Counter()
+        while file.tell() < stop:
+            line = file.readline()
+            if not line:
+                break
+            counts[line.rstrip(b"\r\n").decode()] += 1
+    return list(counts), array("q", counts.values())
+
+
+def _count_memmap(
+    path: str, dtype: str, offset: int, length: int, start: int, stop: int
+) -> Partial:
+    """ Counts the values in a slice of a memory-mapped 1D array. """
+    import numpy as np
+    values = np.memmap(
+        path, dtype=dtype, mode="r", offset=offset, shape=(length,)
+    )
+    keys, counts = np.unique(values[start:stop], return_counts=True)
+    return keys, counts
+
+
+def _count_array(values: npt.NDArray[Any]) -> Partial:
+    """ Counts the values in a (chunk of a) 1D array. """
+    import numpy as np
+    keys, counts = np.unique(values, return_counts=True)
+    return keys, counts
+
+
+def _merge(lhs: Partial, rhs: Partial) -> Partial:
+    """ Merges two partial counts. """
+    lhs_keys, lhs_counts = lhs
+    rhs_keys, rhs_counts = rhs
+    if not isinstance(lhs_keys, list) and not isinstance(rhs_keys, list):
+        # NumPy arrays: vectorised merge.
+        import numpy as np
+        keys, inverse = np.unique(
+            np.concatenate([lhs_keys, rhs_keys]), return_inverse=True
+        )
+        counts = np.bincount(
+            inverse.ravel(),
+            weights=np.concatenate([lhs_counts, rhs_counts]),
+            minlength=len(keys)
+        ).astype(np.int64)
+        return keys, counts
+    merged = dict(zip(_as_list(lhs_keys), _as_list(lhs_counts)))
+    get = merged.get
+    for key, count in zip(_as_list(rhs_keys), _as_list(rhs_counts)):
+        merged[key] = get(key, 0)+count
+    return list(merged), array("q", merged.values())
+
+
+def _as_list(values: Any) -> list[Any]:
+    """ Converts NumPy arrays (and other sequences) to lists. """
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+def _memmap_location(source: Any) -> tuple[str, int] | None:
+    """
+    The file of a 1D memory-mapped array and the offset of its first value
+    in the file, or None if the values are not contiguous in a file. Views of a
+    memmap (e.g. m[50:]) keep the offset of the memmap they were taken
+    from, so it is computed from the address of the values instead.
+    """
+    import numpy as np
+    if not isinstance(source, np.memmap) or source.ndim != 1 \
+            or not source.flags.c_contiguous or not isinstance(source.filename, str):
+        return None
+    root: Any = source
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    if not isinstance(root, np.memmap):
+        return None
+    # The values of the root memmap start at its offset in the file.
+    offset: int = root.offset+(source.ctypes.data-root.ctypes.data)
+    return source.filename, offset
+
+
+def _chunks(items: Iterable[ItemT], chunk_size: int) -> Iterator[list[ItemT]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _tasks(
+    pool: ProcessPoolExecutor,
+    source: Iterable[Any] | os.PathLike[str],
+    chunk_size: int | None
+) -> Iterator[Future[Partial]]:
+    """ Submits the counting tasks for the source, one per chunk. """
+    if isinstance(source, os.PathLike):
+        path = os.fspath(source)
+        size = os.path.getsize(path)
+        chunk_bytes = chunk_size or FILE_CHUNK_BYTES
+        for start in range(0, size, chunk_bytes):
+            yield pool.submit(
+                _count_lines, path, start, min(start+chunk_bytes, size)
+            )
+        return
+    chunk_size = chunk_size or CHUNK_ITEMS
+    if type(source).__module__.startswith("numpy"):
+        import numpy as np
+        location = _memmap_location(source)
+        if isinstance(source, np.memmap) and location is not None:
+            path, offset = location
+            # Workers map the file themselves: no data is sent to them.
+            length = len(source)
+            for start in range(0, length, chunk_size):
+                yield pool.submit(
+                    _count_memmap, path, source.dtype.str,
+                    offset, length, start, min(start+chunk_size, length)
+                )
+            return
+        if isinstance(source, np.ndarray):
+            flat = source.ravel()
+            for start in range(0, len(flat), chunk_size):
+                yield pool.submit(_count_array, flat[start:start+chunk_size])
+            return
+    for chunk in _chunks(source, chunk_size):
+        yield pool.submit(_count_items, chunk)
+
+
+def from_iterable_parallel(
+    source: Iterable[ItemT] | os.PathLike[str],
+    workers: int | None = None,
+    chunk_size: int | None = None
+) -> Bag[Any]:
+    """
+    Builds a bag by counting chunks of the source in worker processes
+    and merging the partial counts pairwise. The chunk size is a number of
+    items (default :data:`CHUNK_ITEMS`), or a number of bytes for files
+    (default :data:`FILE_CHUNK_BYTES`), whose lines vary in length.
+
+    The source can be any iterable (whose items must be picklable),
+    a 1D NumPy array (including a memory-mapped one, whose chunks are read
+    directly by the workers if its values are contiguous), or a path to a
+    text file, whose lines (without line terminators) are counted. Paths
+    must be os.PathLike: a str raises TypeError, rather than having its
+    characters counted.
+    """
+    if chunk_size is not None and chunk_size <= 0:
+        raise ValueError(f"Expected positive, found {chunk_size = }")
+    if isinstance(source, str):
+        # A str is an iterable (of characters), but surely meant as a path.
+        raise TypeError(
+            f"Paths must be os.PathLike (e.g. pathlib.Path), found {source = }"
+        )
+    # Bound the number of tasks in flight, so that the input is not read
+    # (and sent to the workers) faster than it can be counted.
+    max_pending = 2*(workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = _tasks(pool, source, chunk_size)
+        pending: set[Future[Partial]] = set()
+        ready: list[Partial] = []
+        while True:
+            while len(pending) < max_pending:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                pending.add(task)
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            ready.extend(future.result() for future in done)
+            while len(ready) >= 2:
+                pending.add(pool.submit(_merge, ready.pop(), ready.pop()))
+    if not ready:
+        return Bag()
+    (keys, counts), = ready
+    return Bag.from_counts(dict(zip(_as_list(keys), _as_list(counts))))